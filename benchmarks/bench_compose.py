@@ -0,0 +1,329 @@
+"""Compose benchmarks on synthetic layouts, with baseline regression gating.
+
+Sources and layouts are generated offline under ``build/bench``; every case
+runs in a fresh child process so its peak RSS is isolated.
+
+Usage::
+
+    python benchmarks/bench_compose.py                  # run, write latest.json
+    python benchmarks/bench_compose.py --save-baseline  # run, store baseline
+    python benchmarks/bench_compose.py --compare        # run, gate on baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+BENCH_DIR = ROOT / "build" / "bench"
+LATEST = BENCH_DIR / "latest.json"
+BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+# Absolute slack below which a slower or larger run is treated as noise.
+TIME_FLOOR_S = 0.05
+RSS_FLOOR_MB = 16.0
+SOURCE_SIZE = (1600, 1200)
+
+CANVASES = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+    "16k": (15360, 8640),
+}
+
+
+@dataclass(frozen=True)
+class Case:
+    """One synthetic layout: canvas, item count, source format and reuse."""
+    name: str
+    canvas: str
+    items: int
+    fmt: str
+    unique: int
+
+
+def _case(canvas: str, items: int, fmt: str, unique: int | None = None) -> Case:
+    unique = items if unique is None else unique
+    reuse = "unique" if unique == items else f"dup{unique}"
+    return Case(f"{canvas}-{items}-{fmt}-{reuse}", canvas, items, fmt, unique)
+
+
+SUITES = {
+    "quick": [
+        _case("hd", 1, "jpeg"),
+        _case("hd", 16, "png", unique=2),
+        _case("4k", 64, "jpeg"),
+        _case("4k", 100, "png", unique=4),
+    ],
+    "full": [
+        _case("hd", 1, "jpeg"),
+        _case("hd", 1, "png"),
+        _case("hd", 16, "png", unique=2),
+        _case("4k", 64, "jpeg"),
+        _case("4k", 100, "png", unique=4),
+        _case("8k", 256, "jpeg", unique=16),
+        _case("8k", 1000, "jpeg", unique=8),
+        _case("8k", 1000, "png"),
+        _case("16k", 100, "jpeg"),
+        _case("16k", 1000, "png", unique=32),
+    ],
+}
+
+
+def _lyco():
+    if str(SRC) not in sys.path:
+        sys.path.insert(0, str(SRC))
+    from lyco import cli  # pylint: disable=import-outside-toplevel
+
+    return cli
+
+
+def source_path(fmt: str, idx: int) -> Path:
+    """Return the generated source image path for ``fmt`` and index."""
+    ext = "jpg" if fmt == "jpeg" else fmt
+    return BENCH_DIR / "sources" / f"src{idx:04d}.{ext}"
+
+
+def make_source(fmt: str, idx: int) -> Path:
+    """Generate a deterministic synthetic source image, once.
+
+    Each index gets a different Mandelbrot window over colour gradients, so
+    sources compress like photos rather than flat fills.
+    """
+    from PIL import Image, ImageChops  # pylint: disable=import-outside-toplevel
+
+    path = source_path(fmt, idx)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    width, height = SOURCE_SIZE
+    shift = (idx % 17) * 0.05
+    fractal = Image.effect_mandelbrot((width, height), (-2.0 + shift, -1.1, 0.8 + shift, 1.1), 64)
+    horizontal = Image.linear_gradient("L").rotate(90 + idx * 7).resize((width, height))
+    vertical = Image.linear_gradient("L").resize((width, height))
+    image = Image.merge("RGB", (fractal, horizontal, ImageChops.multiply(fractal, vertical)))
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "jpeg":
+        image.save(tmp, format="JPEG", quality=90)
+    else:
+        image.save(tmp, format="PNG")
+    os.replace(tmp, path)
+    return path
+
+
+def make_layout(case: Case) -> Path:
+    """Write the layout for ``case`` as a grid covering its canvas."""
+    cli = _lyco()
+    width, height = CANVASES[case.canvas]
+    cols = 1
+    while cols * cols < case.items:
+        cols += 1
+    rows = -(-case.items // cols)
+    tile_w, tile_h = width // cols, height // rows
+    sources = [str(make_source(case.fmt, idx)) for idx in range(case.unique)]
+    items = [
+        {
+            "file": sources[idx % case.unique],
+            "x": (idx % cols) * tile_w,
+            "y": (idx // cols) * tile_h,
+            "resolution": f"{tile_w}x{tile_h}",
+        }
+        for idx in range(case.items)
+    ]
+    path = BENCH_DIR / "layouts" / f"{case.name}.yml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cli.save_yaml(path, {
+        "canvas_width": width,
+        "canvas_height": height,
+        "output": str(BENCH_DIR / "out" / f"{case.name}.png"),
+        "items": items,
+    })
+    return path
+
+
+def run_case(layout_path: Path, jobs: int) -> dict:
+    """Compose one layout in this process and return its timings.
+
+    Stages mirror ``compose_from_yaml``: parse, decode/resize, paste, encode.
+    """
+    cli = _lyco()
+    stages = {}
+    start = time.perf_counter()
+    layout = cli.load_layout(layout_path)
+    mode = cli.canvas_mode(layout.items, layout.canvas_size)
+    stages["parse"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    tiles = cli.load_tiles(layout.items, jobs=jobs)
+    stages["load"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    canvas = cli.Image.new(mode, layout.canvas_size)
+    for item, tile in zip(layout.items, tiles):
+        canvas.paste(tile, (item.x, item.y))
+    del tiles
+    stages["paste"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    Path(layout.output).parent.mkdir(parents=True, exist_ok=True)
+    stats = cli.encode_image(canvas, layout.output)
+    stages["encode"] = time.perf_counter() - mark
+
+    peak = cli.peak_rss_bytes()
+    return {
+        "wall_s": time.perf_counter() - start,
+        "stages": stages,
+        "peak_rss_mb": None if peak is None else peak / (1024 * 1024),
+        "bytes_written": stats.bytes_written,
+    }
+
+
+def measure(case: Case, jobs: int, repeat: int) -> dict:
+    """Run ``case`` in ``repeat`` child processes and keep the fastest run."""
+    layout_path = make_layout(case)
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--run-case", str(layout_path), "--jobs", str(jobs)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            raise SystemExit(f"Benchmark {case.name} failed:\n{proc.stderr.strip()}")
+        runs.append(json.loads(proc.stdout))
+    best = min(runs, key=lambda run: run["wall_s"])
+    best["case"] = asdict(case)
+    return best
+
+
+def run_suite(cases: list[Case], jobs: int, repeat: int) -> dict:
+    """Measure every case and return the report document."""
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jobs": jobs,
+        "repeat": repeat,
+        "cases": {},
+    }
+    for case in cases:
+        result = measure(case, jobs, repeat)
+        report["cases"][case.name] = result
+        stages = ", ".join(f"{name} {secs:.3f}s" for name, secs in result["stages"].items())
+        rss = result["peak_rss_mb"]
+        print(
+            f"{case.name:<24} {result['wall_s']:8.3f}s  "
+            f"{'n/a' if rss is None else f'{rss:.0f} MiB':>9}  ({stages})"
+        )
+    return report
+
+
+def metric_values(result: dict) -> dict[str, float]:
+    """Flatten one case result into ``{metric: value}``."""
+    values = {"wall_s": result["wall_s"]}
+    values.update({f"stage.{name}": secs for name, secs in result["stages"].items()})
+    if result.get("peak_rss_mb") is not None:
+        values["peak_rss_mb"] = result["peak_rss_mb"]
+    return values
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Return one message per metric that regressed past ``threshold``.
+
+    A metric regresses when it grows by more than ``threshold`` (a fraction
+    of the baseline value) and by more than the absolute noise floor. Cases
+    missing from either report are ignored.
+    """
+    regressions = []
+    for name, result in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        old_values = metric_values(before)
+        for metric, new in metric_values(result).items():
+            old = old_values.get(metric)
+            if old is None:
+                continue
+            floor = RSS_FLOOR_MB if metric == "peak_rss_mb" else TIME_FLOOR_S
+            if new > old * (1 + threshold) and new - old > floor:
+                change = (new - old) / old * 100 if old else float("inf")
+                regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f} (+{change:.0f}%)")
+    return regressions
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {path}")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark lyco compose on synthetic layouts.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick", help="Case set to run")
+    parser.add_argument("--case", action="append", default=[], help="Run only this case (repeatable)")
+    parser.add_argument("--jobs", type=int, default=None, help="Decode workers (default: CPU count)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if a metric regressed past the baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="Baseline JSON path")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.environ.get("LYCO_BENCH_THRESHOLD", DEFAULT_THRESHOLD)),
+        help="Allowed relative growth per metric (env: LYCO_BENCH_THRESHOLD, default 0.25)",
+    )
+    parser.add_argument("--run-case", type=Path, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    jobs = args.jobs or _lyco().default_jobs()
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, jobs)))
+        return 0
+
+    cases = SUITES[args.suite]
+    if args.case:
+        known = {case.name: case for suite in SUITES.values() for case in suite}
+        unknown = [name for name in args.case if name not in known]
+        if unknown:
+            print(f"Unknown case(s): {', '.join(unknown)}. Known: {', '.join(sorted(known))}")
+            return 2
+        cases = [known[name] for name in args.case]
+    if args.compare and not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run `make bench` first.")
+        return 2
+
+    report = run_suite(cases, jobs, max(1, args.repeat))
+    _write_json(LATEST, report)
+    if args.save_baseline:
+        _write_json(args.baseline, report)
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("jobs") != report["jobs"] or baseline.get("python") != report["python"]:
+            print("Warning: baseline was recorded with different jobs or Python version.")
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions:
+            print(f"Regressions past {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions past {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1 +1,36 @@
-"""Lyco Python Framework example package (image mosaic)."""
+"""Lyco Python Framework example package (image mosaic).
+
+Layouts can be composed in memory, without YAML files or temporary outputs::
+
+    from lyco import compose_image, compose_bytes
+
+    layout = {"items": [{"file": "a.jpg", "x": 0, "y": 0, "resolution": "1920x1080"}]}
+    image = compose_image(layout)              # PIL Image
+    png = compose_bytes(layout, format="png")  # encoded bytes
+"""
+
+from .engine import (  # pylint: disable=import-error,no-name-in-module
+    ComposeOptions,
+    Item,
+    Layout,
+    compose_bytes,
+    compose_image,
+    compose_into,
+    parse_items,
+    parse_layout,
+)
+from .encode import EncodeOptions  # pylint: disable=import-error,no-name-in-module
+from .profiling import ComposeProfile  # pylint: disable=import-error,no-name-in-module
+
+__all__ = [
+    "ComposeOptions",
+    "ComposeProfile",
+    "EncodeOptions",
+    "Item",
+    "Layout",
+    "compose_bytes",
+    "compose_image",
+    "compose_into",
+    "parse_items",
+    "parse_layout",
+]
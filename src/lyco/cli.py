@@ -1,1020 +1,2637 @@
 """Lyco Python Framework example app (image mosaic CLI + GUI)."""
-
-import argparse
-from dataclasses import dataclass
-from pathlib import Path
-from typing import List
-
-from PIL import Image
-
-
-def parse_resolution(text: str) -> tuple[int, int]:
-    """Parse a WxH string like 1920x1080 into (width, height).
-
-    Parameters
-    ----------
-        text : Resolution string formatted as WIDTHxHEIGHT.
-
-    Returns
-    -------
-        Tuple of (width, height) as integers.
-
-    Raises
-    ------
-        SystemExit
-            If the format is invalid or values are non-positive.
-    """
-    try:
-
-        w_str, h_str = text.lower().split("x", 1)
-        w = int(w_str)
-        h = int(h_str)
-        if w <= 0 or h <= 0:
-            raise ValueError
-        return w, h
-    except Exception as exc:
-        raise SystemExit(
-            f"Invalid resolution '{text}'. Use WIDTHxHEIGHT, e.g. 2560x1440"
-        ) from exc
-
-
-def load_yaml(path: Path) -> dict:
-    """Load YAML layout config as a dict.
-
-    Parameters
-    ----------
-        path : Path to the YAML layout file.
-
-    Returns
-    -------
-        Parsed YAML as a dictionary.
-
-    Raises
-    ------
-        SystemExit
-            If PyYAML is missing or the YAML root is not a mapping.
-    """
-    try:
-
-        import yaml  # type: ignore
-    except Exception as exc:
-        raise SystemExit(
-            "Missing dependency: PyYAML. Install with: python -m pip install pyyaml"
-        ) from exc
-
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
-    if not isinstance(data, dict):
-        raise SystemExit("Config root must be a mapping/object.")
-    return data
-
-
-def save_yaml(path: Path, data: dict) -> None:
-    """Save YAML layout config.
-
-    Parameters
-    ----------
-        path : Destination path for the YAML file.
-        data : Data to serialize as YAML.
-
-    Raises
-    ------
-        SystemExit
-            If PyYAML is missing.
-    """
-    try:
-
-        import yaml  # type: ignore
-    except Exception as exc:
-        raise SystemExit(
-            "Missing dependency: PyYAML. Install with: python -m pip install pyyaml"
-        ) from exc
-
-    with path.open("w", encoding="utf-8") as f:
-        yaml.safe_dump(data, f, sort_keys=False)
-
-
-@dataclass
-class Item:
-    """Structured layout item parsed from YAML."""
-    file: str
-    x: int
-    y: int
-    w: int
-    h: int
-    resolution: str
-
-
-def compose_from_yaml(config_path: Path, output_override: str | None) -> None:
+
+import argparse
+import glob
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import asdict, dataclass, field, replace
+from functools import partial
+from pathlib import Path
+from typing import List, Mapping, Sequence
+
+from PIL import Image
+
+from .encode import (
+    ENCODE_PRESETS,
+    OUTPUT_FORMATS,
+    PNG_FILTERS,
+    TIFF_COMPRESSIONS,
+    EncodeOptions,
+    EncodeStats,
+    encode_image,
+)
+from .engine import (
+    DECODE_MPX_PER_S,
+    DEFAULT_DECODE_MPX_PER_S,
+    ENCODE_MPX_PER_S,
+    EXECUTORS,
+    HIGH_DEPTH_MODES,
+    LAYOUT_SUFFIXES,
+    MANIFEST_SUFFIX,
+    PROFILE_SUFFIX,
+    RESAMPLE_STRATEGIES,
+    SOURCE_MODES,
+    STREAM_WRITERS,
+    ComposeOptions,
+    IncrementalUpdate,
+    Item,
+    Layout,
+    SourceProbe,
+    TileKey,
+    build_manifest,
+    canvas_mode,
+    check_pool_args,
+    compose_banded,
+    compose_canvas,
+    compose_image,
+    compose_incremental,
+    crop_tile,
+    cull_hidden,
+    default_jobs,
+    item_rect,
+    load_layout,
+    load_layout_file,
+    load_tile,
+    load_tiles,
+    load_yaml,
+    manifest_path,
+    output_stamp,
+    parse_items,
+    parse_memory_size,
+    parse_resolution,
+    parse_yaml,
+    peak_rss_bytes,
+    plan_memory,
+    probe_sources,
+    probe_tile_mode,
+    resample_cache_name,
+    resolve_encode,
+    save_yaml,
+    stored_crop,
+    tile_box,
+    tile_key,
+    tile_size,
+)
+from .geometry import EdgeIndex, clip_rect, overlapping_pairs, visible_parts
+from .profiling import ComposeProfile, profile_stage
+from .tile_cache import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_PREVIEW_MAX_BYTES,
+    LayoutCache,
+    PreviewCache,
+    TileCache,
+    TileMemo,
+)
+from .watch import make_watcher
+
+
+@dataclass
+class ValidationIssue:
+    """One validation finding; ``item`` is the 1-based item number, if any."""
+    level: str
+    message: str
+    item: int | None = None
+
+    def __str__(self) -> str:
+        where = f"item #{self.item}: " if self.item is not None else ""
+        return f"{self.level}: {where}{self.message}"
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of validating one layout, with its cost estimates."""
+    layout: str
+    items: int = 0
+    canvas_size: tuple[int, int] | None = None
+    mode: str | None = None
+    estimated_bytes: int | None = None
+    estimated_seconds: float | None = None
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        """Issues that make the layout fail to compose."""
+        return [issue for issue in self.issues if issue.level == "error"]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        """Issues that compose, but probably not as intended."""
+        return [issue for issue in self.issues if issue.level == "warning"]
+
+    @property
+    def ok(self) -> bool:
+        """True when the layout has no errors."""
+        return not self.errors
+
+    def summary(self) -> str:
+        """Return a one-line human-readable report."""
+        counts = f"{len(self.errors)} error(s), {len(self.warnings)} warning(s)"
+        if not self.ok:
+            return f"FAIL {self.layout}: {counts}"
+        width, height = self.canvas_size
+        line = f"OK   {self.layout}: {self.items} items, {width}x{height}"
+        if self.mode is not None:
+            line += (
+                f" {self.mode}, est. {self.estimated_bytes / 1024 ** 2:.1f} MiB"
+                f" and {self.estimated_seconds:.1f}s"
+            )
+        if self.warnings:
+            line += f", {len(self.warnings)} warning(s)"
+        return line
+
+
+def source_issues(it: Item, probe: SourceProbe, warnings: bool = True) -> List[tuple[str, str]]:
+    """Return the (level, message) findings for one visible item's source."""
+    if probe.error is not None:
+        return [("error", f"{it.file}: {probe.error}")]
+    if probe.mode not in SOURCE_MODES:
+        return [("error", f"{it.file}: unsupported mode {probe.mode}")]
+    if not warnings:
+        return []
+    found = []
+    if probe.mode in HIGH_DEPTH_MODES:
+        found.append(("warning", f"{it.file}: {probe.mode} samples are clipped to 8 bits"))
+    ratio = max(it.w / probe.size[0], it.h / probe.size[1])
+    if ratio > 1:
+        found.append((
+            "warning",
+            f"{it.file}: upscaled {ratio:.2f}x from {probe.size[0]}x{probe.size[1]} "
+            f"to {it.w}x{it.h}",
+        ))
+    return found
+
+
+def overlap_issues(rects: List[tuple[int, int, int, int]]) -> List[ValidationIssue]:
+    """Return one warning per item overlapping earlier items, listing up to five of them."""
+    covered: dict[int, List[int]] = {}
+    for first, second in overlapping_pairs(rects):
+        covered.setdefault(second, []).append(first + 1)
+    issues = []
+    for idx, earlier in covered.items():
+        shown = ", ".join(f"#{number}" for number in earlier[:5])
+        if len(earlier) > 5:
+            shown += f" and {len(earlier) - 5} more"
+        issues.append(ValidationIssue("warning", f"overlaps item(s) {shown}", idx + 1))
+    return issues
+
+
+def validate_layout(
+    layout: Layout,
+    name: str = "",
+    *,
+    jobs: int | None = None,
+    strategy: str = "exact",
+    probes: dict[str, SourceProbe] | None = None,
+    estimate: bool = True,
+    errors_only: bool = False,
+) -> ValidationReport:
+    """Check a layout from image headers only, without decoding any pixels.
+
+    Errors: missing or unreadable files and unsupported source modes.
+    Warnings: high-depth modes, upscaled items, items partly or entirely
+    off the canvas, items overlapping earlier ones, and items fully hidden
+    by later ones. Compose skips off-canvas and hidden items, so their
+    files are not checked.
+
+    Parameters
+    ----------
+        layout : Parsed layout.
+        name : Label for the report (usually the layout path).
+        jobs : Compose worker count assumed by the estimates.
+        strategy : Resample strategy assumed by the memory estimate.
+        probes : Header cache shared across layouts (see ``probe_sources``).
+        estimate : Estimate peak memory and compose time when error-free.
+        errors_only : Only look for errors, skipping the warning checks
+            (notably the overlap sweep), as the compose pre-flight does.
+
+    Returns
+    -------
+        Validation report.
+    """
+    report = ValidationReport(layout=name, items=len(layout.items), canvas_size=layout.canvas_size)
+    box = (0, 0, layout.canvas_size[0], layout.canvas_size[1])
+    rects = [item_rect(it) for it in layout.items]
+    parts = visible_parts(rects, box)
+    visible = [it for it, part in zip(layout.items, parts) if part]
+    probes = probe_sources([it.file for it in visible], probes=probes)
+    for number, (it, rect, part) in enumerate(zip(layout.items, rects, parts), start=1):
+        clipped = clip_rect(rect, box)
+        if clipped is None:
+            found = [("warning", "entirely off the canvas")]
+        elif not part:
+            found = [("warning", "hidden by later items")]
+        else:
+            found = [("warning", "partly off the canvas")] if clipped != rect else []
+            found += source_issues(it, probes[os.path.realpath(it.file)], warnings=not errors_only)
+        report.issues.extend(
+            ValidationIssue(level, message, number)
+            for level, message in found
+            if level == "error" or not errors_only
+        )
+    if not errors_only:
+        report.issues.extend(overlap_issues(rects))
+    report.issues.sort(key=lambda issue: issue.item or 0)
+
+    if estimate and report.ok:
+        jobs = jobs or default_jobs()
+        report.mode = canvas_mode(visible, layout.canvas_size, probes)
+        plan = plan_memory(
+            visible,
+            layout.canvas_size,
+            sys.maxsize,
+            jobs,
+            strategy=strategy,
+            mode=report.mode,
+            probes=probes,
+        )
+        report.estimated_bytes = plan.estimate()
+        unique = {tile_key(it): probes[os.path.realpath(it.file)] for it in visible}
+        decode = sum(
+            probe.size[0] * probe.size[1] / 1e6
+            / DECODE_MPX_PER_S.get(probe.format or "", DEFAULT_DECODE_MPX_PER_S)
+            for probe in unique.values()
+        )
+        report.estimated_seconds = (
+            decode / max(1, min(jobs, len(unique))) + box[2] * box[3] / 1e6 / ENCODE_MPX_PER_S
+        )
+    return report
+
+
+def validate_layouts(
+    layout_paths: List[Path],
+    jobs: int | None = None,
+    strategy: str = "exact",
+    layout_cache: LayoutCache | None = None,
+) -> List[ValidationReport]:
+    """Validate many layouts, reading each distinct image header once.
+
+    Every layout is parsed first, then the headers of all their images are
+    read concurrently, so shared images cost a single read.
+
+    Parameters
+    ----------
+        layout_paths : Layout files.
+        jobs : Compose worker count assumed by the estimates.
+        strategy : Resample strategy assumed by the memory estimate.
+        layout_cache : Optional parsed-layout cache.
+
+    Returns
+    -------
+        One report per layout, in input order.
+    """
+    parsed: List[tuple[Path, Layout | None, str]] = []
+    for path in layout_paths:
+        try:
+            parsed.append((path, load_layout(path, cache=layout_cache), ""))
+        except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+            parsed.append((path, None, str(exc)))
+    probes = probe_sources(
+        it.file for _path, layout, _error in parsed if layout is not None for it in layout.items
+    )
+    reports = []
+    for path, layout, error in parsed:
+        if layout is None:
+            issue = ValidationIssue("error", error)
+            reports.append(ValidationReport(layout=str(path), issues=[issue]))
+        else:
+            reports.append(
+                validate_layout(layout, str(path), jobs=jobs, strategy=strategy, probes=probes)
+            )
+    return reports
+
+
+def report_incremental(
+    update: IncrementalUpdate | None, canvas_size: tuple[int, int], fmt: str
+) -> None:
+    """Print what an incremental compose re-rendered, or why it could not patch.
+
+    Parameters
+    ----------
+        update : Result of ``compose_incremental`` (None when a full render follows).
+        canvas_size : Canvas (width, height).
+        fmt : Resolved output format.
+    """
+    if update is None:
+        if fmt == "raw":
+            print("Incremental: raw output cannot be patched; rendering in full.")
+        return
+    if update.stats is not None:
+        print(update.stats.summary())
+    print(
+        f"Incremental: re-rendered {len(update.rects)} region(s), "
+        f"{100 * update.area / (canvas_size[0] * canvas_size[1]):.1f}% of the canvas"
+    )
+
+
+def compose_from_yaml(
+    config_path: Path,
+    output_override: str | None,
+    options: ComposeOptions | None = None,
+    *,
+    band_height: int | None = None,
+    max_memory: int | None = None,
+    incremental: bool = False,
+    encode: EncodeOptions | None = None,
+    profile: str | None = None,
+    layout_cache: LayoutCache | None = None,
+) -> None:
     """Compose a transparent PNG from a YAML layout file.
-
-    Parameters
-    ----------
-        config_path : Path to YAML layout file.
-        output_override : Optional output path to override YAML output.
-
-    Raises
-    ------
-        SystemExit
-            If the YAML is invalid or required fields are missing.
-    """
-    data = load_yaml(config_path)
-
-    output_path = output_override or data.get("output") or "wallpaper.png"
-
-    items = data.get("items")
-    if not isinstance(items, list) or not items:
-        raise SystemExit("Config must include non-empty 'items' list.")
-
-    # Optional explicit canvas size
-    canvas_w = data.get("canvas_width")
-    canvas_h = data.get("canvas_height")
-    if canvas_w is not None and canvas_h is not None:
-        try:
-            canvas_w = int(canvas_w)
-            canvas_h = int(canvas_h)
-        except Exception as exc:
-            raise SystemExit("canvas_width and canvas_height must be integers") from exc
-        if canvas_w <= 0 or canvas_h <= 0:
-            raise SystemExit("canvas_width and canvas_height must be > 0")
-
-    placed = []
-    max_right = 0
-    max_bottom = 0
-
-    for idx, item in enumerate(items, start=1):
-        if not isinstance(item, dict):
-            raise SystemExit(f"Item #{idx} must be an object.")
-
-        try:
-            x = int(item["x"])
-            y = int(item["y"])
-            file_path = Path(item["file"])
-        except Exception as exc:
-            raise SystemExit(f"Item #{idx} must include x, y, file") from exc
-
-        res = item.get("resolution")
-        if not isinstance(res, str):
-            raise SystemExit(f"Item #{idx} must include resolution like 1920x1080")
-        w, h = parse_resolution(res)
-
-        with Image.open(file_path) as im:
-            im = im.convert("RGBA")
-            im = im.resize((w, h), Image.LANCZOS)
-            placed.append((im, x, y, w, h))
-
-        max_right = max(max_right, x + w)
-        max_bottom = max(max_bottom, y + h)
-
-    if canvas_w is None or canvas_h is None:
-        canvas_w = max_right
-        canvas_h = max_bottom
-
-    canvas = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
-    for im, x, y, _w, _h in placed:
-        canvas.paste(im, (x, y))
-
-    canvas.save(output_path)
-
-
-class LayoutItem:
-    """A draggable rectangle that represents an image placement in the layout."""
-
-    def __init__(self, item: Item, index: int, on_move, on_snap):
-        """Create a draggable layout item.
-
-        Parameters
-        ----------
-            item : The layout item model.
-            index : 1-based item index for labeling.
-            on_move : Callback for move events.
-            on_snap : Callback for snapping adjustments.
-        """
-        from PyQt5.QtCore import QRectF
-        from PyQt5.QtGui import QBrush, QPen, QColor, QFont, QPixmap, QImage
-        from PyQt5.QtWidgets import QGraphicsItem
-
-        self.item = item
-        self.index = index
-        self.on_move = on_move
-        self.on_snap = on_snap
-
-        self.rect = QRectF(0, 0, item.w, item.h)
-        self.pixmap = None
-        try:
-            # Load and scale image for preview
-            img = Image.open(item.file).convert("RGBA")
-            img = img.resize((item.w, item.h), Image.LANCZOS)
-            data = img.tobytes("raw", "RGBA")
-            qimg = QImage(data, item.w, item.h, QImage.Format_RGBA8888)
-            self.pixmap = QPixmap.fromImage(qimg)
-        except Exception:
-            self.pixmap = None
-
-        self.brush = QBrush(QColor(50, 150, 230, 60))
-        self.pen = QPen(QColor(50, 150, 230), 2)
-        self.text_color = QColor(255, 255, 255)
-        self.font = QFont("Sans", 14)
-
-        class RectItem(QGraphicsItem):
-            """QGraphicsItem wrapper for drawing and moving a layout item."""
-
-            def __init__(self, outer):
-                """Initialize the graphics item.
-
-                Parameters
-                ----------
-                    outer : Parent LayoutItem wrapper.
-                """
-                super().__init__()
-                self.outer = outer
-                self.setFlags(
-                    QGraphicsItem.ItemIsMovable
-                    | QGraphicsItem.ItemIsSelectable
-                    | QGraphicsItem.ItemSendsGeometryChanges
-                )
-                self.setPos(outer.item.x, outer.item.y)
-
-            def boundingRect(self):
-                """Return the bounding rectangle for the item."""
-                return self.outer.rect
-
-            def paint(self, painter, option, widget=None):
-                """Paint the item, including preview image and index label."""
-                if self.outer.pixmap:
-                    painter.drawPixmap(0, 0, self.outer.pixmap)
-                painter.setBrush(self.outer.brush)
-                painter.setPen(self.outer.pen)
-                painter.drawRect(self.outer.rect)
-                painter.setPen(self.outer.text_color)
-                painter.setFont(self.outer.font)
-                painter.drawText(8, 20, str(self.outer.index))
-
-            def itemChange(self, change, value):
-                """Handle item position changes and apply snapping.
-
-                Parameters
-                ----------
-                    change : Qt change enum.
-                    value : Proposed value for the change.
-
-                Returns
-                -------
-                    The new position to apply.
-                """
-                from PyQt5.QtWidgets import QGraphicsItem
-
-                if change == QGraphicsItem.ItemPositionChange:
-                    from PyQt5.QtCore import QPointF
-
-                    pos = value
-                    new_x = int(pos.x())
-                    new_y = int(pos.y())
-                    if self.outer.on_snap:
-                        new_x, new_y = self.outer.on_snap(self.outer.item, new_x, new_y)
-                    self.outer.item.x = int(new_x)
-                    self.outer.item.y = int(new_y)
-                    self.outer.on_move(self.outer.item)
-                    return QPointF(self.outer.item.x, self.outer.item.y)
-                return super().itemChange(change, value)
-
-            def mousePressEvent(self, event):
-                """Handle mouse press, ignoring Ctrl-modified drags."""
-                from PyQt5.QtCore import Qt
-
-                if event.modifiers() & Qt.ControlModifier:
-                    event.ignore()
-                    return
-                super().mousePressEvent(event)
-
-            def mouseMoveEvent(self, event):
-                """Handle mouse move, ignoring Ctrl-modified drags."""
-                from PyQt5.QtCore import Qt
-
-                if event.modifiers() & Qt.ControlModifier:
-                    event.ignore()
-                    return
-                super().mouseMoveEvent(event)
-
-        self.graphics_item = RectItem(self)
-
-
-class ZoomableGraphicsView:
-    """Graphics view with Ctrl+wheel zoom and Ctrl+drag pan."""
-
-    def __init__(self, scene, on_zoom):
-        """Initialize a zoomable view.
-
-        Parameters
-        ----------
-            scene : QGraphicsScene to render.
-            on_zoom : Callback invoked with zoom value.
-        """
-        from PyQt5.QtWidgets import QGraphicsView
-        from PyQt5.QtCore import Qt
-        from PyQt5.QtGui import QPainter
-
-        class _View(QGraphicsView):
-            """Customized QGraphicsView for zoom and pan support."""
-
-            def __init__(self, scene, on_zoom):
-                """Initialize the view.
-
-                Parameters
-                ----------
-                    scene : QGraphicsScene to render.
-                    on_zoom : Callback invoked with zoom value.
-                """
-                super().__init__(scene)
-                self.on_zoom = on_zoom
-                self._zoom = 1.0
-                self.setRenderHint(QPainter.Antialiasing)
-                self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
-                self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
-                self.setDragMode(QGraphicsView.NoDrag)
-
-            def wheelEvent(self, event):
-                """Zoom in/out on Ctrl+wheel."""
-                if event.modifiers() & Qt.ControlModifier:
-                    delta = event.angleDelta().y()
-                    factor = 1.15 if delta > 0 else 1 / 1.15
-                    new_zoom = self._zoom * factor
-                    if 0.1 <= new_zoom <= 10:
-                        self._zoom = new_zoom
-                        self.scale(factor, factor)
-                        if self.on_zoom:
-                            self.on_zoom(self._zoom)
-                    event.accept()
-                else :
-                    super().wheelEvent(event)
-
-            def mousePressEvent(self, event):
-                """Enable panning on Ctrl+drag."""
-                if event.button() == Qt.LeftButton and (event.modifiers() & Qt.ControlModifier):
-                    self.setDragMode(QGraphicsView.ScrollHandDrag)
-                super().mousePressEvent(event)
-
-            def mouseReleaseEvent(self, event):
-                """Disable panning when mouse is released."""
-                super().mouseReleaseEvent(event)
-                if self.dragMode() == QGraphicsView.ScrollHandDrag:
-                    self.setDragMode(QGraphicsView.NoDrag)
-
-        self.widget = _View(scene, on_zoom)
-
-
-class LayoutEditor:
-    """GUI editor for YAML layouts."""
-
-    def __init__(self, config_path: Path):
-        """Create the GUI and load the initial YAML.
-
-        Parameters
-        ----------
-            config_path : Path to YAML layout file.
-        """
-        from PyQt5.QtWidgets import (
-            QApplication,
-            QMainWindow,
-            QWidget,
-            QVBoxLayout,
-            QHBoxLayout,
-            QPushButton,
-            QLabel,
-            QGraphicsScene,
-            QFileDialog,
-            QSplitter,
-            QPlainTextEdit,
-            QTextEdit,
-            QFrame,
-        )
-        from PyQt5.QtCore import Qt, QRect, QSize, QTimer
-        from PyQt5.QtGui import (
-            QSyntaxHighlighter,
-            QTextCharFormat,
-            QColor,
-            QFont,
-            QPainter,
-            QTextCursor,
-            QTextFormat,
-            QFontDatabase,
-            QPalette,
-        )
-
-        self.config_path = config_path
-        self.data = {}
-        self.output = "wallpaper.png"
-        self.items: List[Item] = []
-        self.canvas_w = 1
-        self.canvas_h = 1
-        self.snap_threshold = 10
-
-        self.app = QApplication([])
-        self.window = QMainWindow()
+
+    Parameters
+    ----------
+        config_path : Path to YAML layout file.
+        output_override : Optional output path to override YAML output.
+        options : Worker, cache and resample settings (see ``ComposeOptions``).
+        band_height : Stream the output in strips of this height instead of
+            building the full canvas in memory (PNG/TIFF outputs only).
+        max_memory : Memory budget in bytes. The layout's memory needs are
+            estimated from image headers and the plan is scaled down (fewer
+            workers, releasing tiles, banded streaming) to fit; the plan and
+            the peak RSS reached are printed.
+        incremental : Keep a manifest next to the output and, when the
+            previous output is intact, re-render only the regions whose items
+            changed and patch them into it.
+        encode : Output encoder options (format, preset, levels); the encode
+            time and bytes written are printed.
+        profile : Write a JSON timing report (stages, per-tile timings, bytes
+            read and written) to this path; ``""`` writes it next to the
+            output as ``OUTPUT.profile.json``, ``"-"`` to stdout.
+        layout_cache : Optional parsed-layout cache.
+
+    Raises
+    ------
+        SystemExit
+            If the YAML is invalid or required fields are missing.
+    """
+    options = options or ComposeOptions()
+    if profile is not None:
+        options = replace(options, profile=ComposeProfile())
+    report = options.profile
+    with profile_stage(report, "parse"):
+        layout = load_layout(config_path, output_override, layout_cache)
+    parsed = layout.items
+    output_path = layout.output
+    canvas_w, canvas_h = layout.canvas_size
+    encode = resolve_encode(encode, output_path)
+
+    # Pre-flight: fail on unusable images before anything is decoded.
+    probes: dict[str, SourceProbe] = {}
+    with profile_stage(report, "validate"):
+        check = validate_layout(
+            layout, str(config_path), probes=probes, estimate=False, errors_only=True
+        )
+    if not check.ok:
+        details = "\n".join(f"  {issue}" for issue in check.errors)
+        raise SystemExit(f"{config_path} failed validation:\n{details}")
+    # Hidden and off-canvas items are never opened, decoded or cached.
+    layout = replace(layout, items=cull_hidden(layout.items, layout.canvas_size))
+    parsed = layout.items
+    # Raw output is defined as RGBA rows, so it always keeps the alpha plane.
+    mode = "RGBA" if encode.format == "raw" else canvas_mode(parsed, (canvas_w, canvas_h), probes)
+
+    if incremental:
+        if band_height:
+            raise SystemExit("--incremental cannot be combined with --band-height")
+        update = compose_incremental(
+            parsed,
+            (canvas_w, canvas_h),
+            output_path,
+            jobs=options.jobs,
+            executor=options.executor,
+            cache=options.cache,
+            strategy=options.strategy,
+            encode=encode,
+            mode=mode,
+            profile=report,
+        )
+        report_incremental(update, (canvas_w, canvas_h), encode.format)
+        if update is not None:
+            write_profile(report, profile, output_path)
+            return
+
+    if max_memory is not None:
+        options, band_height = fit_memory_budget(
+            layout, options, max_memory, band_height=band_height, encode=encode, mode=mode, probes=probes
+        )
+
+    if band_height:
+        stats = compose_banded(
+            parsed,
+            (canvas_w, canvas_h),
+            output_path,
+            band_height,
+            jobs=options.jobs,
+            executor=options.executor,
+            cache=options.cache,
+            strategy=options.strategy,
+            encode=encode,
+            mode=mode,
+            profile=report,
+        )
+    else:
+        canvas = compose_image(layout, options, mode=mode)
+        stats = encode_image(canvas, output_path, encode)
+        del canvas
+    if report is not None:
+        report.add("encode", stats.seconds)
+        report.bytes_written += stats.bytes_written
+    print(stats.summary())
+
+    if incremental:
+        manifest = build_manifest(parsed, (canvas_w, canvas_h), options.strategy, mode=mode, encode=encode)
+        manifest["output"] = output_stamp(output_path)
+        manifest_path(output_path).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    if max_memory is not None:
+        peak = peak_rss_bytes()
+        if peak is not None:
+            print(f"Peak RSS: {peak / 1024 ** 2:.1f} MiB")
+    write_profile(report, profile, output_path)
+
+
+def fit_memory_budget(
+    layout: Layout,
+    options: ComposeOptions,
+    max_memory: int,
+    *,
+    band_height: int | None,
+    encode: EncodeOptions,
+    mode: str,
+    probes: Mapping[str, SourceProbe],
+) -> tuple[ComposeOptions, int | None]:
+    """Scale a compose down to a memory budget and print the plan.
+
+    Parameters
+    ----------
+        layout : Parsed layout, hidden items already culled.
+        options : Requested compose options.
+        max_memory : Memory budget in bytes (see ``plan_memory``).
+        band_height : Requested band height; a planned one is only used when
+            none was requested and the output format can be streamed.
+        encode : Resolved output encoder options.
+        mode : Canvas mode.
+        probes : Source headers (see ``probe_sources``).
+
+    Returns
+    -------
+        The options with the planned worker count and tile release, and the
+        band height to stream with (None for a full canvas).
+    """
+    plan = plan_memory(
+        layout.items,
+        layout.canvas_size,
+        max_memory,
+        options.jobs or default_jobs(),
+        strategy=options.strategy,
+        mode=mode,
+        probes=probes,
+    )
+    options = replace(options, jobs=plan.jobs, release_tiles=plan.release_tiles)
+    if band_height is None and plan.band_height is not None:
+        if encode.format in STREAM_WRITERS and encode.tiff_compression != "lzw":
+            band_height = plan.band_height
+        else:
+            print("Warning: banded compose needs a PNG/TIFF/raw output; budget may be exceeded.")
+    strategy_name = f"banded ({band_height} rows)" if band_height else (
+        "release tiles after paste" if plan.release_tiles else "full canvas"
+    )
+    print(
+        f"Memory plan: {strategy_name}, {mode} canvas, jobs={plan.jobs}, "
+        f"estimated {plan.estimate() / 1024 ** 2:.1f} MiB of {max_memory / 1024 ** 2:.1f} MiB"
+    )
+    if plan.estimate() > max_memory:
+        print("Warning: estimated peak exceeds the budget (source decodes dominate).")
+    return options, band_height
+
+
+def write_profile(report: ComposeProfile | None, target: str | None, output_path: str) -> None:
+    """Finish and write a compose profile (see ``compose_from_yaml``)."""
+    if report is None or target is None:
+        return
+    report.finish()
+    path = target or f"{output_path}{PROFILE_SUFFIX}"
+    report.write(path)
+    if path != "-":
+        print(f"Profile: {path}")
+
+
+def find_layouts(sources: List[str]) -> List[Path]:
+    """Expand batch sources into layout paths.
+
+    A source may be a directory (its ``.yml``/``.yaml``/``.json``/``.toml``
+    layouts, skipping compose manifests and profile reports), a layout file,
+    a glob pattern, or a manifest: any other file, read as one layout path
+    per line (relative to the manifest; ``#`` starts a comment).
+
+    Parameters
+    ----------
+        sources : Directories, layout files, glob patterns or manifests.
+
+    Returns
+    -------
+        Layout paths in source order, without duplicates.
+
+    Raises
+    ------
+        SystemExit
+            If a source matches no layouts.
+    """
+    found: List[Path] = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            matches = sorted(
+                p for p in path.iterdir()
+                if p.suffix.lower() in LAYOUT_SUFFIXES
+                and not p.name.endswith((MANIFEST_SUFFIX, PROFILE_SUFFIX))
+            )
+        elif path.is_file() and path.suffix.lower() in LAYOUT_SUFFIXES:
+            matches = [path]
+        elif path.is_file():
+            matches = []
+            for line in path.read_text(encoding="utf-8").splitlines():
+                entry = line.split("#", 1)[0].strip()
+                if entry:
+                    matches.append(path.parent / entry)
+        else:
+            matches = sorted(Path(p) for p in glob.glob(source, recursive=True))
+        if not matches:
+            raise SystemExit(f"No layouts found for '{source}'")
+        found.extend(matches)
+    return list(dict.fromkeys(found))
+
+
+@dataclass
+class BatchResult:
+    """Status and timing of one layout in a batch compose."""
+    layout: str
+    output: str | None = None
+    ok: bool = False
+    items: int = 0
+    seconds: float = 0.0
+    bytes_written: int = 0
+    error: str | None = None
+
+
+def _render_batch_layout(
+    layout: Layout,
+    tiles: List[Future],
+    encode: EncodeOptions,
+    probes: Mapping[str, SourceProbe],
+) -> tuple[EncodeStats, float]:
+    """Paste a batch layout's tiles as they arrive and encode it."""
+    start = time.perf_counter()
+    mode = "RGBA" if encode.format == "raw" else canvas_mode(layout.items, layout.canvas_size, probes)
+    canvas = Image.new(mode, layout.canvas_size)
+    for it, tile in zip(layout.items, tiles):
+        canvas.paste(tile.result(), tile_box(it)[:2])
+    stats = encode_image(canvas, layout.output, encode)
+    return stats, time.perf_counter() - start
+
+
+def compose_batch(
+    layout_paths: List[Path],
+    *,
+    output_dir: Path | None = None,
+    jobs: int | None = None,
+    executor: str = "thread",
+    cache: TileCache | None = None,
+    strategy: str = "exact",
+    encode: EncodeOptions | None = None,
+    layout_cache: LayoutCache | None = None,
+) -> List[BatchResult]:
+    """Compose many layouts on one shared worker pool.
+
+    Every unique (file, resolution) across the batch is decoded once and
+    shared by all layouts that use it; tiles are dropped once the last such
+    layout is written. Up to ``2 * jobs`` layouts are in flight, so decodes
+    for upcoming layouts overlap pasting and encoding of earlier ones. A
+    failing layout is reported and does not stop the batch. A status line is
+    printed as each layout finishes, then a batch total.
+
+    Parameters
+    ----------
+        layout_paths : Layout files, in order.
+        output_dir : Write each output here as ``<layout stem><suffix>``
+            instead of the layout's own output path.
+        jobs : Worker count for decode/resize and for encoding.
+        executor : Decode pool type, ``"thread"`` or ``"process"``.
+        cache : Optional persistent tile cache.
+        strategy : Resample strategy, one of ``RESAMPLE_STRATEGIES``.
+        encode : Output encoder options, applied to every layout.
+        layout_cache : Optional parsed-layout cache.
+
+    Returns
+    -------
+        One result per layout, in input order.
+
+    Raises
+    ------
+        SystemExit
+            If the worker options are invalid.
+    """
+    jobs = check_pool_args(jobs, executor, strategy)
+    resample_key = resample_cache_name(strategy)
+    batch_start = time.perf_counter()
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    def report(result: BatchResult) -> None:
+        status = "ok" if result.ok else "FAILED"
+        detail = f": {result.error}" if result.error else ""
+        print(f"{status:<6} {result.seconds:7.2f}s  {result.layout} -> {result.output or '-'}{detail}")
+
+    results = [BatchResult(layout=str(path)) for path in layout_paths]
+    planned: List[tuple[int, Layout, EncodeOptions]] = []
+    claimed: dict[str, str] = {}
+    for idx, path in enumerate(layout_paths):
+        try:
+            layout = load_layout(path, cache=layout_cache)
+            if output_dir is not None:
+                layout.output = str(output_dir / f"{path.stem}{Path(layout.output).suffix or '.png'}")
+            opts = resolve_encode(encode, layout.output)
+        except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+            results[idx].error = str(exc)
+            report(results[idx])
+            continue
+        results[idx].output = layout.output
+        results[idx].items = len(layout.items)
+        layout.items = cull_hidden(layout.items, layout.canvas_size)
+        target = os.path.realpath(layout.output)
+        if target in claimed:
+            results[idx].error = f"output collides with {claimed[target]}"
+            report(results[idx])
+            continue
+        claimed[target] = str(path)
+        planned.append((idx, layout, opts))
+
+    # Read each shared source header once for all the layouts' canvas modes.
+    probes = probe_sources(it.file for _idx, layout, _opts in planned for it in layout.items)
+    refs: dict[TileKey, int] = {}
+    for _idx, layout, _opts in planned:
+        for key in {tile_key(it) for it in layout.items}:
+            refs[key] = refs.get(key, 0) + 1
+    unique_tiles = len(refs)
+    tiles: dict[TileKey, Future] = {}
+
+    def release(layout: Layout) -> None:
+        for key in {tile_key(it) for it in layout.items}:
+            refs[key] -= 1
+            if refs[key] == 0:
+                tiles.pop(key, None)
+
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=jobs) as tile_pool, ThreadPoolExecutor(max_workers=jobs) as layout_pool:
+
+        def request(it: Item) -> Future:
+            key = tile_key(it)
+            if key in tiles:
+                return tiles[key]
+            if cache is None:
+                future = tile_pool.submit(load_tile, it.file, (it.w, it.h), strategy, it.crop)
+                tiles[key] = future
+                return future
+            # Stored tiles are whole or cropped as in load_tiles; cut whole ones per item.
+            mode = probe_tile_mode(it.file)
+            stored = stored_crop(it)
+            cut = it.crop if stored is None else None
+            cache_key = cache.key(it.file, (it.w, it.h), resample_key, mode, stored)
+            cached = cache.get(cache_key, (it.w, it.h) if stored is None else tile_size(it), mode)
+            future = Future()
+            if cached is not None:
+                future.set_result(crop_tile(cached, cut))
+            else:
+                def store(done: Future, cache_key: str = cache_key, cut=cut, future=future) -> None:
+                    if done.exception() is not None:
+                        future.set_exception(done.exception())
+                        return
+                    cache.put(cache_key, done.result())
+                    future.set_result(crop_tile(done.result(), cut))
+
+                tile_pool.submit(
+                    load_tile, it.file, (it.w, it.h), strategy, stored
+                ).add_done_callback(store)
+            tiles[key] = future
+            return future
+
+        running: dict[Future, tuple[int, Layout]] = {}
+
+        def drain(block_until: int) -> None:
+            while len(running) > block_until:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, layout = running.pop(future)
+                    try:
+                        stats, seconds = future.result()
+                        results[idx].ok = True
+                        results[idx].seconds = seconds
+                        results[idx].bytes_written = stats.bytes_written
+                    except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+                        results[idx].error = str(exc) or type(exc).__name__
+                    release(layout)
+                    report(results[idx])
+
+        for idx, layout, opts in planned:
+            drain(2 * jobs - 1)
+            try:
+                layout_tiles = [request(it) for it in layout.items]
+            except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+                results[idx].error = str(exc)
+                release(layout)
+                report(results[idx])
+                continue
+            render = layout_pool.submit(_render_batch_layout, layout, layout_tiles, opts, probes)
+            running[render] = (idx, layout)
+        drain(0)
+
+    ok = sum(result.ok for result in results)
+    print(
+        f"Batch: {ok}/{len(results)} layouts ok, {unique_tiles} unique tiles for "
+        f"{sum(result.items for result in results)} items in {time.perf_counter() - batch_start:.2f}s"
+    )
+    return results
+
+
+def watch_layout(
+    config_path: Path,
+    output_override: str | None = None,
+    options: ComposeOptions | None = None,
+    *,
+    encode: EncodeOptions | None = None,
+    debounce: float = 0.3,
+    poll: bool = False,
+    stop: threading.Event | None = None,
+) -> None:
+    """Recompose a layout whenever it or one of its images changes.
+
+    The layout file and every referenced image are watched (inotify when
+    available, stat polling otherwise). Bursts of writes are debounced, and
+    decoded tiles stay in memory between runs keyed on file size and mtime,
+    so editing one image re-decodes only that image. The output is replaced
+    atomically, and after each run a status line reports the latency from the
+    change to the written output.
+
+    Parameters
+    ----------
+        config_path : Path to YAML layout file.
+        output_override : Optional output path to override YAML output.
+        options : Worker, cache and resample settings (see ``ComposeOptions``);
+            a tile memo is added when none is given.
+        encode : Output encoder options.
+        debounce : Quiet period in seconds that ends a burst of changes.
+        poll : Use the polling watcher even where inotify is available.
+        stop : Event that ends the watch loop when set (runs until
+            interrupted when omitted).
+    """
+    options = options or ComposeOptions()
+    if options.memo is None:
+        options = replace(options, memo=TileMemo())
+    memo = options.memo
+    watcher = make_watcher(poll=poll)
+    reason = "initial compose"
+    detected = time.perf_counter()
+    try:
+        while True:
+            stamp = time.strftime("%H:%M:%S")
+            try:
+                layout = load_layout(config_path, output_override)
+            except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+                print(f"[{stamp}] {reason}: invalid layout: {exc}", flush=True)
+                layout = None
+            # Watch before composing so edits made during the run are not lost.
+            watcher.watch([str(config_path)] + [it.file for it in (layout.items if layout else [])])
+            if layout is not None:
+                try:
+                    opts = resolve_encode(encode, layout.output)
+                    hits, misses = memo.hits, memo.misses
+                    start = time.perf_counter()
+                    canvas = compose_image(layout, options, mode="RGBA" if opts.format == "raw" else None)
+                    # Replace the output atomically so viewers never read a half-written file.
+                    output = Path(layout.output)
+                    tmp_output = output.with_name(f".{output.stem}.partial{output.suffix}")
+                    try:
+                        encode_image(canvas, tmp_output, opts)
+                        os.replace(tmp_output, output)
+                    finally:
+                        tmp_output.unlink(missing_ok=True)
+                    del canvas
+                    done = time.perf_counter()
+                    memo.prune()
+                    print(
+                        f"[{stamp}] {reason}: wrote {layout.output} in {done - detected:.2f}s "
+                        f"(compose {done - start:.2f}s, {memo.misses - misses} tiles loaded, "
+                        f"{memo.hits - hits} warm)",
+                        flush=True,
+                    )
+                except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+                    print(f"[{stamp}] {reason}: compose failed: {exc}", flush=True)
+
+            changes: set[str] = set()
+            while not changes:
+                if stop is not None and stop.is_set():
+                    return
+                changes = watcher.wait(None if stop is None else 0.2)
+            detected = time.perf_counter()
+            # Absorb the rest of the burst (editors and copies write in pieces).
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changes |= more
+            reason = ", ".join(sorted(os.path.basename(path) for path in changes)) + " changed"
+    finally:
+        watcher.close()
+
+
+def render_preview(
+    file_path: str,
+    size: tuple[int, int],
+    cache: PreviewCache | None = None,
+) -> Image.Image:
+    """Decode and shrink a source into an RGBA editor preview.
+
+    Uses the ``fast`` resample strategy (see ``load_tile``): previews favour
+    latency over fidelity. With ``cache``, stored previews are returned
+    without opening the source, and new ones are stored.
+    """
+    key = cache.key(file_path, size) if cache is not None else None
+    if key is not None:
+        image = cache.get(key, size)
+        if image is not None:
+            return image
+    image = load_tile(file_path, size, "fast").convert("RGBA")
+    if key is not None:
+        cache.put(key, image)
+    return image
+
+
+def preview_level(scale: float, size: tuple[int, int]) -> int:
+    """Return the mip level to draw an item of ``size`` at view ``scale``.
+
+    Level ``n`` is the item at ``1 / 2**n`` of its size. The chosen level is
+    the smallest one that still has at least one pixel per screen pixel.
+    """
+    if scale >= 1:
+        return 0
+    level = int(math.floor(math.log2(1 / scale)))
+    return min(level, max(size).bit_length() - 1)
+
+
+def level_size(size: tuple[int, int], level: int) -> tuple[int, int]:
+    """Return the pixel size of mip ``level`` for an item of ``size``."""
+    return max(1, -(-size[0] >> level)), max(1, -(-size[1] >> level))
+
+
+def match_items(old: Sequence[Item], new: Sequence[Item]) -> List[int | None]:
+    """Pair each new item with an old item showing the same image, if any.
+
+    Items match when they have the same file and size. An old item at the
+    same index wins; otherwise old items are taken in order. Each old item
+    is used at most once.
+
+    Returns
+    -------
+        For every item in ``new``, the index of its match in ``old`` or None.
+    """
+    def key(it: Item) -> tuple[str, int, int]:
+        return it.file, it.w, it.h
+
+    matches: List[int | None] = [None] * len(new)
+    used = set()
+    for idx, it in enumerate(new[:len(old)]):
+        if key(old[idx]) == key(it):
+            matches[idx] = idx
+            used.add(idx)
+    spare: dict[tuple[str, int, int], list[int]] = {}
+    for idx in range(len(old) - 1, -1, -1):
+        if idx not in used:
+            spare.setdefault(key(old[idx]), []).append(idx)
+    for idx, it in enumerate(new):
+        if matches[idx] is None and spare.get(key(it)):
+            matches[idx] = spare[key(it)].pop()
+    return matches
+
+
+class PreviewLoader:
+    """Render editor previews on worker threads.
+
+    ``request`` returns at once; finished previews are collected with
+    ``drain`` on the GUI thread, which must create every QPixmap itself.
+    """
+
+    def __init__(self, jobs: int | None = None, cache: PreviewCache | None = None):
+        """Start the worker pool.
+
+        Parameters
+        ----------
+            jobs : Worker count (defaults to the CPU count).
+            cache : Optional on-disk preview cache.
+        """
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(
+            max_workers=jobs or default_jobs(), thread_name_prefix="lyco-preview"
+        )
+        self._done: queue.SimpleQueue = queue.SimpleQueue()
+
+    def request(self, owner, file_path: str, size: tuple[int, int]) -> Future:
+        """Queue a preview of ``file_path`` at ``size`` for ``owner``.
+
+        Returns
+        -------
+            The render future; cancel it if the preview is no longer needed.
+        """
+        future = self._pool.submit(render_preview, file_path, size, self.cache)
+        future.add_done_callback(lambda done: self._done.put((owner, size, done)))
+        return future
+
+    def submit(self, fn, *args) -> Future:
+        """Run ``fn(*args)`` on the preview workers; poll the returned future.
+
+        The result is not queued for ``drain``.
+        """
+        return self._pool.submit(fn, *args)
+
+    def drain(
+        self, timeout: float | None = None
+    ) -> List[tuple[object, tuple[int, int], Image.Image | None]]:
+        """Return the (owner, size, preview) results finished since the last call.
+
+        Cancelled requests are dropped; failed renders give a None preview.
+
+        Parameters
+        ----------
+            timeout : Wait up to this many seconds for the first result
+                instead of returning at once when none is ready.
+        """
+        ready = []
+        block = timeout is not None
+        while True:
+            try:
+                owner, size, future = self._done.get(block, timeout)
+            except queue.Empty:
+                return ready
+            block = False
+            if not future.cancelled():
+                ready.append((owner, size, None if future.exception() else future.result()))
+
+    def close(self) -> None:
+        """Stop the workers, dropping queued requests."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LayoutItem:
+    """A draggable rectangle that represents an image placement in the layout."""
+
+    def __init__(
+        self,
+        item: Item,
+        index: int,
+        on_move,
+        on_snap,
+        previews: PreviewLoader,
+        *,
+        on_release=None,
+    ):
+        """Create a draggable layout item.
+
+        Previews are mip levels of the item (see ``preview_level``), rendered
+        by ``previews`` the first time the item is painted at that zoom. Only
+        the level the view needs and the coarsest loaded level are kept, so
+        preview memory follows screen pixels rather than canvas pixels.
+
+        Parameters
+        ----------
+            item : The layout item model.
+            index : 1-based item index for labeling.
+            on_move : Callback for move events.
+            on_snap : Callback for snapping adjustments.
+            previews : Loader that renders previews in the background.
+            on_release : Optional callback for the end of a drag.
+        """
+        from PyQt5.QtCore import QRectF
+        from PyQt5.QtGui import QBrush, QPen, QColor, QFont
+        from PyQt5.QtWidgets import QGraphicsItem
+
+        self.item = item
+        self.index = index
+        self.on_move = on_move
+        self.on_snap = on_snap
+        self.on_release = on_release
+
+        self.rect = QRectF(0, 0, item.w, item.h)
+        self.previews = previews
+        self.levels = {}
+        self.pending: dict[int, Future] = {}
+        self.wanted: int | None = None
+        self.failed = False
+
+        self.brush = QBrush(QColor(50, 150, 230, 60))
+        self.placeholder = QBrush(QColor(40, 48, 60))
+        self.pen = QPen(QColor(50, 150, 230), 2)
+        self.text_color = QColor(255, 255, 255)
+        self.font = QFont("Sans", 14)
+
+        class RectItem(QGraphicsItem):
+            """QGraphicsItem wrapper for drawing and moving a layout item."""
+
+            def __init__(self, outer):
+                """Initialize the graphics item.
+
+                Parameters
+                ----------
+                    outer : Parent LayoutItem wrapper.
+                """
+                super().__init__()
+                self.outer = outer
+                self.setFlags(
+                    QGraphicsItem.ItemIsMovable
+                    | QGraphicsItem.ItemIsSelectable
+                    | QGraphicsItem.ItemSendsGeometryChanges
+                )
+                self.setPos(outer.item.x, outer.item.y)
+
+            def boundingRect(self):
+                """Return the bounding rectangle for the item."""
+                return self.outer.rect
+
+            def paint(self, painter, option, widget=None):
+                """Paint the item, including preview image and index label."""
+                scale = option.levelOfDetailFromTransform(painter.worldTransform())
+                pixmap = self.outer.pixmap_for(scale)
+                if pixmap is not None:
+                    painter.drawPixmap(self.outer.rect, pixmap, QRectF(pixmap.rect()))
+                elif not self.outer.failed:
+                    painter.fillRect(self.outer.rect, self.outer.placeholder)
+                painter.setBrush(self.outer.brush)
+                painter.setPen(self.outer.pen)
+                painter.drawRect(self.outer.rect)
+                painter.setPen(self.outer.text_color)
+                painter.setFont(self.outer.font)
+                painter.drawText(8, 20, str(self.outer.index))
+
+            def itemChange(self, change, value):
+                """Handle item position changes and apply snapping.
+
+                Parameters
+                ----------
+                    change : Qt change enum.
+                    value : Proposed value for the change.
+
+                Returns
+                -------
+                    The new position to apply.
+                """
+                from PyQt5.QtWidgets import QGraphicsItem
+
+                if change == QGraphicsItem.ItemPositionChange:
+                    from PyQt5.QtCore import QPointF
+
+                    pos = value
+                    new_x = int(pos.x())
+                    new_y = int(pos.y())
+                    if self.outer.on_snap:
+                        new_x, new_y = self.outer.on_snap(self.outer.item, new_x, new_y)
+                    self.outer.item.x = int(new_x)
+                    self.outer.item.y = int(new_y)
+                    self.outer.on_move(self.outer.item)
+                    return QPointF(self.outer.item.x, self.outer.item.y)
+                return super().itemChange(change, value)
+
+            def mousePressEvent(self, event):
+                """Handle mouse press, ignoring Ctrl-modified drags."""
+                from PyQt5.QtCore import Qt
+
+                if event.modifiers() & Qt.ControlModifier:
+                    event.ignore()
+                    return
+                super().mousePressEvent(event)
+
+            def mouseMoveEvent(self, event):
+                """Handle mouse move, ignoring Ctrl-modified drags."""
+                from PyQt5.QtCore import Qt
+
+                if event.modifiers() & Qt.ControlModifier:
+                    event.ignore()
+                    return
+                super().mouseMoveEvent(event)
+
+            def mouseReleaseEvent(self, event):
+                """Handle mouse release, ending a drag."""
+                super().mouseReleaseEvent(event)
+                if self.outer.on_release:
+                    self.outer.on_release()
+
+        self.graphics_item = RectItem(self)
+
+    def rebind(self, item: Item, index: int) -> None:
+        """Show ``item`` (same file and size) at ``index`` without reloading previews.
+
+        Parameters
+        ----------
+            item : The new layout item model.
+            index : 1-based item index for labeling.
+        """
+        self.item = item
+        if index != self.index:
+            self.index = index
+            self.graphics_item.update()
+        self.graphics_item.setPos(item.x, item.y)
+
+    def pixmap_for(self, scale: float):
+        """Return the best loaded preview for view ``scale``, or None.
+
+        Requests the matching mip level if it is not loaded yet and cancels
+        queued requests for other levels; until it arrives the nearest
+        loaded level is returned.
+        """
+        size = (self.item.w, self.item.h)
+        level = preview_level(scale, size)
+        if level != self.wanted:
+            self.wanted = level
+            for other, future in list(self.pending.items()):
+                if other != level and future.cancel():
+                    del self.pending[other]
+            if level not in self.levels and level not in self.pending and not self.failed:
+                self.pending[level] = self.previews.request(
+                    self, self.item.file, level_size(size, level)
+                )
+        if level in self.levels:
+            return self.levels[level]
+        if self.levels:
+            return self.levels[min(self.levels, key=lambda loaded: abs(loaded - level))]
+        return None
+
+    def set_preview(self, size: tuple[int, int], image: Image.Image | None) -> None:
+        """Store a finished preview level; call on the GUI thread.
+
+        Parameters
+        ----------
+            size : Size the preview was requested at; unknown sizes are ignored.
+            image : RGBA preview, or None if the source could not be read.
+        """
+        from PyQt5.QtGui import QImage, QPixmap
+
+        full = (self.item.w, self.item.h)
+        level = next((lvl for lvl in self.pending if level_size(full, lvl) == size), None)
+        if level is None:
+            return
+        del self.pending[level]
+        if image is None:
+            self.failed = True
+        else:
+            data = image.tobytes("raw", "RGBA")
+            qimg = QImage(data, image.width, image.height, QImage.Format_RGBA8888)
+            self.levels[level] = QPixmap.fromImage(qimg)
+            keep = {self.wanted, max(self.levels)}
+            self.levels = {lvl: pix for lvl, pix in self.levels.items() if lvl in keep}
+        self.graphics_item.update()
+
+    def cancel_preview(self) -> None:
+        """Cancel preview levels that have not started rendering yet."""
+        for future in self.pending.values():
+            future.cancel()
+
+
+class ZoomableGraphicsView:
+    """Graphics view with Ctrl+wheel zoom and Ctrl+drag pan."""
+
+    def __init__(self, scene, on_zoom):
+        """Initialize a zoomable view.
+
+        Parameters
+        ----------
+            scene : QGraphicsScene to render.
+            on_zoom : Callback invoked with zoom value.
+        """
+        from PyQt5.QtWidgets import QGraphicsView
+        from PyQt5.QtCore import Qt
+        from PyQt5.QtGui import QPainter
+
+        class _View(QGraphicsView):
+            """Customized QGraphicsView for zoom and pan support."""
+
+            def __init__(self, scene, on_zoom):
+                """Initialize the view.
+
+                Parameters
+                ----------
+                    scene : QGraphicsScene to render.
+                    on_zoom : Callback invoked with zoom value.
+                """
+                super().__init__(scene)
+                self.on_zoom = on_zoom
+                self._zoom = 1.0
+                self.setRenderHint(QPainter.Antialiasing)
+                self.setRenderHint(QPainter.SmoothPixmapTransform)
+                self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+                self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
+                self.setDragMode(QGraphicsView.NoDrag)
+
+            def wheelEvent(self, event):
+                """Zoom in/out on Ctrl+wheel."""
+                if event.modifiers() & Qt.ControlModifier:
+                    delta = event.angleDelta().y()
+                    factor = 1.15 if delta > 0 else 1 / 1.15
+                    new_zoom = self._zoom * factor
+                    if 0.1 <= new_zoom <= 10:
+                        self._zoom = new_zoom
+                        self.scale(factor, factor)
+                        if self.on_zoom:
+                            self.on_zoom(self._zoom)
+                    event.accept()
+                else :
+                    super().wheelEvent(event)
+
+            def mousePressEvent(self, event):
+                """Enable panning on Ctrl+drag."""
+                if event.button() == Qt.LeftButton and (event.modifiers() & Qt.ControlModifier):
+                    self.setDragMode(QGraphicsView.ScrollHandDrag)
+                super().mousePressEvent(event)
+
+            def mouseReleaseEvent(self, event):
+                """Disable panning when mouse is released."""
+                super().mouseReleaseEvent(event)
+                if self.dragMode() == QGraphicsView.ScrollHandDrag:
+                    self.setDragMode(QGraphicsView.NoDrag)
+
+        self.widget = _View(scene, on_zoom)
+
+
+class LayoutEditor:
+    """GUI editor for YAML layouts."""
+
+    def __init__(self, config_path: Path, preview_cache: PreviewCache | None = None):
+        """Create the GUI and load the initial YAML.
+
+        Parameters
+        ----------
+            config_path : Path to YAML layout file.
+            preview_cache : Optional on-disk cache of rendered previews.
+        """
+        from PyQt5.QtWidgets import (
+            QApplication,
+            QMainWindow,
+            QWidget,
+            QVBoxLayout,
+            QHBoxLayout,
+            QPushButton,
+            QLabel,
+            QGraphicsScene,
+            QFileDialog,
+            QSplitter,
+            QPlainTextEdit,
+            QTextEdit,
+            QFrame,
+        )
+        from PyQt5.QtCore import Qt, QRect, QSize, QTimer
+        from PyQt5.QtGui import (
+            QSyntaxHighlighter,
+            QTextCharFormat,
+            QColor,
+            QFont,
+            QPainter,
+            QTextCursor,
+            QTextFormat,
+            QFontDatabase,
+            QPalette,
+            QPen,
+        )
+
+        self.config_path = config_path
+        self.data = {}
+        self.output = "wallpaper.png"
+        self.items: List[Item] = []
+        self.canvas_w = 1
+        self.canvas_h = 1
+        self.snap_threshold = 10
+        # Item edges for snapping, kept in step with item moves.
+        self.x_edges = EdgeIndex()
+        self.y_edges = EdgeIndex()
+        # Set while items are placed from YAML, which must not snap.
+        self.placing = False
+        self.moved_item: Item | None = None
+        self.snapped_to: tuple[int | None, int | None] = (None, None)
+
+        self.app = QApplication([])
+        self.window = QMainWindow()
         self.window.setWindowTitle(f"Lyco Python Framework - Image Mosaic ({self.config_path})")
-        self.window.resize(1200, 800)
-
-        central = QWidget()
-        self.window.setCentralWidget(central)
-        main_layout = QVBoxLayout()
-        central.setLayout(main_layout)
-
-        toolbar = QHBoxLayout()
-        main_layout.addLayout(toolbar)
-
-        self.coord_label = QLabel("X: -, Y: -")
-        toolbar.addWidget(self.coord_label)
-
-        self.zoom_label = QLabel("Zoom: 100%")
-        toolbar.addWidget(self.zoom_label)
-
-        self.yaml_status = QLabel("YAML: OK")
-        toolbar.addWidget(self.yaml_status)
-
-        save_btn = QPushButton("Save YAML")
-        save_btn.clicked.connect(self.on_save)
-        toolbar.addWidget(save_btn)
-
-        apply_btn = QPushButton("Apply YAML")
-        apply_btn.clicked.connect(self.on_apply_yaml)
-        toolbar.addWidget(apply_btn)
-
-        export_btn = QPushButton("Export PNG")
-        export_btn.clicked.connect(self.on_export_png)
-        toolbar.addWidget(export_btn)
-
-        toolbar.addStretch(1)
-
-        self.scene = QGraphicsScene(0, 0, self.canvas_w, self.canvas_h)
-        view = ZoomableGraphicsView(self.scene, self.on_zoom)
-        self.view = view.widget
-
-        # YAML editor with line numbers + syntax highlighting.
-        class LineNumberArea(QFrame):
-            """Left gutter for line numbers."""
-
-            def __init__(self, editor):
-                """Initialize the line number area.
-
-                Parameters
-                ----------
-                    editor : The owning text editor.
-                """
-                super().__init__(editor)
-                self.editor = editor
-
-            def sizeHint(self):
-                """Return the preferred size for the line number area."""
-                return QSize(self.editor.line_number_area_width(), 0)
-
-            def paintEvent(self, event):
-                """Paint line numbers."""
-                self.editor.line_number_area_paint_event(event)
-
-        class LineNumberTextEdit(QPlainTextEdit):
-            """Text editor with a line number gutter."""
-
-            def __init__(self):
-                """Initialize the line-numbered editor."""
-                super().__init__()
-                self.line_number_area = LineNumberArea(self)
-                self.blockCountChanged.connect(self.update_line_number_area_width)
-                self.updateRequest.connect(self.update_line_number_area)
-                self.cursorPositionChanged.connect(self.highlight_current_line)
-                self.update_line_number_area_width(0)
-                self.highlight_current_line()
-
-            def line_number_area_width(self):
-                """Return the required width for the line number area."""
-                digits = len(str(max(1, self.blockCount())))
-                space = 6 + self.fontMetrics().horizontalAdvance("9") * digits
-                return space
-
-            def update_line_number_area_width(self, _):
-                """Adjust editor margins to fit the line number area."""
-                self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
-
-            def update_line_number_area(self, rect, dy):
-                """Update the line number area on scroll or redraw."""
-                if dy:
-                    self.line_number_area.scroll(0, dy)
-                else:
-                    self.line_number_area.update(
-                        0, rect.y(), self.line_number_area.width(), rect.height()
-                    )
-                if rect.contains(self.viewport().rect()):
-                    self.update_line_number_area_width(0)
-
-            def resizeEvent(self, event):
-                """Resize the line number area with the editor."""
-                super().resizeEvent(event)
-                cr = self.contentsRect()
-                self.line_number_area.setGeometry(
-                    QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height())
-                )
-
-            def line_number_area_paint_event(self, event):
-                """Render line numbers for visible blocks."""
-                pal = self.palette()
-                painter = QPainter(self.line_number_area)
-                painter.fillRect(event.rect(), pal.color(QPalette.AlternateBase))
-                block = self.firstVisibleBlock()
-                block_number = block.blockNumber()
-                top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-                bottom = top + int(self.blockBoundingRect(block).height())
-                while block.isValid() and top <= event.rect().bottom():
-                    if block.isVisible() and bottom >= event.rect().top():
-                        number = str(block_number + 1)
-                        painter.setPen(pal.color(QPalette.Text))
-                        painter.drawText(0, top, self.line_number_area.width() - 4, self.fontMetrics().height(),
-                                         Qt.AlignRight, number)
-                    block = block.next()
-                    top = bottom
-                    bottom = top + int(self.blockBoundingRect(block).height())
-                    block_number += 1
-
-            def highlight_current_line(self):
-                """Highlight the current line in the editor."""
-                extra = []
-                if not self.isReadOnly():
-                    selection = QTextEdit.ExtraSelection()
-                    selection.format.setBackground(self.palette().color(QPalette.AlternateBase))
-                    selection.format.setProperty(QTextFormat.FullWidthSelection, True)
-                    selection.cursor = self.textCursor()
-                    selection.cursor.clearSelection()
-                    extra.append(selection)
-                self.setExtraSelections(extra)
-
-        class YamlHighlighter(QSyntaxHighlighter):
-            """Syntax highlighter for YAML."""
-
-            def __init__(self, document, palette: QPalette):
-                """Initialize highlighting rules.
-
-                Parameters
-                ----------
-                    document : Document to highlight.
-                    palette : Current application palette.
-                """
-                super().__init__(document)
-                self.rules = []
-                base = palette.color(QPalette.Base)
-                text = palette.color(QPalette.Text)
-                is_dark = base.lightness() < 128
-
-                def mix(c1: QColor, c2: QColor, t: float) -> QColor:
-                    """Blend two colors by a factor.
-
-                    Parameters
-                    ----------
-                        c1 : First color.
-                        c2 : Second color.
-                        t : Blend factor from 0.0 to 1.0.
-
-                    Returns
-                    -------
-                        Blended QColor.
-                    """
-                    return QColor(
-                        int(c1.red() * (1 - t) + c2.red() * t),
-                        int(c1.green() * (1 - t) + c2.green() * t),
-                        int(c1.blue() * (1 - t) + c2.blue() * t),
-                    )
-
-                key_format = QTextCharFormat()
-                key_format.setForeground(
-                    mix(
-                        text,
-                        QColor(80, 160, 255) if is_dark else QColor(30, 110, 210),
-                        0.6,
-                    )
-                )
-                key_format.setFontWeight(QFont.Bold)
-                self.rules.append((r"^\\s*[^:#\\n]+(?=\\s*:)", key_format))
-
-                string_format = QTextCharFormat()
-                string_format.setForeground(
-                    mix(
-                        text,
-                        QColor(140, 220, 160) if is_dark else QColor(40, 140, 80),
-                        0.6,
-                    )
-                )
-                self.rules.append((r"\"[^\"\\n]*\"", string_format))
-                self.rules.append((r"'[^'\\n]*'", string_format))
-
-                number_format = QTextCharFormat()
-                number_format.setForeground(
-                    mix(
-                        text,
-                        QColor(255, 200, 120) if is_dark else QColor(180, 120, 30),
-                        0.6,
-                    )
-                )
-                self.rules.append((r"\\b\\d+\\b", number_format))
-
-                bool_format = QTextCharFormat()
-                bool_format.setForeground(
-                    mix(
-                        text,
-                        QColor(255, 150, 200) if is_dark else QColor(160, 60, 120),
-                        0.6,
-                    )
-                )
-                self.rules.append((r"\\b(true|false|null)\\b", bool_format))
-
-                comment_format = QTextCharFormat()
-                comment_format.setForeground(
-                    mix(text, QColor(140, 140, 140), 0.5)
-                )
-                self.rules.append((r"#.*$", comment_format))
-
-            def highlightBlock(self, text):
-                """Apply syntax highlighting to a block of text.
-
-                Parameters
-                ----------
-                    text : Line of text to highlight.
-                """
-                import re
-                for pattern, fmt in self.rules:
-                    for match in re.finditer(pattern, text):
-                        start = match.start()
-                        length = match.end() - match.start()
-                        self.setFormat(start, length, fmt)
-
-        editor_container = QWidget()
-        editor_layout = QVBoxLayout()
-        editor_layout.setContentsMargins(0, 0, 0, 0)
-        editor_container.setLayout(editor_layout)
-
-        self.yaml_editor = LineNumberTextEdit()
-        mono = QFontDatabase.systemFont(QFontDatabase.FixedFont)
-        mono.setPointSize(10)
-        mono.setKerning(True)
-        mono.setStyleStrategy(QFont.PreferAntialias)
-        mono.setStyleHint(QFont.TypeWriter)
-        self.yaml_editor.setFont(mono)
-        self.yaml_editor.setLineWrapMode(QPlainTextEdit.NoWrap)
-        self.yaml_editor.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.yaml_editor.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        self.yaml_editor.setTabStopDistance(self.yaml_editor.fontMetrics().horizontalAdvance(" ") * 2)
-        self.yaml_highlighter = YamlHighlighter(self.yaml_editor.document(), self.app.palette())
-        editor_layout.addWidget(self.yaml_editor)
-
-        splitter = QSplitter(Qt.Horizontal)
-        splitter.addWidget(editor_container)
-        splitter.addWidget(self.view)
-        splitter.setStretchFactor(0, 1)
-        splitter.setStretchFactor(1, 2)
-        editor_container.setMinimumWidth(320)
-        self.splitter = splitter
-        main_layout.addWidget(splitter)
-
-        self.layout_items = []
-        self.error_timer = QTimer()
-        self.error_timer.setSingleShot(True)
-        self.error_timer.timeout.connect(self.validate_yaml_text)
-
-        self.yaml_editor.textChanged.connect(self.on_yaml_text_changed)
-
-        # Load initial YAML into both the editor and the scene.
-        self.load_from_yaml_file()
-
-        self.window.show()
-        QTimer.singleShot(0, self.apply_splitter_ratio)
-        self.app.exec_()
-
-    def on_item_move(self, item: Item):
-        """Update the coordinate label after an item move.
-
-        Parameters
-        ----------
-            item : The item that moved.
-        """
-        self.coord_label.setText(f"X: {item.x}, Y: {item.y}")
-
-    def snap_position(self, moving: Item, x: int, y: int) -> tuple[int, int]:
-        """Snap a moving item to nearby edges.
-
-        Parameters
-        ----------
-            moving : Item being moved.
-            x : Proposed x position.
-            y : Proposed y position.
-
-        Returns
-        -------
-            Snapped (x, y) position.
-        """
-        # Snap edges if within threshold to another item's edges.
-        snap = self.snap_threshold
-        new_x = x
-        new_y = y
-
-        for other in self.items:
-            if other is moving:
-                continue
-
-            # Horizontal snapping: left/right edges
-            if abs(new_x - (other.x + other.w)) <= snap:
-                new_x = other.x + other.w
-            if abs((new_x + moving.w) - other.x) <= snap:
-                new_x = other.x - moving.w
-            if abs(new_x - other.x) <= snap:
-                new_x = other.x
-            if abs((new_x + moving.w) - (other.x + other.w)) <= snap:
-                new_x = other.x + other.w - moving.w
-
-            # Vertical snapping: top/bottom edges
-            if abs(new_y - (other.y + other.h)) <= snap:
-                new_y = other.y + other.h
-            if abs((new_y + moving.h) - other.y) <= snap:
-                new_y = other.y - moving.h
-            if abs(new_y - other.y) <= snap:
-                new_y = other.y
-            if abs((new_y + moving.h) - (other.y + other.h)) <= snap:
-                new_y = other.y + other.h - moving.h
-
-        return new_x, new_y
-
-    def on_zoom(self, zoom_value: float):
-        """Update the zoom label.
-
-        Parameters
-        ----------
-            zoom_value : Current zoom scale.
-        """
-        self.zoom_label.setText(f"Zoom: {int(zoom_value * 100)}%")
-
-    def apply_splitter_ratio(self):
-        """Set initial editor/canvas splitter ratio."""
-        # Set initial pane ratio to roughly 1/3 editor and 2/3 canvas.
-        total = max(1, self.window.width())
-        left = max(320, total // 3)
-        right = max(1, total - left)
-        self.splitter.setSizes([left, right])
-
-    def on_yaml_text_changed(self):
-        """Debounce YAML validation while typing."""
-        self.error_timer.start(300)
-
-    def validate_yaml_text(self):
-        """Validate YAML text and update status."""
-        text = self.yaml_editor.toPlainText()
-        try:
-            import yaml  # type: ignore
-            yaml.safe_load(text)
-            self.yaml_status.setText("YAML: OK")
-            self.yaml_status.setStyleSheet("color: #9ad27a;")
-            self.clear_error_highlight()
-        except Exception as exc:
-            msg = str(exc)
-            self.yaml_status.setText(f"YAML: {msg}")
-            self.yaml_status.setStyleSheet("color: #ff8c8c;")
-            self.highlight_error_line(msg)
-
-    def highlight_error_line(self, msg: str):
-        """Highlight the YAML error line if possible.
-
-        Parameters
-        ----------
-            msg : Exception message from PyYAML.
-        """
-        # Best-effort parse of line number from PyYAML error message.
-        import re
-        from PyQt5.QtGui import QTextCursor, QColor
-        from PyQt5.QtWidgets import QTextEdit
-        match = re.search(r"line\\s+(\\d+)", msg)
-        if not match:
-            self.clear_error_highlight()
-            return
-        line_no = int(match.group(1))
-        cursor = self.yaml_editor.textCursor()
-        cursor.movePosition(QTextCursor.Start)
-        for _ in range(line_no - 1):
-            cursor.movePosition(QTextCursor.Down)
-        cursor.select(QTextCursor.LineUnderCursor)
-        extra = QTextEdit.ExtraSelection()
-        extra.cursor = cursor
-        extra.format.setBackground(QColor(90, 40, 40))
-        extras = self.yaml_editor.extraSelections()
-        # Preserve current-line highlight at index 0 if present.
-        if extras:
-            extras = extras[:1]
-        else:
-            extras = []
-        extras.append(extra)
-        self.yaml_editor.setExtraSelections(extras)
-
-    def clear_error_highlight(self):
-        """Clear error highlighting while preserving current-line highlight."""
-        extras = self.yaml_editor.extraSelections()
-        if extras:
-            self.yaml_editor.setExtraSelections(extras[:1])
-
-    def load_from_yaml_file(self):
-        """Load YAML from disk into the editor and scene."""
-        self.data = load_yaml(self.config_path)
-        self.output = self.data.get("output", "wallpaper.png")
-        self.yaml_editor.blockSignals(True)
-        self.yaml_editor.setPlainText(self.config_path.read_text(encoding="utf-8"))
-        self.yaml_editor.blockSignals(False)
-        self.validate_yaml_text()
-        self.apply_yaml_data(self.data)
-
-    def apply_yaml_data(self, data: dict):
-        """Apply parsed YAML data to the scene and internal state.
-
-        Parameters
-        ----------
-            data : Parsed YAML data.
-        """
-        items_data = data.get("items")
-        if not isinstance(items_data, list) or not items_data:
-            raise SystemExit("Config must include non-empty 'items' list.")
-
-        self.items = []
-        for idx, item in enumerate(items_data, start=1):
-            if not isinstance(item, dict):
-                raise SystemExit(f"Item #{idx} must be an object.")
-            try:
-                x = int(item["x"])
-                y = int(item["y"])
-                file_path = str(item["file"])
-                res = str(item["resolution"])
-            except Exception as exc:
-                raise SystemExit(f"Item #{idx} must include x, y, file, resolution") from exc
-            w, h = parse_resolution(res)
-            self.items.append(Item(file=file_path, x=x, y=y, w=w, h=h, resolution=res))
-
-        canvas_w = data.get("canvas_width")
-        canvas_h = data.get("canvas_height")
-        if canvas_w is None or canvas_h is None:
-            max_right = max(i.x + i.w for i in self.items)
-            max_bottom = max(i.y + i.h for i in self.items)
-            canvas_w = max_right
-            canvas_h = max_bottom
-        self.canvas_w = int(canvas_w)
-        self.canvas_h = int(canvas_h)
-
-        self.scene.clear()
-        self.layout_items = []
-        for idx, it in enumerate(self.items, start=1):
-            li = LayoutItem(it, idx, self.on_item_move, self.snap_position)
-            self.layout_items.append(li)
-            self.scene.addItem(li.graphics_item)
-        self.scene.setSceneRect(0, 0, self.canvas_w, self.canvas_h)
-        self.view.centerOn(self.canvas_w / 2, self.canvas_h / 2)
-
-    def on_save(self):
-        """Save YAML edits and normalize layout coordinates."""
-        text = self.yaml_editor.toPlainText()
-        try:
-            import yaml  # type: ignore
-            data = yaml.safe_load(text)
-            if not isinstance(data, dict):
-                raise ValueError("Config root must be a mapping/object.")
-        except Exception as exc:
-            self.yaml_status.setText(f"YAML: {exc}")
-            self.yaml_status.setStyleSheet("color: #ff8c8c;")
-            self.highlight_error_line(str(exc))
-            return
-
-        # Save text first, then apply to the scene.
-        self.config_path.write_text(text, encoding="utf-8")
-        self.apply_yaml_data(data)
-
-        # Normalize to top-left origin and save with tight canvas bounds.
-        min_x = min(it.x for it in self.items)
-        min_y = min(it.y for it in self.items)
-        max_right = max(it.x + it.w for it in self.items)
-        max_bottom = max(it.y + it.h for it in self.items)
-
-        shift_x = -min_x
-        shift_y = -min_y
-
-        items_out = []
-        for it in self.items:
-            items_out.append({
-                "file": it.file,
-                "x": it.x + shift_x,
-                "y": it.y + shift_y,
-                "resolution": it.resolution,
-            })
-
-        data_out = {
-            "output": self.output,
-            "canvas_width": max_right - min_x,
-            "canvas_height": max_bottom - min_y,
-            "items": items_out,
-        }
-        save_yaml(self.config_path, data_out)
-
-        # Recenter the view by normalizing in-memory positions and scene bounds.
-        self.canvas_w = data_out["canvas_width"]
-        self.canvas_h = data_out["canvas_height"]
-        for li in self.layout_items:
-            li.item.x += shift_x
-            li.item.y += shift_y
-            li.graphics_item.setPos(li.item.x, li.item.y)
-        self.scene.setSceneRect(0, 0, self.canvas_w, self.canvas_h)
-        self.view.centerOn(self.canvas_w / 2, self.canvas_h / 2)
-        self.yaml_editor.blockSignals(True)
-        self.yaml_editor.setPlainText(self.config_path.read_text(encoding="utf-8"))
-        self.yaml_editor.blockSignals(False)
-        self.validate_yaml_text()
-
-    def on_apply_yaml(self):
-        """Apply YAML edits without saving."""
-        text = self.yaml_editor.toPlainText()
-        try:
-            import yaml  # type: ignore
-            data = yaml.safe_load(text)
-            if not isinstance(data, dict):
-                raise ValueError("Config root must be a mapping/object.")
-        except Exception as exc:
-            self.yaml_status.setText(f"YAML: {exc}")
-            self.yaml_status.setStyleSheet("color: #ff8c8c;")
-            self.highlight_error_line(str(exc))
-            return
-        self.apply_yaml_data(data)
-
-    def on_export_png(self):
-        """Export the current layout as a PNG image."""
-        from PyQt5.QtGui import QImage, QPainter
-        from PyQt5.QtWidgets import QFileDialog
-        from PyQt5.QtCore import Qt
-
-        path, _ = QFileDialog.getSaveFileName(
-            self.window,
-            "Export Wallpaper PNG",
-            self.output,
-            "PNG Images (*.png)"
-        )
-        if not path:
-            return
-
-        image = QImage(self.canvas_w, self.canvas_h, QImage.Format_RGBA8888)
-        image.fill(Qt.transparent)
-
-        painter = QPainter(image)
-        self.scene.render(painter)
-        painter.end()
-
-        image.save(path)
-
-
-def run_gui(config_path: Path) -> None:
-    """Launch the PyQt GUI editor.
-
-    Parameters
-    ----------
-        config_path : Path to YAML layout file.
-    """
-    LayoutEditor(config_path)
-
-
-def build_arg_parser() -> argparse.ArgumentParser:
-    """Build the CLI argument parser.
-
-    Returns
-    -------
-        Configured argument parser.
-    """
+        self.window.resize(1200, 800)
+
+        central = QWidget()
+        self.window.setCentralWidget(central)
+        main_layout = QVBoxLayout()
+        central.setLayout(main_layout)
+
+        toolbar = QHBoxLayout()
+        main_layout.addLayout(toolbar)
+
+        self.coord_label = QLabel("X: -, Y: -")
+        toolbar.addWidget(self.coord_label)
+
+        self.zoom_label = QLabel("Zoom: 100%")
+        toolbar.addWidget(self.zoom_label)
+
+        self.yaml_status = QLabel("YAML: OK")
+        toolbar.addWidget(self.yaml_status)
+
+        save_btn = QPushButton("Save YAML")
+        save_btn.clicked.connect(self.on_save)
+        toolbar.addWidget(save_btn)
+
+        apply_btn = QPushButton("Apply YAML")
+        apply_btn.clicked.connect(self.on_apply_yaml)
+        toolbar.addWidget(apply_btn)
+
+        self.export_btn = QPushButton("Export PNG")
+        self.export_btn.clicked.connect(self.on_export_png)
+        toolbar.addWidget(self.export_btn)
+        self.export_job: tuple[str, Future] | None = None
+
+        toolbar.addStretch(1)
+
+        self.scene = QGraphicsScene(0, 0, self.canvas_w, self.canvas_h)
+        view = ZoomableGraphicsView(self.scene, self.on_zoom)
+        self.view = view.widget
+
+        # Alignment guides, shown while a drag is snapped to another edge.
+        guide_pen = QPen(QColor(255, 190, 60))
+        guide_pen.setCosmetic(True)
+        guide_pen.setStyle(Qt.DashLine)
+        self.guides = (
+            self.scene.addLine(0, 0, 0, 0, guide_pen),
+            self.scene.addLine(0, 0, 0, 0, guide_pen),
+        )
+        for guide in self.guides:
+            guide.setZValue(1e9)
+            guide.hide()
+        # Drag feedback (coordinates, guides) is redrawn at most once per frame.
+        self.frame_timer = QTimer()
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(16)
+        self.frame_timer.timeout.connect(self.refresh_drag_feedback)
+
+        # YAML editor with line numbers + syntax highlighting.
+        class LineNumberArea(QFrame):
+            """Left gutter for line numbers."""
+
+            def __init__(self, editor):
+                """Initialize the line number area.
+
+                Parameters
+                ----------
+                    editor : The owning text editor.
+                """
+                super().__init__(editor)
+                self.editor = editor
+
+            def sizeHint(self):
+                """Return the preferred size for the line number area."""
+                return QSize(self.editor.line_number_area_width(), 0)
+
+            def paintEvent(self, event):
+                """Paint line numbers."""
+                self.editor.line_number_area_paint_event(event)
+
+        class LineNumberTextEdit(QPlainTextEdit):
+            """Text editor with a line number gutter."""
+
+            def __init__(self):
+                """Initialize the line-numbered editor."""
+                super().__init__()
+                self.line_number_area = LineNumberArea(self)
+                self.blockCountChanged.connect(self.update_line_number_area_width)
+                self.updateRequest.connect(self.update_line_number_area)
+                self.cursorPositionChanged.connect(self.highlight_current_line)
+                self.update_line_number_area_width(0)
+                self.highlight_current_line()
+
+            def line_number_area_width(self):
+                """Return the required width for the line number area."""
+                digits = len(str(max(1, self.blockCount())))
+                space = 6 + self.fontMetrics().horizontalAdvance("9") * digits
+                return space
+
+            def update_line_number_area_width(self, _):
+                """Adjust editor margins to fit the line number area."""
+                self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+
+            def update_line_number_area(self, rect, dy):
+                """Update the line number area on scroll or redraw."""
+                if dy:
+                    self.line_number_area.scroll(0, dy)
+                else:
+                    self.line_number_area.update(
+                        0, rect.y(), self.line_number_area.width(), rect.height()
+                    )
+                if rect.contains(self.viewport().rect()):
+                    self.update_line_number_area_width(0)
+
+            def resizeEvent(self, event):
+                """Resize the line number area with the editor."""
+                super().resizeEvent(event)
+                cr = self.contentsRect()
+                self.line_number_area.setGeometry(
+                    QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height())
+                )
+
+            def line_number_area_paint_event(self, event):
+                """Render line numbers for visible blocks."""
+                pal = self.palette()
+                painter = QPainter(self.line_number_area)
+                painter.fillRect(event.rect(), pal.color(QPalette.AlternateBase))
+                block = self.firstVisibleBlock()
+                block_number = block.blockNumber()
+                top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+                bottom = top + int(self.blockBoundingRect(block).height())
+                while block.isValid() and top <= event.rect().bottom():
+                    if block.isVisible() and bottom >= event.rect().top():
+                        number = str(block_number + 1)
+                        painter.setPen(pal.color(QPalette.Text))
+                        painter.drawText(0, top, self.line_number_area.width() - 4, self.fontMetrics().height(),
+                                         Qt.AlignRight, number)
+                    block = block.next()
+                    top = bottom
+                    bottom = top + int(self.blockBoundingRect(block).height())
+                    block_number += 1
+
+            def highlight_current_line(self):
+                """Highlight the current line in the editor."""
+                extra = []
+                if not self.isReadOnly():
+                    selection = QTextEdit.ExtraSelection()
+                    selection.format.setBackground(self.palette().color(QPalette.AlternateBase))
+                    selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+                    selection.cursor = self.textCursor()
+                    selection.cursor.clearSelection()
+                    extra.append(selection)
+                self.setExtraSelections(extra)
+
+        class YamlHighlighter(QSyntaxHighlighter):
+            """Syntax highlighter for YAML."""
+
+            def __init__(self, document, palette: QPalette):
+                """Initialize highlighting rules.
+
+                Parameters
+                ----------
+                    document : Document to highlight.
+                    palette : Current application palette.
+                """
+                super().__init__(document)
+                self.rules = []
+                base = palette.color(QPalette.Base)
+                text = palette.color(QPalette.Text)
+                is_dark = base.lightness() < 128
+
+                def mix(c1: QColor, c2: QColor, t: float) -> QColor:
+                    """Blend two colors by a factor.
+
+                    Parameters
+                    ----------
+                        c1 : First color.
+                        c2 : Second color.
+                        t : Blend factor from 0.0 to 1.0.
+
+                    Returns
+                    -------
+                        Blended QColor.
+                    """
+                    return QColor(
+                        int(c1.red() * (1 - t) + c2.red() * t),
+                        int(c1.green() * (1 - t) + c2.green() * t),
+                        int(c1.blue() * (1 - t) + c2.blue() * t),
+                    )
+
+                key_format = QTextCharFormat()
+                key_format.setForeground(
+                    mix(
+                        text,
+                        QColor(80, 160, 255) if is_dark else QColor(30, 110, 210),
+                        0.6,
+                    )
+                )
+                key_format.setFontWeight(QFont.Bold)
+                self.rules.append((r"^\\s*[^:#\\n]+(?=\\s*:)", key_format))
+
+                string_format = QTextCharFormat()
+                string_format.setForeground(
+                    mix(
+                        text,
+                        QColor(140, 220, 160) if is_dark else QColor(40, 140, 80),
+                        0.6,
+                    )
+                )
+                self.rules.append((r"\"[^\"\\n]*\"", string_format))
+                self.rules.append((r"'[^'\\n]*'", string_format))
+
+                number_format = QTextCharFormat()
+                number_format.setForeground(
+                    mix(
+                        text,
+                        QColor(255, 200, 120) if is_dark else QColor(180, 120, 30),
+                        0.6,
+                    )
+                )
+                self.rules.append((r"\\b\\d+\\b", number_format))
+
+                bool_format = QTextCharFormat()
+                bool_format.setForeground(
+                    mix(
+                        text,
+                        QColor(255, 150, 200) if is_dark else QColor(160, 60, 120),
+                        0.6,
+                    )
+                )
+                self.rules.append((r"\\b(true|false|null)\\b", bool_format))
+
+                comment_format = QTextCharFormat()
+                comment_format.setForeground(
+                    mix(text, QColor(140, 140, 140), 0.5)
+                )
+                self.rules.append((r"#.*$", comment_format))
+
+            def highlightBlock(self, text):
+                """Apply syntax highlighting to a block of text.
+
+                Parameters
+                ----------
+                    text : Line of text to highlight.
+                """
+                import re
+                for pattern, fmt in self.rules:
+                    for match in re.finditer(pattern, text):
+                        start = match.start()
+                        length = match.end() - match.start()
+                        self.setFormat(start, length, fmt)
+
+        editor_container = QWidget()
+        editor_layout = QVBoxLayout()
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+        editor_container.setLayout(editor_layout)
+
+        self.yaml_editor = LineNumberTextEdit()
+        mono = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        mono.setPointSize(10)
+        mono.setKerning(True)
+        mono.setStyleStrategy(QFont.PreferAntialias)
+        mono.setStyleHint(QFont.TypeWriter)
+        self.yaml_editor.setFont(mono)
+        self.yaml_editor.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.yaml_editor.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.yaml_editor.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.yaml_editor.setTabStopDistance(self.yaml_editor.fontMetrics().horizontalAdvance(" ") * 2)
+        self.yaml_highlighter = YamlHighlighter(self.yaml_editor.document(), self.app.palette())
+        editor_layout.addWidget(self.yaml_editor)
+
+        splitter = QSplitter(Qt.Horizontal)
+        splitter.addWidget(editor_container)
+        splitter.addWidget(self.view)
+        splitter.setStretchFactor(0, 1)
+        splitter.setStretchFactor(1, 2)
+        editor_container.setMinimumWidth(320)
+        self.splitter = splitter
+        main_layout.addWidget(splitter)
+
+        self.layout_items = []
+        self.previews = PreviewLoader(cache=preview_cache)
+        self.app.aboutToQuit.connect(self.previews.close)
+        # Previews are rendered off the GUI thread and handed over here.
+        self.preview_timer = QTimer()
+        self.preview_timer.timeout.connect(self.deliver_previews)
+        self.preview_timer.timeout.connect(self.finish_export)
+        self.preview_timer.start(30)
+        self.error_timer = QTimer()
+        self.error_timer.setSingleShot(True)
+        self.error_timer.timeout.connect(self.validate_yaml_text)
+
+        self.yaml_editor.textChanged.connect(self.on_yaml_text_changed)
+
+        # Load initial YAML into both the editor and the scene.
+        self.load_from_yaml_file()
+
+        self.window.show()
+        QTimer.singleShot(0, self.apply_splitter_ratio)
+        self.app.exec_()
+
+    def deliver_previews(self):
+        """Attach previews finished by the worker pool to their items."""
+        results = self.previews.drain()
+        if not results:
+            return
+        live = set(self.layout_items)
+        for owner, size, image in results:
+            if owner in live:
+                owner.set_preview(size, image)
+
+    def on_item_move(self, item: Item):
+        """Re-index a moved item and schedule the coordinate label update.
+
+        Parameters
+        ----------
+            item : The item that moved.
+        """
+        self.x_edges.move(id(item), item.x, item.w)
+        self.y_edges.move(id(item), item.y, item.h)
+        self.moved_item = item
+        if not self.frame_timer.isActive():
+            self.frame_timer.start()
+
+    def refresh_drag_feedback(self):
+        """Show the last moved item's position and the current snap guides."""
+        if self.moved_item is not None:
+            self.coord_label.setText(f"X: {self.moved_item.x}, Y: {self.moved_item.y}")
+        rect = self.scene.sceneRect()
+        vertical, horizontal = self.guides
+        edge_x, edge_y = self.snapped_to
+        if edge_x is None:
+            vertical.hide()
+        else:
+            vertical.setLine(edge_x, rect.top(), edge_x, rect.bottom())
+            vertical.show()
+        if edge_y is None:
+            horizontal.hide()
+        else:
+            horizontal.setLine(rect.left(), edge_y, rect.right(), edge_y)
+            horizontal.show()
+
+    def on_drag_end(self):
+        """Hide the alignment guides when a drag ends."""
+        self.snapped_to = (None, None)
+        for guide in self.guides:
+            guide.hide()
+
+    def index_items(self):
+        """Rebuild the snapping edge indexes from ``self.items``."""
+        self.x_edges.clear()
+        self.y_edges.clear()
+        for it in self.items:
+            self.x_edges.move(id(it), it.x, it.w)
+            self.y_edges.move(id(it), it.y, it.h)
+
+    def snap_position(self, moving: Item, x: int, y: int) -> tuple[int, int]:
+        """Snap a moving item to nearby edges.
+
+        Each axis snaps to the closest edge of another item within
+        ``snap_threshold``, found with a range query on the edge indexes.
+
+        Parameters
+        ----------
+            moving : Item being moved.
+            x : Proposed x position.
+            y : Proposed y position.
+
+        Returns
+        -------
+            Snapped (x, y) position.
+        """
+        if self.placing:
+            return x, y
+        new_x, edge_x = self.x_edges.snap(id(moving), x, moving.w, self.snap_threshold)
+        new_y, edge_y = self.y_edges.snap(id(moving), y, moving.h, self.snap_threshold)
+        self.snapped_to = (edge_x, edge_y)
+        return new_x, new_y
+
+    def on_zoom(self, zoom_value: float):
+        """Update the zoom label.
+
+        Parameters
+        ----------
+            zoom_value : Current zoom scale.
+        """
+        self.zoom_label.setText(f"Zoom: {int(zoom_value * 100)}%")
+
+    def apply_splitter_ratio(self):
+        """Set initial editor/canvas splitter ratio."""
+        # Set initial pane ratio to roughly 1/3 editor and 2/3 canvas.
+        total = max(1, self.window.width())
+        left = max(320, total // 3)
+        right = max(1, total - left)
+        self.splitter.setSizes([left, right])
+
+    def on_yaml_text_changed(self):
+        """Debounce YAML validation while typing."""
+        self.error_timer.start(300)
+
+    def validate_yaml_text(self):
+        """Validate YAML text and update status."""
+        text = self.yaml_editor.toPlainText()
+        try:
+            parse_yaml(text)
+            self.yaml_status.setText("YAML: OK")
+            self.yaml_status.setStyleSheet("color: #9ad27a;")
+            self.clear_error_highlight()
+        except Exception as exc:
+            msg = str(exc)
+            self.yaml_status.setText(f"YAML: {msg}")
+            self.yaml_status.setStyleSheet("color: #ff8c8c;")
+            self.highlight_error_line(msg)
+
+    def highlight_error_line(self, msg: str):
+        """Highlight the YAML error line if possible.
+
+        Parameters
+        ----------
+            msg : Exception message from PyYAML.
+        """
+        # Best-effort parse of line number from PyYAML error message.
+        import re
+        from PyQt5.QtGui import QTextCursor, QColor
+        from PyQt5.QtWidgets import QTextEdit
+        match = re.search(r"line\\s+(\\d+)", msg)
+        if not match:
+            self.clear_error_highlight()
+            return
+        line_no = int(match.group(1))
+        cursor = self.yaml_editor.textCursor()
+        cursor.movePosition(QTextCursor.Start)
+        for _ in range(line_no - 1):
+            cursor.movePosition(QTextCursor.Down)
+        cursor.select(QTextCursor.LineUnderCursor)
+        extra = QTextEdit.ExtraSelection()
+        extra.cursor = cursor
+        extra.format.setBackground(QColor(90, 40, 40))
+        extras = self.yaml_editor.extraSelections()
+        # Preserve current-line highlight at index 0 if present.
+        if extras:
+            extras = extras[:1]
+        else:
+            extras = []
+        extras.append(extra)
+        self.yaml_editor.setExtraSelections(extras)
+
+    def clear_error_highlight(self):
+        """Clear error highlighting while preserving current-line highlight."""
+        extras = self.yaml_editor.extraSelections()
+        if extras:
+            self.yaml_editor.setExtraSelections(extras[:1])
+
+    def load_from_yaml_file(self):
+        """Load YAML from disk into the editor and scene."""
+        self.data = load_yaml(self.config_path)
+        self.output = self.data.get("output", "wallpaper.png")
+        self.yaml_editor.blockSignals(True)
+        self.yaml_editor.setPlainText(self.config_path.read_text(encoding="utf-8"))
+        self.yaml_editor.blockSignals(False)
+        self.validate_yaml_text()
+        self.apply_yaml_data(self.data)
+
+    def apply_yaml_data(self, data: dict):
+        """Apply parsed YAML data to the scene and internal state.
+
+        Scene items whose file and resolution are unchanged are kept, with
+        their previews, and only moved (see ``match_items``).
+
+        Parameters
+        ----------
+            data : Parsed YAML data.
+        """
+        items_data = data.get("items")
+        if not isinstance(items_data, list) or not items_data:
+            raise SystemExit("Config must include non-empty 'items' list.")
+
+        self.items = parse_items(items_data)
+
+        canvas_w = data.get("canvas_width")
+        canvas_h = data.get("canvas_height")
+        if canvas_w is None or canvas_h is None:
+            max_right = max(i.x + i.w for i in self.items)
+            max_bottom = max(i.y + i.h for i in self.items)
+            canvas_w = max_right
+            canvas_h = max_bottom
+        self.canvas_w = int(canvas_w)
+        self.canvas_h = int(canvas_h)
+
+        old_items = self.layout_items
+        matches = match_items([li.item for li in old_items], self.items)
+        self.layout_items = []
+        self.placing = True
+        try:
+            for idx, (it, match) in enumerate(zip(self.items, matches), start=1):
+                if match is None:
+                    li = LayoutItem(
+                        it, idx, self.on_item_move, self.snap_position, self.previews,
+                        on_release=self.on_drag_end,
+                    )
+                    self.scene.addItem(li.graphics_item)
+                else:
+                    li = old_items[match]
+                    li.rebind(it, idx)
+                # Later items are drawn on top, as in the composed image.
+                li.graphics_item.setZValue(idx)
+                self.layout_items.append(li)
+        finally:
+            self.placing = False
+        self.index_items()
+        kept = {match for match in matches if match is not None}
+        for idx, li in enumerate(old_items):
+            if idx not in kept:
+                li.cancel_preview()
+                self.scene.removeItem(li.graphics_item)
+        self.scene.setSceneRect(0, 0, self.canvas_w, self.canvas_h)
+        self.view.centerOn(self.canvas_w / 2, self.canvas_h / 2)
+
+    def on_save(self):
+        """Save YAML edits and normalize layout coordinates."""
+        text = self.yaml_editor.toPlainText()
+        try:
+            data = parse_yaml(text)
+            if not isinstance(data, dict):
+                raise ValueError("Config root must be a mapping/object.")
+        except Exception as exc:
+            self.yaml_status.setText(f"YAML: {exc}")
+            self.yaml_status.setStyleSheet("color: #ff8c8c;")
+            self.highlight_error_line(str(exc))
+            return
+
+        # Save text first, then apply to the scene.
+        self.config_path.write_text(text, encoding="utf-8")
+        self.apply_yaml_data(data)
+
+        # Normalize to top-left origin and save with tight canvas bounds.
+        min_x = min(it.x for it in self.items)
+        min_y = min(it.y for it in self.items)
+        max_right = max(it.x + it.w for it in self.items)
+        max_bottom = max(it.y + it.h for it in self.items)
+
+        shift_x = -min_x
+        shift_y = -min_y
+
+        items_out = []
+        for it in self.items:
+            items_out.append({
+                "file": it.file,
+                "x": it.x + shift_x,
+                "y": it.y + shift_y,
+                "resolution": it.resolution,
+            })
+
+        data_out = {
+            "output": self.output,
+            "canvas_width": max_right - min_x,
+            "canvas_height": max_bottom - min_y,
+            "items": items_out,
+        }
+        save_yaml(self.config_path, data_out)
+
+        # Recenter the view by normalizing in-memory positions and scene bounds.
+        self.canvas_w = data_out["canvas_width"]
+        self.canvas_h = data_out["canvas_height"]
+        self.placing = True
+        try:
+            for li in self.layout_items:
+                li.item.x += shift_x
+                li.item.y += shift_y
+                li.graphics_item.setPos(li.item.x, li.item.y)
+        finally:
+            self.placing = False
+        self.index_items()
+        self.scene.setSceneRect(0, 0, self.canvas_w, self.canvas_h)
+        self.view.centerOn(self.canvas_w / 2, self.canvas_h / 2)
+        self.yaml_editor.blockSignals(True)
+        self.yaml_editor.setPlainText(self.config_path.read_text(encoding="utf-8"))
+        self.yaml_editor.blockSignals(False)
+        self.validate_yaml_text()
+
+    def on_apply_yaml(self):
+        """Apply YAML edits without saving."""
+        text = self.yaml_editor.toPlainText()
+        try:
+            data = parse_yaml(text)
+            if not isinstance(data, dict):
+                raise ValueError("Config root must be a mapping/object.")
+        except Exception as exc:
+            self.yaml_status.setText(f"YAML: {exc}")
+            self.yaml_status.setStyleSheet("color: #ff8c8c;")
+            self.highlight_error_line(str(exc))
+            return
+        self.apply_yaml_data(data)
+
+    def on_export_png(self):
+        """Export the layout as placed in the scene as a PNG image.
+
+        Items are taken from the scene, so drags count before Apply or
+        Save; YAML text that has not been applied does not. The image is
+        composed from the source files rather than rendered from the
+        previews, so it does not depend on which previews have loaded.
+        The compose runs on the preview workers; the button stays disabled
+        until ``finish_export`` sees it done.
+        """
+        from PyQt5.QtWidgets import QFileDialog
+
+        path, _ = QFileDialog.getSaveFileName(
+            self.window,
+            "Export Wallpaper PNG",
+            self.output,
+            "PNG Images (*.png)"
+        )
+        if not path:
+            return
+
+        layout = Layout(
+            items=[replace(li.item) for li in self.layout_items],
+            canvas_size=(self.canvas_w, self.canvas_h),
+            output=path,
+        )
+
+        def export() -> None:
+            encode_image(compose_image(layout, mode="RGBA"), path)
+
+        self.export_job = (path, self.previews.submit(export))
+        self.export_btn.setEnabled(False)
+        self.yaml_status.setText(f"Exporting {path}...")
+        self.yaml_status.setStyleSheet("")
+
+    def finish_export(self):
+        """Report a finished export and re-enable the export button."""
+        if self.export_job is None or not self.export_job[1].done():
+            return
+        path, job = self.export_job
+        self.export_job = None
+        self.export_btn.setEnabled(True)
+        try:
+            job.result()
+        except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+            self.yaml_status.setText(f"Export failed: {exc}")
+            self.yaml_status.setStyleSheet("color: #ff8c8c;")
+        else:
+            self.yaml_status.setText(f"Exported {path}")
+            self.yaml_status.setStyleSheet("color: #9ad27a;")
+
+
+def run_gui(config_path: Path, preview_cache: PreviewCache | None = None) -> None:
+    """Launch the PyQt GUI editor.
+
+    Parameters
+    ----------
+        config_path : Path to YAML layout file.
+        preview_cache : Optional on-disk cache of rendered previews.
+    """
+    LayoutEditor(config_path, preview_cache)
+
+
+def add_tile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add resample and tile cache options to a subcommand parser.
+
+    Parameters
+    ----------
+        parser : Subcommand parser to extend.
+    """
+    parser.add_argument(
+        "--resample-strategy",
+        choices=RESAMPLE_STRATEGIES,
+        default="exact",
+        help="exact: full decode + LANCZOS; balanced/fast: JPEG draft + reduce() before LANCZOS"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Tile cache directory (default: $LYCO_CACHE_DIR or the XDG cache dir)"
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Tile cache size cap in MiB; least recently used tiles are evicted"
+    )
+
+
+def add_encode_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add output encoder options to a subcommand parser.
+
+    Parameters
+    ----------
+        parser : Subcommand parser to extend.
+    """
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help="Output format (default: inferred from the output extension)"
+    )
+    parser.add_argument(
+        "--encode",
+        choices=ENCODE_PRESETS,
+        default=None,
+        help="Encoder preset trading speed for size (explicit levels win)"
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        help="PNG zlib level 0-9"
+    )
+    parser.add_argument(
+        "--effort",
+        type=int,
+        default=None,
+        help="Lossless WebP effort 0-6"
+    )
+    parser.add_argument(
+        "--png-filter",
+        choices=(*PNG_FILTERS, "adaptive"),
+        default=None,
+        help="PNG scanline filter (default: Pillow's adaptive filtering)"
+    )
+    parser.add_argument(
+        "--encode-jobs",
+        type=int,
+        default=None,
+        help="Deflate PNG output on N threads (pigz-style; full-canvas compose only)"
+    )
+    parser.add_argument(
+        "--tiff-compression",
+        choices=TIFF_COMPRESSIONS,
+        default=None,
+        help="TIFF compression (default: raw)"
+    )
+
+
+def encode_from_args(args: argparse.Namespace) -> EncodeOptions:
+    """Build encoder options from parsed CLI options.
+
+    Parameters
+    ----------
+        args : Parsed arguments including the encoder options.
+
+    Returns
+    -------
+        Unresolved encoder options.
+    """
+    return EncodeOptions(
+        format=args.format,
+        preset=args.encode,
+        compress_level=args.compress_level,
+        effort=args.effort,
+        png_filter=args.png_filter,
+        tiff_compression=args.tiff_compression,
+        jobs=args.encode_jobs,
+    )
+
+
+def cache_from_args(args: argparse.Namespace) -> TileCache:
+    """Build a tile cache from parsed CLI options.
+
+    Parameters
+    ----------
+        args : Parsed arguments including the cache options.
+
+    Returns
+    -------
+        Configured tile cache.
+    """
+    root = Path(args.cache_dir) if args.cache_dir else None
+    return TileCache(root, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+
+def compose_options_from_args(args: argparse.Namespace) -> ComposeOptions:
+    """Build compose options from parsed CLI options.
+
+    Parameters
+    ----------
+        args : Parsed arguments including the tile and cache options.
+
+    Returns
+    -------
+        Compose options with the worker, cache and resample settings.
+    """
+    return ComposeOptions(
+        jobs=args.jobs,
+        executor=args.executor,
+        cache=None if args.no_cache else cache_from_args(args),
+        strategy=args.resample_strategy,
+    )
+
+
+def layout_cache_from_args(args: argparse.Namespace) -> LayoutCache | None:
+    """Build the parsed-layout cache from parsed CLI options.
+
+    Layouts are cached in ``layouts/`` under the tile cache directory, and
+    ``--no-cache`` disables both caches.
+
+    Parameters
+    ----------
+        args : Parsed arguments including the cache options.
+
+    Returns
+    -------
+        Layout cache, or None when caching is disabled.
+    """
+    if getattr(args, "no_cache", False):
+        return None
+    return LayoutCache(Path(args.cache_dir) / "layouts" if args.cache_dir else None)
+
+
+def preview_cache_from_args(args: argparse.Namespace) -> PreviewCache | None:
+    """Build the GUI preview cache from parsed CLI options.
+
+    Previews are cached in ``previews/`` under the tile cache directory.
+
+    Parameters
+    ----------
+        args : Parsed arguments including the cache options.
+
+    Returns
+    -------
+        Preview cache, or None when caching is disabled.
+    """
+    if getattr(args, "no_cache", False):
+        return None
+    max_mb = getattr(args, "preview_cache_mb", DEFAULT_PREVIEW_MAX_BYTES // (1024 * 1024))
+    root = Path(args.cache_dir) / "previews" if args.cache_dir else None
+    return PreviewCache(root, max_bytes=max_mb * 1024 * 1024)
+
+
+def run_cache_command(args: argparse.Namespace) -> None:
+    """Run a ``lyco cache`` action (stats, clear, warm).
+
+    Parameters
+    ----------
+        args : Parsed arguments for the cache subcommand.
+
+    Raises
+    ------
+        SystemExit
+            If ``warm`` is requested without a config or the config is invalid.
+    """
+    cache = cache_from_args(args)
+    if args.action == "clear":
+        removed = cache.clear()
+        layouts = layout_cache_from_args(args).clear()
+        previews = preview_cache_from_args(args).clear()
+        print(
+            f"Removed {removed} cached tiles, {layouts} cached layouts and {previews} cached "
+            f"previews from {cache.root}"
+        )
+        return
+    if args.action == "warm":
+        if not args.config:
+            raise SystemExit("cache warm requires -c/--config")
+        layout = load_layout(Path(args.config), cache=layout_cache_from_args(args))
+        # Same culling as compose, so hidden items are not warmed.
+        load_tiles(
+            cull_hidden(layout.items, layout.canvas_size),
+            jobs=args.jobs,
+            cache=cache,
+            strategy=args.resample_strategy,
+        )
+        print(f"Warmed {cache.misses} tiles ({cache.hits} already cached)")
+    stats = cache.stats()
+    print(f"Cache dir: {stats['root']}")
+    print(f"Entries: {stats['entries']}")
+    print(f"Size: {stats['bytes'] / (1024 * 1024):.1f} MiB of {stats['max_bytes'] // (1024 * 1024)} MiB")
+
+
+def run_compose_command(args: argparse.Namespace) -> None:
+    """Run ``lyco compose``, under cProfile when ``--cprofile`` is given.
+
+    Parameters
+    ----------
+        args : Parsed arguments for the compose subcommand.
+    """
+    run = partial(
+        compose_from_yaml,
+        Path(args.config),
+        args.output,
+        compose_options_from_args(args),
+        band_height=args.band_height,
+        max_memory=args.max_memory,
+        incremental=args.incremental,
+        encode=encode_from_args(args),
+        profile=args.profile,
+        layout_cache=layout_cache_from_args(args),
+    )
+    if args.cprofile:
+        import cProfile  # pylint: disable=import-outside-toplevel
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run)
+        finally:
+            profiler.dump_stats(args.cprofile)
+        print(f"cProfile: {args.cprofile}")
+    else:
+        run()
+
+
+def run_batch_command(args: argparse.Namespace) -> None:
+    """Run ``lyco compose-batch``.
+
+    Parameters
+    ----------
+        args : Parsed arguments for the compose-batch subcommand.
+
+    Raises
+    ------
+        SystemExit
+            If no layouts are found or any layout fails.
+    """
+    options = compose_options_from_args(args)
+    results = compose_batch(
+        find_layouts(args.sources),
+        output_dir=Path(args.output_dir) if args.output_dir else None,
+        jobs=options.jobs,
+        executor=options.executor,
+        cache=options.cache,
+        strategy=options.strategy,
+        encode=encode_from_args(args),
+        layout_cache=layout_cache_from_args(args),
+    )
+    if args.summary:
+        Path(args.summary).write_text(
+            json.dumps([asdict(result) for result in results], indent=2), encoding="utf-8"
+        )
+    failed = sum(not result.ok for result in results)
+    if failed:
+        raise SystemExit(f"{failed} of {len(results)} layouts failed")
+
+
+def run_validate_command(args: argparse.Namespace) -> None:
+    """Run ``lyco validate``.
+
+    Parameters
+    ----------
+        args : Parsed arguments for the validate subcommand.
+
+    Raises
+    ------
+        SystemExit
+            If no layouts are found, or any layout has errors (or warnings
+            with ``--strict``).
+    """
+    reports = validate_layouts(
+        find_layouts(args.sources),
+        jobs=args.jobs,
+        strategy=args.resample_strategy,
+        layout_cache=layout_cache_from_args(args),
+    )
+    for report in reports:
+        print(report.summary())
+        for issue in report.issues:
+            print(f"  {issue}")
+    if args.summary:
+        Path(args.summary).write_text(
+            json.dumps([dict(asdict(report), ok=report.ok) for report in reports], indent=2),
+            encoding="utf-8",
+        )
+    failed = sum(not report.ok or (args.strict and bool(report.warnings)) for report in reports)
+    print(f"Validated {len(reports)} layout(s): {failed} failed")
+    if failed:
+        raise SystemExit(f"{failed} of {len(reports)} layouts failed validation")
+
+
+def run_serve_command(args: argparse.Namespace) -> None:
+    """Run ``lyco serve`` until interrupted.
+
+    Parameters
+    ----------
+        args : Parsed arguments for the serve subcommand.
+    """
+    from .serve import ComposeService, run_server  # pylint: disable=import-outside-toplevel
+
+    options = compose_options_from_args(args)
+    service = ComposeService(
+        jobs=options.jobs,
+        executor=options.executor,
+        cache=options.cache,
+        strategy=options.strategy,
+        encode=encode_from_args(args),
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        memo_bytes=args.memo_mb * 1024 * 1024,
+        output_dir=args.output_dir,
+    )
+    run_server(service, host=args.host, port=args.port, socket_path=args.socket)
+
+
+def run_watch_command(args: argparse.Namespace) -> None:
+    """Run ``lyco watch`` until interrupted.
+
+    Parameters
+    ----------
+        args : Parsed arguments for the watch subcommand.
+    """
+    try:
+        watch_layout(
+            Path(args.config),
+            args.output,
+            compose_options_from_args(args),
+            encode=encode_from_args(args),
+            debounce=args.debounce,
+            poll=args.poll,
+        )
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser.
+
+    Returns
+    -------
+        Configured argument parser.
+    """
     parser = argparse.ArgumentParser(
         description="Lyco Python Framework (Hello-world: image mosaic from YAML)."
     )
-    sub = parser.add_subparsers(dest="command", required=True)
-
-    gui = sub.add_parser("gui", help="Open the GUI layout editor")
-    gui.add_argument("-c", "--config", required=True, help="Path to YAML config")
-
-    compose = sub.add_parser("compose", help="Compose a wallpaper from YAML")
-    compose.add_argument("-c", "--config", required=True, help="Path to YAML config")
-    compose.add_argument(
-        "-o", "--output",
-        default=None,
-        help="Output PNG path (overrides config output if set)"
-    )
-
-    return parser
-
-
-def main() -> None:
-    """Entry point for the CLI."""
-    parser = build_arg_parser()
-    args = parser.parse_args()
-
-    if args.command == "gui":
-        run_gui(Path(args.config))
-        return
-
-    if args.command == "compose":
-        compose_from_yaml(Path(args.config), args.output)
-        return
-
-
-if __name__ == "__main__":
-    main()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gui = sub.add_parser("gui", help="Open the GUI layout editor")
+    gui.add_argument("-c", "--config", required=True, help="Path to YAML config")
+    gui.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache directory; previews go in its previews/ (default: $LYCO_CACHE_DIR or XDG)"
+    )
+    gui.add_argument(
+        "--preview-cache-mb",
+        type=int,
+        default=DEFAULT_PREVIEW_MAX_BYTES // (1024 * 1024),
+        help="Preview cache size cap in MiB; least recently used previews are evicted"
+    )
+    gui.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent preview cache"
+    )
+
+    compose = sub.add_parser("compose", help="Compose a wallpaper from YAML")
+    compose.add_argument("-c", "--config", required=True, help="Path to YAML config")
+    compose.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Output PNG path (overrides config output if set)"
+    )
+    compose.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Parallel decode/resize workers (default: CPU count)"
+    )
+    compose.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="Worker pool type for --jobs (default: thread)"
+    )
+    compose.add_argument(
+        "--band-height",
+        type=int,
+        default=None,
+        help="Stream the canvas to a PNG/TIFF in strips of this many rows (bounds peak memory)"
+    )
+    compose.add_argument(
+        "--max-memory",
+        type=parse_memory_size,
+        default=None,
+        help="Memory budget such as 512M or 2G; compose adapts workers/strategy to fit"
+    )
+    compose.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-render only regions changed since the last run (keeps OUTPUT.lyco.json)"
+    )
+    compose.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="REPORT",
+        help="Write a JSON timing report (default OUTPUT.profile.json; '-' for stdout)"
+    )
+    compose.add_argument(
+        "--cprofile",
+        default=None,
+        metavar="OUT.prof",
+        help="Dump a cProfile profile of the compose run (view with snakeviz or pstats)"
+    )
+    add_encode_arguments(compose)
+    compose.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent tile cache"
+    )
+    add_tile_arguments(compose)
+
+    batch = sub.add_parser(
+        "compose-batch",
+        help="Compose many layouts on one shared worker pool and tile set"
+    )
+    batch.add_argument(
+        "sources",
+        nargs="+",
+        help="Layout files, directories, glob patterns, or manifests listing one layout per line"
+    )
+    batch.add_argument(
+        "--output-dir",
+        default=None,
+        help="Write outputs here as LAYOUT_STEM.EXT instead of each layout's output path"
+    )
+    batch.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Shared decode/resize and encode workers (default: CPU count)"
+    )
+    batch.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="Decode pool type (default: thread)"
+    )
+    batch.add_argument(
+        "--summary",
+        default=None,
+        help="Write per-layout status and timings to this JSON file"
+    )
+    add_encode_arguments(batch)
+    batch.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent tile cache"
+    )
+    add_tile_arguments(batch)
+
+    validate = sub.add_parser(
+        "validate",
+        help="Check layouts from image headers only (no decoding) and estimate their cost"
+    )
+    validate.add_argument(
+        "sources",
+        nargs="+",
+        help="Layout files, directories, glob patterns, or manifests listing one layout per line"
+    )
+    validate.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Compose workers assumed by the memory and time estimates (default: CPU count)"
+    )
+    validate.add_argument(
+        "--resample-strategy",
+        choices=RESAMPLE_STRATEGIES,
+        default="exact",
+        help="Resample strategy assumed by the memory estimate"
+    )
+    validate.add_argument(
+        "--strict",
+        action="store_true",
+        help="Fail on warnings (upscales, off-canvas or overlapping items) as well as errors"
+    )
+    validate.add_argument(
+        "--summary",
+        default=None,
+        help="Write per-layout issues and estimates to this JSON file"
+    )
+    validate.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache directory; parsed layouts are kept in its layouts/ subdirectory"
+    )
+    validate.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the parsed-layout cache"
+    )
+
+    watch = sub.add_parser("watch", help="Recompose whenever the layout or its images change")
+    watch.add_argument("-c", "--config", required=True, help="Path to YAML config")
+    watch.add_argument(
+        "-o", "--output",
+        default=None,
+        help="Output path (overrides config output if set)"
+    )
+    watch.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Parallel decode/resize workers (default: CPU count)"
+    )
+    watch.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="Worker pool type for --jobs (default: thread)"
+    )
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=0.3,
+        help="Seconds without further changes before recomposing (default: 0.3)"
+    )
+    watch.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll file stats instead of using inotify (needed on network volumes)"
+    )
+    add_encode_arguments(watch)
+    watch.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent tile cache"
+    )
+    add_tile_arguments(watch)
+
+    serve = sub.add_parser("serve", help="Run a local compose service with warm caches")
+    serve.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="TCP host to bind (default: 127.0.0.1; the service has no authentication)"
+    )
+    serve.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    serve.add_argument(
+        "--socket",
+        default=None,
+        help="Listen on this Unix socket path instead of TCP"
+    )
+    serve.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Decode/resize workers shared by all requests (default: CPU count)"
+    )
+    serve.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="Worker pool type for --jobs (default: thread)"
+    )
+    serve.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Requests composed at once (default: --jobs)"
+    )
+    serve.add_argument(
+        "--max-queue",
+        type=int,
+        default=16,
+        help="Requests allowed to wait for a slot; more are rejected with 503 (default: 16)"
+    )
+    serve.add_argument(
+        "--memo-mb",
+        type=int,
+        default=512,
+        help="Decoded tiles kept in memory across requests, in MiB (default: 512)"
+    )
+    serve.add_argument(
+        "--output-dir",
+        default=None,
+        help="Allow ?output=PATH writes, confined to this directory (default: refused)"
+    )
+    add_encode_arguments(serve)
+    serve.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the persistent tile cache"
+    )
+    add_tile_arguments(serve)
+
+    cache = sub.add_parser("cache", help="Inspect or manage the tile cache")
+    cache.add_argument("action", choices=("stats", "clear", "warm"))
+    cache.add_argument("-c", "--config", default=None, help="Path to YAML config (for warm)")
+    cache.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Parallel decode/resize workers for warm (default: CPU count)"
+    )
+    add_tile_arguments(cache)
+
+    return parser
+
+
+def main() -> None:
+    """Entry point for the CLI."""
+    parser = build_arg_parser()
+    args = parser.parse_args()
+
+    if args.command == "gui":
+        run_gui(Path(args.config), preview_cache_from_args(args))
+    elif args.command == "compose":
+        run_compose_command(args)
+    elif args.command == "compose-batch":
+        run_batch_command(args)
+    elif args.command == "validate":
+        run_validate_command(args)
+    elif args.command == "serve":
+        run_serve_command(args)
+    elif args.command == "watch":
+        run_watch_command(args)
+    elif args.command == "cache":
+        run_cache_command(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,690 @@
+"""Output encoders and incremental writers for composed canvases."""
+
+from __future__ import annotations
+
+import io
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from PIL import Image, ImageChops
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_FILTERS = {"none": 0, "sub": 1, "up": 2}
+PNG_COLOR_TYPES = {"RGB": 2, "RGBA": 6}
+IDAT_CHUNK_SIZE = 256 * 1024
+
+OUTPUT_FORMATS = ("png", "webp", "tiff", "raw")
+FORMAT_SUFFIXES = {
+    ".png": "png",
+    ".webp": "webp",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+    ".raw": "raw",
+    ".rgba": "raw",
+}
+ENCODE_PRESETS = ("fast", "small")
+TIFF_COMPRESSIONS = ("raw", "lzw")
+# Per-format settings for each preset: zlib level / WebP effort / TIFF compression.
+PRESET_SETTINGS = {
+    "fast": {
+        "png": {"compress_level": 1, "png_filter": "up"},
+        "webp": {"effort": 0},
+        "tiff": {"compression": "raw"},
+    },
+    "small": {"png": {"compress_level": 9}, "webp": {"effort": 6}, "tiff": {"compression": "lzw"}},
+}
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    """Build a PNG chunk with length and CRC."""
+    crc = zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def filter_scanlines(image: Image.Image, prev_row: bytes | None, method: str) -> bytes:
+    """Return PNG-filtered scanlines (filter byte + row bytes) for a strip.
+
+    Sub and Up are bytewise differences against the pixel to the left or the
+    row above, so they are computed with ``ImageChops.subtract_modulo`` on
+    shifted copies instead of per-byte Python loops.
+
+    Parameters
+    ----------
+        image : Strip of full-width rows (RGB or RGBA).
+        prev_row : Raw bytes of the row above the strip, or None at the top.
+        method : One of ``PNG_FILTERS``.
+
+    Returns
+    -------
+        Filtered scanline bytes ready for deflate.
+    """
+    width, height = image.size
+    if method == "none" or width == 0 or height == 0:
+        filtered = image
+    elif method == "sub":
+        shifted = Image.new(image.mode, image.size)
+        shifted.paste(image.crop((0, 0, width - 1, height)), (1, 0))
+        filtered = ImageChops.subtract_modulo(image, shifted)
+    else:
+        shifted = Image.new(image.mode, image.size)
+        if prev_row is not None:
+            shifted.paste(Image.frombytes(image.mode, (width, 1), prev_row), (0, 0))
+        shifted.paste(image.crop((0, 0, width, height - 1)), (0, 1))
+        filtered = ImageChops.subtract_modulo(image, shifted)
+
+    raw = filtered.tobytes()
+    stride = width * len(image.mode)
+    tag = bytes([PNG_FILTERS[method]])
+    return b"".join(
+        tag + raw[offset:offset + stride] for offset in range(0, len(raw), stride)
+    )
+
+
+class PngStreamWriter:
+    """Write a PNG strip by strip without holding the full image."""
+
+    def __init__(
+        self,
+        fp: BinaryIO,
+        size: tuple[int, int],
+        mode: str = "RGBA",
+        compress_level: int = 6,
+        filter_method: str = "up",
+    ):
+        """Start a PNG stream and write its header.
+
+        Parameters
+        ----------
+            fp : Writable binary file object.
+            size : Full image (width, height).
+            mode : ``"RGB"`` or ``"RGBA"``.
+            compress_level : zlib level 0-9.
+            filter_method : Scanline filter, one of ``PNG_FILTERS``.
+
+        Raises
+        ------
+            ValueError
+                If the mode or filter is unsupported.
+        """
+        if mode not in PNG_COLOR_TYPES:
+            raise ValueError(f"Unsupported PNG stream mode: {mode}")
+        if filter_method not in PNG_FILTERS:
+            raise ValueError(f"Unsupported PNG filter: {filter_method}")
+        self.fp = fp
+        self.size = size
+        self.mode = mode
+        self.filter_method = filter_method
+        self.rows_written = 0
+        self.bytes_written = 0
+        self._prev_row: bytes | None = None
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        ihdr = struct.pack(">IIBBBBB", size[0], size[1], 8, PNG_COLOR_TYPES[mode], 0, 0, 0)
+        self._emit(PNG_SIGNATURE + _png_chunk(b"IHDR", ihdr))
+
+    def _emit(self, data: bytes) -> None:
+        self.fp.write(data)
+        self.bytes_written += len(data)
+
+    def _flush_idat(self, final: bool = False) -> None:
+        while len(self._pending) >= IDAT_CHUNK_SIZE or (final and self._pending):
+            chunk = bytes(self._pending[:IDAT_CHUNK_SIZE])
+            del self._pending[:IDAT_CHUNK_SIZE]
+            self._emit(_png_chunk(b"IDAT", chunk))
+
+    def write(self, strip: Image.Image) -> None:
+        """Append a strip of full-width rows.
+
+        Parameters
+        ----------
+            strip : Image with the stream's width and mode.
+
+        Raises
+        ------
+            ValueError
+                If the strip does not fit the stream.
+        """
+        if strip.mode != self.mode or strip.width != self.size[0]:
+            raise ValueError("Strip must match the stream width and mode")
+        if self.rows_written + strip.height > self.size[1]:
+            raise ValueError("Strip exceeds the declared image height")
+        self._pending += self._compressor.compress(
+            filter_scanlines(strip, self._prev_row, self.filter_method)
+        )
+        self._flush_idat()
+        self._prev_row = strip.crop((0, strip.height - 1, strip.width, strip.height)).tobytes()
+        self.rows_written += strip.height
+
+    def close(self) -> None:
+        """Finish the deflate stream and write IEND.
+
+        Raises
+        ------
+            ValueError
+                If fewer rows than declared were written.
+        """
+        if self.rows_written != self.size[1]:
+            raise ValueError(
+                f"PNG stream expected {self.size[1]} rows, got {self.rows_written}"
+            )
+        self._pending += self._compressor.flush()
+        self._flush_idat(final=True)
+        self._emit(_png_chunk(b"IEND", b""))
+
+
+class TiffStreamWriter:
+    """Write an uncompressed, strip-organized TIFF strip by strip.
+
+    Each ``write`` call becomes one TIFF strip; the IFD is written after the
+    pixel data and linked from the header on ``close``. Classic (32-bit
+    offset) TIFF, so outputs are limited to 4 GiB.
+    """
+
+    def __init__(self, fp: BinaryIO, size: tuple[int, int], mode: str = "RGBA"):
+        """Start a TIFF stream and write a header placeholder.
+
+        Parameters
+        ----------
+            fp : Writable, seekable binary file object.
+            size : Full image (width, height).
+            mode : ``"RGB"`` or ``"RGBA"``.
+
+        Raises
+        ------
+            ValueError
+                If the mode is unsupported.
+        """
+        if mode not in ("RGB", "RGBA"):
+            raise ValueError(f"Unsupported TIFF stream mode: {mode}")
+        self.fp = fp
+        self.size = size
+        self.mode = mode
+        self.rows_written = 0
+        self.bytes_written = 0
+        self._strips: list[tuple[int, int]] = []
+        self._rows_per_strip: int | None = None
+        self._last_strip_short = False
+        self._start = fp.tell()
+        self._emit(b"II*\x00" + struct.pack("<I", 0))
+
+    def _emit(self, data: bytes) -> None:
+        self.fp.write(data)
+        self.bytes_written += len(data)
+
+    def write(self, strip: Image.Image) -> None:
+        """Append a strip of full-width rows.
+
+        All strips except the last must have the same height.
+
+        Parameters
+        ----------
+            strip : Image with the stream's width and mode.
+
+        Raises
+        ------
+            ValueError
+                If the strip does not fit the stream.
+        """
+        if strip.mode != self.mode or strip.width != self.size[0]:
+            raise ValueError("Strip must match the stream width and mode")
+        if self.rows_written + strip.height > self.size[1]:
+            raise ValueError("Strip exceeds the declared image height")
+        if self._rows_per_strip is None:
+            self._rows_per_strip = strip.height
+        elif self._last_strip_short or strip.height > self._rows_per_strip:
+            raise ValueError("Only the final TIFF strip may differ in height")
+        self._last_strip_short = strip.height < self._rows_per_strip
+        data = strip.tobytes()
+        self._strips.append((self.fp.tell() - self._start, len(data)))
+        self._emit(data)
+        self.rows_written += strip.height
+
+    def close(self) -> None:
+        """Write the IFD and patch the header to point at it.
+
+        Raises
+        ------
+            ValueError
+                If fewer rows than declared were written.
+        """
+        if self.rows_written != self.size[1]:
+            raise ValueError(
+                f"TIFF stream expected {self.size[1]} rows, got {self.rows_written}"
+            )
+        if (self.fp.tell() - self._start) % 2:
+            self._emit(b"\x00")
+        samples = len(self.mode)
+        count = len(self._strips)
+        tags = [
+            (256, 4, 1, self.size[0]),
+            (257, 4, 1, self.size[1]),
+            (258, 3, samples, [8] * samples),
+            (259, 3, 1, 1),
+            (262, 3, 1, 2),
+            (273, 4, count, [offset for offset, _length in self._strips]),
+            (277, 3, 1, samples),
+            (278, 4, 1, self._rows_per_strip or self.size[1]),
+            (279, 4, count, [length for _offset, length in self._strips]),
+            (284, 3, 1, 1),
+        ]
+        if self.mode == "RGBA":
+            tags.append((338, 3, 1, 2))
+
+        ifd_offset = self.fp.tell() - self._start
+        extra_offset = ifd_offset + 2 + 12 * len(tags) + 4
+        entries = []
+        extra = bytearray()
+        for tag, typ, n, value in tags:
+            fmt = "<H" if typ == 3 else "<I"
+            values = value if isinstance(value, list) else [value]
+            packed = b"".join(struct.pack(fmt, v) for v in values)
+            if len(packed) <= 4:
+                field = packed.ljust(4, b"\x00")
+            else:
+                field = struct.pack("<I", extra_offset + len(extra))
+                extra += packed
+                if len(extra) % 2:
+                    extra += b"\x00"
+            entries.append(struct.pack("<HHI", tag, typ, n) + field)
+
+        self._emit(struct.pack("<H", len(tags)) + b"".join(entries) + b"\x00" * 4 + bytes(extra))
+        end = self.fp.tell()
+        self.fp.seek(self._start + 4)
+        self.fp.write(struct.pack("<I", ifd_offset))
+        self.fp.seek(end)
+
+
+class RawStreamWriter:
+    """Write headerless pixel rows (e.g. raw RGBA) strip by strip."""
+
+    def __init__(self, fp: BinaryIO, size: tuple[int, int], mode: str = "RGBA"):
+        """Start a raw pixel stream.
+
+        Parameters
+        ----------
+            fp : Writable binary file object.
+            size : Full image (width, height).
+            mode : Pixel mode of the rows.
+        """
+        self.fp = fp
+        self.size = size
+        self.mode = mode
+        self.rows_written = 0
+        self.bytes_written = 0
+
+    def write(self, strip: Image.Image) -> None:
+        """Append a strip of full-width rows.
+
+        Parameters
+        ----------
+            strip : Image with the stream's width and mode.
+
+        Raises
+        ------
+            ValueError
+                If the strip does not fit the stream.
+        """
+        if strip.mode != self.mode or strip.width != self.size[0]:
+            raise ValueError("Strip must match the stream width and mode")
+        data = strip.tobytes()
+        self.fp.write(data)
+        self.bytes_written += len(data)
+        self.rows_written += strip.height
+
+    def close(self) -> None:
+        """Check that every declared row was written.
+
+        Raises
+        ------
+            ValueError
+                If fewer rows than declared were written.
+        """
+        if self.rows_written != self.size[1]:
+            raise ValueError(
+                f"Raw stream expected {self.size[1]} rows, got {self.rows_written}"
+            )
+
+
+@dataclass
+class EncodeOptions:
+    """Output encoder selection and tuning for compose."""
+    format: str | None = None
+    preset: str | None = None
+    compress_level: int | None = None
+    effort: int | None = None
+    png_filter: str | None = None
+    tiff_compression: str | None = None
+    jobs: int | None = None
+
+    def resolve(self, output_path: str | Path | None = None) -> "EncodeOptions":
+        """Return options with the format inferred and preset values filled in.
+
+        Explicit options win over the preset. Unknown suffixes leave
+        ``format`` as None, which defers to Pillow's own format detection.
+
+        Parameters
+        ----------
+            output_path : Output path used to infer the format.
+
+        Returns
+        -------
+            Resolved copy of the options.
+
+        Raises
+        ------
+            ValueError
+                If the format, preset or a tuning value is invalid.
+        """
+        fmt = self.format
+        if fmt is None and output_path is not None:
+            fmt = FORMAT_SUFFIXES.get(Path(output_path).suffix.lower())
+        if fmt is not None and fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {fmt}")
+        if self.preset is not None and self.preset not in ENCODE_PRESETS:
+            raise ValueError(f"Unknown encode preset: {self.preset}")
+        if self.png_filter is not None and self.png_filter not in (*PNG_FILTERS, "adaptive"):
+            raise ValueError(f"Unsupported PNG filter: {self.png_filter}")
+        if self.tiff_compression is not None and self.tiff_compression not in TIFF_COMPRESSIONS:
+            raise ValueError(f"Unsupported TIFF compression: {self.tiff_compression}")
+        if self.compress_level is not None and not 0 <= self.compress_level <= 9:
+            raise ValueError("compress level must be 0-9")
+        if self.effort is not None and not 0 <= self.effort <= 6:
+            raise ValueError("effort must be 0-6")
+        if self.jobs is not None and self.jobs < 1:
+            raise ValueError("encode jobs must be >= 1")
+
+        preset = PRESET_SETTINGS.get(self.preset or "", {}).get(fmt or "", {})
+        return EncodeOptions(
+            format=fmt,
+            preset=self.preset,
+            compress_level=self.compress_level
+            if self.compress_level is not None else preset.get("compress_level"),
+            effort=self.effort if self.effort is not None else preset.get("effort"),
+            png_filter=self.png_filter or preset.get("png_filter"),
+            tiff_compression=self.tiff_compression or preset.get("compression"),
+            jobs=self.jobs,
+        )
+
+
+@dataclass
+class EncodeStats:
+    """Result of encoding an image."""
+    format: str
+    bytes_written: int
+    seconds: float
+
+    def summary(self) -> str:
+        """Return a one-line human-readable report."""
+        return (
+            f"Encoded {self.format}: {self.bytes_written / 1024 ** 2:.2f} MiB "
+            f"in {self.seconds:.2f}s"
+        )
+
+
+def _encode_to(image: Image.Image, fp: BinaryIO, opts: EncodeOptions) -> None:
+    """Encode ``image`` into ``fp`` using resolved options with a known format."""
+    fmt = opts.format
+    if fmt == "raw":
+        fp.write(image.tobytes())
+    elif fmt == "png" and opts.jobs and opts.jobs > 1:
+        write_png_parallel(
+            image,
+            fp,
+            compress_level=6 if opts.compress_level is None else opts.compress_level,
+            # Adaptive per-row filtering is Pillow-internal; Up is the closest fixed filter.
+            filter_method=opts.png_filter if opts.png_filter in PNG_FILTERS else "up",
+            jobs=opts.jobs,
+        )
+    elif fmt == "png" and opts.png_filter not in (None, "adaptive"):
+        writer = PngStreamWriter(
+            fp,
+            image.size,
+            image.mode,
+            compress_level=6 if opts.compress_level is None else opts.compress_level,
+            filter_method=opts.png_filter,
+        )
+        for top in range(0, image.height, 256):
+            writer.write(image.crop((0, top, image.width, min(top + 256, image.height))))
+        writer.close()
+    elif fmt == "png":
+        params = {}
+        if opts.compress_level is not None:
+            params["compress_level"] = opts.compress_level
+        image.save(fp, format="PNG", **params)
+    elif fmt == "webp":
+        effort = 4 if opts.effort is None else opts.effort
+        # For lossless WebP, quality selects compression effort as well; exact
+        # keeps RGB under fully transparent pixels so the output is lossless.
+        image.save(
+            fp,
+            format="WEBP",
+            lossless=True,
+            exact=True,
+            method=effort,
+            quality=round(effort * 100 / 6),
+        )
+    else:
+        compression = "tiff_lzw" if opts.tiff_compression == "lzw" else "raw"
+        image.save(fp, format="TIFF", compression=compression)
+
+
+def encode_image(
+    image: Image.Image,
+    target: str | Path | BinaryIO,
+    options: EncodeOptions | None = None,
+) -> EncodeStats:
+    """Encode an image to a path or binary file object.
+
+    Parameters
+    ----------
+        image : Image to encode.
+        target : Output path or writable binary file object.
+        options : Encoder options; defaults reproduce Pillow's ``save``.
+
+    Returns
+    -------
+        Format, bytes written and encode time.
+
+    Raises
+    ------
+        ValueError
+            If the options are invalid, or no format is known for a buffer.
+    """
+    path = Path(target) if isinstance(target, (str, Path)) else None
+    opts = (options or EncodeOptions()).resolve(path)
+    start = time.perf_counter()
+
+    if path is None:
+        if opts.format is None:
+            raise ValueError("An explicit format is required when encoding to a buffer")
+        buf = io.BytesIO()
+        _encode_to(image, buf, opts)
+        target.write(buf.getbuffer())
+        size = buf.tell()
+    elif opts.format is None:
+        # Unknown suffix: defer to Pillow's extension-based format choice.
+        image.save(path)
+        size = path.stat().st_size
+    else:
+        with path.open("wb") as fp:
+            _encode_to(image, fp, opts)
+            size = fp.tell()
+
+    return EncodeStats(
+        format=opts.format or path.suffix.lstrip(".").lower(),
+        bytes_written=size,
+        seconds=time.perf_counter() - start,
+    )
+
+
+ADLER_BASE = 65521
+ZLIB_WINDOW = 32 * 1024
+PARALLEL_CHUNK_BYTES = 1024 * 1024
+
+
+def adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """Combine two Adler-32 checksums (port of zlib's ``adler32_combine``).
+
+    Parameters
+    ----------
+        adler1 : Checksum of the first block.
+        adler2 : Checksum of the second block.
+        len2 : Length of the second block in bytes.
+
+    Returns
+    -------
+        Checksum of the concatenated blocks.
+    """
+    rem = len2 % ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % ADLER_BASE
+    sum1 += (adler2 & 0xFFFF) + ADLER_BASE - 1
+    sum2 += ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + ADLER_BASE - rem
+    if sum1 >= ADLER_BASE:
+        sum1 -= ADLER_BASE
+    if sum1 >= ADLER_BASE:
+        sum1 -= ADLER_BASE
+    if sum2 >= ADLER_BASE << 1:
+        sum2 -= ADLER_BASE << 1
+    if sum2 >= ADLER_BASE:
+        sum2 -= ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def _zlib_header(level: int) -> bytes:
+    """Return a zlib stream header (deflate, 32K window) for a level."""
+    flevel = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    cmf = 0x78
+    flg = flevel << 6
+    flg += 31 - ((cmf << 8) + flg) % 31
+    return bytes([cmf, flg])
+
+
+def _deflate_rows(
+    image: Image.Image,
+    top: int,
+    bottom: int,
+    method: str,
+    level: int,
+    *,
+    final: bool,
+) -> tuple[bytes, int, int]:
+    """Filter and raw-deflate rows ``[top, bottom)`` as one independent block.
+
+    The block is primed with the preceding 32 KiB of the filtered stream as a
+    preset dictionary (re-filtered locally, as pigz does), so ratios stay
+    close to a single-stream encode. Non-final blocks end on a sync flush so
+    the blocks concatenate into one valid deflate stream.
+
+    Returns
+    -------
+        Tuple of (deflate bytes, Adler-32 of the filtered rows, their length).
+    """
+    stride = image.width * len(image.mode) + 1
+    context_rows = -(-ZLIB_WINDOW // stride)
+    context_top = max(0, top - context_rows)
+    prev_row = None
+    if context_top > 0:
+        prev_row = image.crop((0, context_top - 1, image.width, context_top)).tobytes()
+    filtered = filter_scanlines(
+        image.crop((0, context_top, image.width, bottom)), prev_row, method
+    )
+    split = (top - context_top) * stride
+    body = memoryview(filtered)[split:]
+    if split:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -15, zdict=filtered[max(0, split - ZLIB_WINDOW):split]
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = compressor.compress(body)
+    data += compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(body), len(body)
+
+
+def write_png_parallel(
+    image: Image.Image,
+    fp: BinaryIO,
+    compress_level: int = 6,
+    filter_method: str = "up",
+    jobs: int | None = None,
+) -> int:
+    """Encode a PNG with deflate spread across threads (pigz-style).
+
+    The filtered scanline stream is cut into row-aligned chunks of about
+    1 MiB. Each chunk is deflated independently on a thread pool (zlib
+    releases the GIL), ending on a sync-flush boundary, and the chunks are
+    stitched into a single zlib stream with a combined Adler-32 trailer.
+
+    Parameters
+    ----------
+        image : RGB or RGBA image to encode.
+        fp : Writable binary file object.
+        compress_level : zlib level 0-9.
+        filter_method : Scanline filter, one of ``PNG_FILTERS``.
+        jobs : Worker threads (defaults to the CPU count).
+
+    Returns
+    -------
+        Number of bytes written.
+
+    Raises
+    ------
+        ValueError
+            If the mode or filter is unsupported.
+    """
+    if image.mode not in PNG_COLOR_TYPES:
+        raise ValueError(f"Unsupported PNG mode: {image.mode}")
+    if filter_method not in PNG_FILTERS:
+        raise ValueError(f"Unsupported PNG filter: {filter_method}")
+
+    width, height = image.size
+    stride = width * len(image.mode) + 1
+    rows = max(1, PARALLEL_CHUNK_BYTES // stride)
+    bounds = [(top, min(top + rows, height)) for top in range(0, height, rows)]
+    workers = max(1, jobs or os.cpu_count() or 1)
+
+    written = 0
+    pending = bytearray()
+
+    def emit(data: bytes) -> None:
+        nonlocal written
+        fp.write(data)
+        written += len(data)
+
+    def flush_idat(final: bool = False) -> None:
+        while len(pending) >= IDAT_CHUNK_SIZE or (final and pending):
+            emit(_png_chunk(b"IDAT", bytes(pending[:IDAT_CHUNK_SIZE])))
+            del pending[:IDAT_CHUNK_SIZE]
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[image.mode], 0, 0, 0)
+    emit(PNG_SIGNATURE + _png_chunk(b"IHDR", ihdr))
+    pending += _zlib_header(compress_level)
+
+    adler = 1
+    window: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of chunks in flight so output memory stays small.
+        for idx, (top, bottom) in enumerate(bounds):
+            window.append(pool.submit(
+                _deflate_rows, image, top, bottom, filter_method, compress_level,
+                final=idx == len(bounds) - 1,
+            ))
+            while len(window) > workers * 2 or (window and idx == len(bounds) - 1):
+                data, chunk_adler, length = window.popleft().result()
+                adler = adler32_combine(adler, chunk_adler, length)
+                pending += data
+                flush_idat()
+
+    pending += struct.pack(">I", adler)
+    flush_idat(final=True)
+    emit(_png_chunk(b"IEND", b""))
+    return written
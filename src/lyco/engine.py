@@ -0,0 +1,1794 @@
+"""Compose engine: layout parsing, tile loading, canvas composition and manifests."""
+
+import io
+import json
+import math
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Iterable, List, Mapping, Sequence, Union
+
+from PIL import Image
+
+from .encode import (
+    EncodeOptions,
+    EncodeStats,
+    PngStreamWriter,
+    RawStreamWriter,
+    TiffStreamWriter,
+    encode_image,
+)
+from .geometry import clip_rect, covers, visible_parts
+from .profiling import ComposeProfile, profile_stage
+from .tile_cache import LayoutCache, TileCache, TileMemo, file_digest
+
+
+def parse_resolution(text: str) -> tuple[int, int]:
+    """Parse a WxH string like 1920x1080 into (width, height).
+
+    Parameters
+    ----------
+        text : Resolution string formatted as WIDTHxHEIGHT.
+
+    Returns
+    -------
+        Tuple of (width, height) as integers.
+
+    Raises
+    ------
+        SystemExit
+            If the format is invalid or values are non-positive.
+    """
+    try:
+
+        w_str, h_str = text.lower().split("x", 1)
+        w = int(w_str)
+        h = int(h_str)
+        if w <= 0 or h <= 0:
+            raise ValueError
+        return w, h
+    except Exception as exc:
+        raise SystemExit(
+            f"Invalid resolution '{text}'. Use WIDTHxHEIGHT, e.g. 2560x1440"
+        ) from exc
+
+
+def _import_yaml():
+    try:
+        import yaml  # type: ignore  # pylint: disable=import-outside-toplevel
+    except Exception as exc:
+        raise SystemExit(
+            "Missing dependency: PyYAML. Install with: python -m pip install pyyaml"
+        ) from exc
+    return yaml
+
+
+def parse_yaml(stream):
+    """Parse YAML text or a text stream with the safe loader.
+
+    libyaml's ``CSafeLoader`` is used when PyYAML was built with it; it is
+    many times faster than the pure-Python loader on large layouts.
+
+    Raises
+    ------
+        SystemExit
+            If PyYAML is missing.
+    """
+    yaml = _import_yaml()
+    return yaml.load(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def load_yaml(path: Path) -> dict:
+    """Load YAML layout config as a dict.
+
+    Parameters
+    ----------
+        path : Path to the YAML layout file.
+
+    Returns
+    -------
+        Parsed YAML as a dictionary.
+
+    Raises
+    ------
+        SystemExit
+            If PyYAML is missing or the YAML root is not a mapping.
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = parse_yaml(f)
+
+    if not isinstance(data, dict):
+        raise SystemExit("Config root must be a mapping/object.")
+    return data
+
+
+def load_layout_file(path: Path) -> dict:
+    """Load a layout file as a dict, picking the parser from its suffix.
+
+    ``.json`` and ``.toml`` layouts use the stdlib parsers; anything else is
+    read as YAML (see ``load_yaml``).
+
+    Parameters
+    ----------
+        path : Layout file path.
+
+    Returns
+    -------
+        Parsed layout mapping.
+
+    Raises
+    ------
+        SystemExit
+            If a JSON/TOML file is malformed or its root is not a mapping.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in (".json", ".toml"):
+        return load_yaml(path)
+    try:
+        if suffix == ".json":
+            data = json.loads(path.read_text(encoding="utf-8"))
+        else:
+            data = tomllib.loads(path.read_text(encoding="utf-8"))
+    except (ValueError, tomllib.TOMLDecodeError) as exc:
+        raise SystemExit(f"Invalid layout file '{path}': {exc}") from exc
+    if not isinstance(data, dict):
+        raise SystemExit("Config root must be a mapping/object.")
+    return data
+
+
+def save_yaml(path: Path, data: dict) -> None:
+    """Save YAML layout config, with libyaml's ``CSafeDumper`` when available.
+
+    Parameters
+    ----------
+        path : Destination path for the YAML file.
+        data : Data to serialize as YAML.
+
+    Raises
+    ------
+        SystemExit
+            If PyYAML is missing.
+    """
+    yaml = _import_yaml()
+    with path.open("w", encoding="utf-8") as f:
+        yaml.dump(data, f, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper), sort_keys=False)
+
+
+@dataclass
+class Item:
+    """Structured layout item parsed from YAML."""
+    file: str
+    x: int
+    y: int
+    w: int
+    h: int
+    resolution: str
+    # Part (x0, y0, x1, y1) of the resized tile left visible; None for all
+    # of it (see ``cull_hidden``).
+    crop: tuple[int, int, int, int] | None = None
+
+
+EXECUTORS = ("thread", "process")
+RESAMPLE_STRATEGIES = ("exact", "balanced", "fast")
+# Minimum source/target ratio kept for the final LANCZOS pass per strategy.
+RESAMPLE_GAPS = {"balanced": 2, "fast": 1}
+# Half-width of Pillow's LANCZOS kernel, in output pixels.
+LANCZOS_SUPPORT = 3.0
+# Source modes that carry no alpha band; with no declared transparency these
+# are resized as RGB tiles.
+OPAQUE_MODES = ("1", "L", "P", "RGB", "CMYK", "YCbCr")
+STREAM_WRITERS = {"png": PngStreamWriter, "tiff": TiffStreamWriter, "raw": RawStreamWriter}
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".lyco.json"
+PROFILE_SUFFIX = ".profile.json"
+LAYOUT_SUFFIXES = (".yml", ".yaml", ".json", ".toml")
+# Source modes Pillow converts to RGB/RGBA tiles. The high-depth ones are
+# clipped to 8 bits rather than scaled, which is rarely what was meant.
+SOURCE_MODES = (
+    "1", "L", "LA", "P", "PA", "RGB", "RGBA", "RGBa", "RGBX", "CMYK", "YCbCr", "LAB", "HSV",
+    "I", "F", "I;16", "I;16B", "I;16L", "I;16N",
+)
+HIGH_DEPTH_MODES = ("I", "F", "I;16", "I;16B", "I;16L", "I;16N")
+PROBE_WORKERS = 16
+# Rough single-core throughput in megapixels per second, measured with
+# benchmarks/bench_compose.py: source decode plus LANCZOS resize, and PNG
+# encode of the canvas. Only used for validation estimates.
+DECODE_MPX_PER_S = {"JPEG": 40.0, "PNG": 30.0}
+DEFAULT_DECODE_MPX_PER_S = 25.0
+ENCODE_MPX_PER_S = 5.0
+# Items showing at least this share of their tile are cached whole, so a
+# covering item moving only changes the cut; the rest are cached by crop.
+WHOLE_TILE_SHARE = 0.5
+
+
+def default_jobs() -> int:
+    """Return the default worker count for compose (the CPU count)."""
+    return os.cpu_count() or 1
+
+
+def parse_items(items: list) -> List[Item]:
+    """Validate raw layout items and convert them to ``Item`` records.
+
+    Parameters
+    ----------
+        items : Raw ``items`` list from the layout config.
+
+    Returns
+    -------
+        List of parsed items in layout order.
+
+    Raises
+    ------
+        SystemExit
+            If an item is malformed.
+    """
+    parsed: List[Item] = []
+    for idx, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            raise SystemExit(f"Item #{idx} must be an object.")
+
+        try:
+            x = int(item["x"])
+            y = int(item["y"])
+            file_path = str(Path(item["file"]))
+        except Exception as exc:
+            raise SystemExit(f"Item #{idx} must include x, y, file") from exc
+
+        res = item.get("resolution")
+        if not isinstance(res, str):
+            raise SystemExit(f"Item #{idx} must include resolution like 1920x1080")
+        w, h = parse_resolution(res)
+        parsed.append(Item(file=file_path, x=x, y=y, w=w, h=h, resolution=res))
+    return parsed
+
+
+TileKey = tuple[str, int, int, Union[tuple[int, int, int, int], None]]
+
+
+def tile_key(item: Item) -> TileKey:
+    """Return the in-run identity of an item's tile (resolved path, size, crop)."""
+    return (os.path.realpath(item.file), item.w, item.h, item.crop)
+
+
+def item_rect(item: Item) -> tuple[int, int, int, int]:
+    """Return the (x0, y0, x1, y1) canvas rectangle an item is pasted into."""
+    return (item.x, item.y, item.x + item.w, item.y + item.h)
+
+
+def tile_box(item: Item) -> tuple[int, int, int, int]:
+    """Return the canvas rectangle covered by an item's (possibly cropped) tile."""
+    if item.crop is None:
+        return item_rect(item)
+    x0, y0, x1, y1 = item.crop
+    return (item.x + x0, item.y + y0, item.x + x1, item.y + y1)
+
+
+def tile_size(item: Item) -> tuple[int, int]:
+    """Return the pixel size of an item's (possibly cropped) tile."""
+    x0, y0, x1, y1 = tile_box(item)
+    return (x1 - x0, y1 - y0)
+
+
+def crop_tile(tile: Image.Image, crop: tuple[int, int, int, int] | None) -> Image.Image:
+    """Cut an item's visible ``crop`` out of its whole tile (see ``cull_hidden``)."""
+    return tile if crop is None else tile.crop(crop)
+
+
+def stored_crop(item: Item) -> tuple[int, int, int, int] | None:
+    """Return the crop an item's tile is cached under: None (whole) or ``item.crop``.
+
+    Mostly visible items keep the whole tile, so the cache still hits when
+    a covering item moves; mostly hidden ones only decode and store the
+    visible part (see ``WHOLE_TILE_SHARE``).
+    """
+    if item.crop is None:
+        return None
+    w, h = tile_size(item)
+    return None if w * h >= WHOLE_TILE_SHARE * item.w * item.h else item.crop
+
+
+def source_region(
+    source_size: tuple[int, int],
+    size: tuple[int, int],
+    crop: tuple[int, int, int, int],
+    factor: int = 1,
+) -> tuple[tuple[int, int, int, int], tuple[int, int, int, int], tuple[int, int, int, int]]:
+    """Map a tile crop back to the source pixels its LANCZOS resize reads.
+
+    The crop is first widened to target pixels that start on whole source
+    pixels, so the ``resize(box=...)`` box is integral and every output
+    pixel gets exactly the sampling position and weights of a full resize.
+    Its source footprint is then widened by the kernel support, so the
+    kernel is only truncated at the real image edges.
+
+    Parameters
+    ----------
+        source_size : Decoded source (width, height).
+        size : Full target (width, height).
+        crop : (x0, y0, x1, y1) part of the target to produce.
+        factor : ``reduce()`` factor applied after cropping; the region is
+            aligned to it so the reduced blocks match the full image's.
+
+    Returns
+    -------
+        The source region to crop; the ``resize(box=...)`` box relative to
+        that region once reduced by ``factor``; and the widened crop that
+        box produces, which contains ``crop``.
+    """
+    reduced = (-(-source_size[0] // factor), -(-source_size[1] // factor))
+    region, box, aligned = [0] * 4, [0] * 4, [0] * 4
+    for axis in (0, 1):
+        src, dst = reduced[axis], size[axis]
+        step = dst // math.gcd(src, dst)
+        lo = crop[axis] // step * step
+        hi = min(dst, -(-crop[axis + 2] // step) * step)
+        support = math.ceil(LANCZOS_SUPPORT * max(src / dst, 1.0)) + 1
+        first = max(0, lo * src // dst - support)
+        last = min(src, hi * src // dst + support)
+        region[axis], region[axis + 2] = first * factor, min(source_size[axis], last * factor)
+        box[axis], box[axis + 2] = lo * src // dst - first, hi * src // dst - first
+        aligned[axis], aligned[axis + 2] = lo, hi
+    return tuple(region), tuple(box), tuple(aligned)
+
+
+def source_tile_mode(im: Image.Image) -> str:
+    """Return the tile mode for an opened source: RGB if opaque, else RGBA.
+
+    Only the header is consulted: a source counts as opaque when its mode has
+    no alpha band and it declares no transparent colour or palette alpha.
+
+    Parameters
+    ----------
+        im : Opened (not necessarily loaded) source image.
+
+    Returns
+    -------
+        ``"RGB"`` or ``"RGBA"``.
+    """
+    if im.mode in OPAQUE_MODES and not im.has_transparency_data:
+        return "RGB"
+    return "RGBA"
+
+
+def probe_tile_mode(file_path: str) -> str:
+    """Return ``source_tile_mode`` of a file from its header only."""
+    with Image.open(file_path) as im:
+        return source_tile_mode(im)
+
+
+def load_tile(
+    file_path: str,
+    size: tuple[int, int],
+    strategy: str = "exact",
+    crop: tuple[int, int, int, int] | None = None,
+) -> Image.Image:
+    """Decode a source image and resize it into a ready-to-paste tile.
+
+    This is the unit of work handed to compose worker pools, so it must stay
+    a picklable module-level function.
+
+    Opaque sources stay RGB (see ``source_tile_mode``); pasting them onto an
+    RGBA canvas gives the same pixels as an RGBA tile with full alpha, minus
+    a band of resampling work. Sources already at the target size are only
+    converted, never resampled.
+
+    ``exact`` runs one LANCZOS pass over the fully decoded source. ``balanced``
+    and ``fast`` first shrink large downscales cheaply: JPEG sources are
+    decoded at 1/2, 1/4 or 1/8 scale via ``draft()``, then an integer
+    ``reduce()`` box-filters the image down before the final LANCZOS step.
+    ``balanced`` keeps at least 2x the target size for that final step;
+    ``fast`` goes as low as the target size.
+
+    With a ``crop``, only that part of the resized tile is produced: the
+    decoded source is cut down to the footprint of the crop (see
+    ``source_region``) before it is reduced, converted and resampled, so
+    those steps cost in proportion to the crop, and the pixels match the
+    same part of a full resize.
+
+    Parameters
+    ----------
+        file_path : Path to the source image.
+        size : Target (width, height).
+        strategy : One of ``RESAMPLE_STRATEGIES``.
+        crop : Optional (x0, y0, x1, y1) part of the resized tile to return.
+
+    Returns
+    -------
+        Resized RGB or RGBA image.
+    """
+    return load_tile_profiled(file_path, size, strategy, crop)[0]
+
+
+def load_tile_profiled(
+    file_path: str,
+    size: tuple[int, int],
+    strategy: str = "exact",
+    crop: tuple[int, int, int, int] | None = None,
+) -> tuple[Image.Image, dict]:
+    """Run ``load_tile`` and time its open, decode, convert and resize steps.
+
+    Cropping the source counts as part of the convert step.
+
+    Parameters
+    ----------
+        file_path : Path to the source image.
+        size : Target (width, height).
+        strategy : One of ``RESAMPLE_STRATEGIES``.
+        crop : Optional (x0, y0, x1, y1) part of the resized tile to return.
+
+    Returns
+    -------
+        The tile and a JSON-ready record with the file, source size and
+        mode, target size, bytes read and per-step seconds.
+    """
+    stages = dict.fromkeys(("open", "decode", "convert", "resize"), 0.0)
+    start = mark = time.perf_counter()
+
+    def lap(name: str) -> None:
+        nonlocal mark
+        now = time.perf_counter()
+        stages[name] += now - mark
+        mark = now
+
+    with Image.open(file_path) as im:
+        mode = source_tile_mode(im)
+        record = {
+            "file": file_path,
+            "source": "decode",
+            "source_size": list(im.size),
+            "source_mode": im.mode,
+            "target_size": list(size),
+            "crop": None if crop is None else list(crop),
+            "bytes_read": os.path.getsize(file_path),
+        }
+        lap("open")
+        if im.size == tuple(size):
+            im.load()
+            lap("decode")
+            if crop is not None:
+                im = im.crop(crop)
+            tile = im if im.mode == mode else im.convert(mode)
+            lap("convert")
+        else:
+            factor = 1
+            if strategy != "exact":
+                gap = RESAMPLE_GAPS[strategy]
+                im.draft(None, (size[0] * gap, size[1] * gap))
+            im.load()
+            lap("decode")
+            if strategy != "exact" and im.mode in ("L", "LA", "RGB", "RGBA"):
+                factor = max(1, min(im.width // (size[0] * gap), im.height // (size[1] * gap)))
+            box = aligned = None
+            if crop is not None:
+                region, box, aligned = source_region(im.size, size, crop, factor)
+                im = im.crop(region)
+                lap("convert")
+            if factor > 1:
+                im = im.reduce(factor)
+                lap("resize")
+            if im.mode != mode:
+                im = im.convert(mode)
+            lap("convert")
+            if crop is None:
+                tile = im.resize(size, Image.LANCZOS)
+            else:
+                tile = resize_region(im, box, aligned, crop)
+            lap("resize")
+    record["stages"] = stages
+    record["seconds"] = time.perf_counter() - start
+    return tile, record
+
+
+def resize_region(
+    im: Image.Image,
+    box: tuple[int, int, int, int],
+    aligned: tuple[int, int, int, int],
+    crop: tuple[int, int, int, int],
+) -> Image.Image:
+    """Resize the ``box`` part of a source and cut ``crop`` out of it.
+
+    Parameters
+    ----------
+        im : Source (or its cropped region), already in the tile mode.
+        box : Part of ``im`` covering ``aligned`` (see ``source_region``).
+        aligned : Tile-space box that ``box`` resizes to.
+        crop : Requested tile-space box, inside ``aligned``.
+
+    Returns
+    -------
+        The ``crop`` part of the resized tile.
+    """
+    target = (aligned[2] - aligned[0], aligned[3] - aligned[1])
+    if target == (box[2] - box[0], box[3] - box[1]):
+        # Reduced to the target size: a full resize is a plain copy.
+        tile = im.crop(box)
+    else:
+        tile = im.resize(target, Image.LANCZOS, box=box)
+    if aligned != crop:
+        tile = tile.crop((
+            crop[0] - aligned[0],
+            crop[1] - aligned[1],
+            crop[2] - aligned[0],
+            crop[3] - aligned[1],
+        ))
+    return tile
+
+
+def check_pool_args(jobs: int | None, executor: str, strategy: str) -> int:
+    """Validate tile worker options.
+
+    Parameters
+    ----------
+        jobs : Worker count, or None for the CPU count.
+        executor : ``"thread"`` or ``"process"``.
+        strategy : Resample strategy.
+
+    Returns
+    -------
+        The resolved worker count.
+
+    Raises
+    ------
+        SystemExit
+            If ``jobs``, ``executor`` or ``strategy`` is invalid.
+    """
+    if jobs is None:
+        jobs = default_jobs()
+    if jobs < 1:
+        raise SystemExit("jobs must be >= 1")
+    if executor not in EXECUTORS:
+        raise SystemExit(f"executor must be one of: {', '.join(EXECUTORS)}")
+    if strategy not in RESAMPLE_STRATEGIES:
+        raise SystemExit(
+            f"resample strategy must be one of: {', '.join(RESAMPLE_STRATEGIES)}"
+        )
+    return jobs
+
+
+def resample_cache_name(strategy: str) -> str:
+    """Return the tile cache ``resample`` key part for a strategy."""
+    return "lanczos" if strategy == "exact" else f"lanczos-{strategy}"
+
+
+def _stored_tile(
+    it: Item,
+    resample_key: str,
+    cache: TileCache | None,
+    memo: TileMemo | None,
+) -> tuple[Image.Image | None, str | None, tuple | None, str | None]:
+    """Look an item's stored tile (see ``stored_crop``) up in the memo, then the cache.
+
+    Returns
+    -------
+        The stored tile (None on a miss), where it came from, and its memo
+        and cache keys (None without a memo or cache).
+    """
+    tile = source = memo_key = cache_key = None
+    crop = stored_crop(it)
+    if memo is not None:
+        memo_key = memo.key(it.file, (it.w, it.h), resample_key, crop)
+        tile = memo.get(memo_key)
+        source = "memo"
+    if cache is not None and tile is None:
+        mode = probe_tile_mode(it.file)
+        cache_key = cache.key(it.file, (it.w, it.h), resample_key, mode, crop)
+        tile = cache.get(cache_key, (it.w, it.h) if crop is None else tile_size(it), mode)
+        source = "cache"
+        if tile is not None and memo is not None:
+            memo.put(memo_key, tile)
+    return tile, source, memo_key, cache_key
+
+
+def _map_loads(loader, args: tuple, workers: int, executor: str, pool: Executor | None) -> list:
+    """Map ``loader`` over the ``args`` columns on ``pool``, a per-call pool or inline."""
+    if pool is not None and args[0]:
+        return list(pool.map(loader, *args))
+    if workers <= 1:
+        return list(map(loader, *args))
+    # Pillow releases the GIL while decoding and resampling, so threads scale
+    # well without pickling tiles back; processes are kept for heavy filters.
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=workers) as owned_pool:
+        return list(owned_pool.map(loader, *args))
+
+
+def load_tiles(
+    items: List[Item],
+    *,
+    jobs: int | None = None,
+    executor: str = "thread",
+    cache: TileCache | None = None,
+    strategy: str = "exact",
+    memo: TileMemo | None = None,
+    pool: Executor | None = None,
+    profile: ComposeProfile | None = None,
+) -> List[Image.Image]:
+    """Load tiles for all items, optionally on a worker pool.
+
+    Results are returned in item order regardless of completion order, so
+    pasting them sequentially matches the serial path exactly. Items sharing
+    a file and resolution are decoded once and share one tile object. When a
+    tile cache is given, hits skip decoding and only misses reach the pool;
+    an in-memory memo is consulted before the cache.
+
+    The cache and memo hold whole tiles for mostly visible items, since the
+    crop changes whenever a covering item moves, and cut the crop out of
+    them; mostly hidden items decode and store just their cropped part (see
+    ``stored_crop``), as do all loads without a cache or memo.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        jobs : Worker count (defaults to the CPU count; 1 disables the pool).
+        executor : ``"thread"`` or ``"process"``.
+        cache : Optional persistent tile cache.
+        strategy : Resample strategy (see ``load_tile``).
+        memo : Optional in-memory tile memo kept across composes.
+        pool : Long-lived executor to run misses on instead of a per-call
+            pool (``jobs`` and ``executor`` then only get validated).
+        profile : Optional profile receiving one record per unique tile.
+
+    Returns
+    -------
+        List of RGB/RGBA tiles aligned with ``items`` (duplicates are shared).
+
+    Raises
+    ------
+        SystemExit
+            If ``jobs``, ``executor`` or ``strategy`` is invalid.
+    """
+    jobs = check_pool_args(jobs, executor, strategy)
+    resample_key = resample_cache_name(strategy)
+
+    # Decode each unique (file, resolution) once; duplicates share the tile.
+    slots: List[int] = []
+    first_use: dict[TileKey, int] = {}
+    unique: List[Item] = []
+    for it in items:
+        memo_key = tile_key(it)
+        if memo_key not in first_use:
+            first_use[memo_key] = len(unique)
+            unique.append(it)
+        slots.append(first_use[memo_key])
+
+    tiles: List[Image.Image | None] = [None] * len(unique)
+    keys: List[str | None] = [None] * len(unique)
+    memo_keys: List[tuple | None] = [None] * len(unique)
+    pending = []
+    for idx, it in enumerate(unique):
+        start = time.perf_counter()
+        tiles[idx], source, memo_keys[idx], keys[idx] = _stored_tile(it, resample_key, cache, memo)
+        if tiles[idx] is None:
+            pending.append(idx)
+            continue
+        if stored_crop(it) is None:
+            tiles[idx] = crop_tile(tiles[idx], it.crop)
+        if profile is not None:
+            profile.add_tile({
+                "file": it.file,
+                "source": source,
+                "target_size": [it.w, it.h],
+                "crop": None if it.crop is None else list(it.crop),
+                "seconds": time.perf_counter() - start,
+            })
+
+    files = [unique[idx].file for idx in pending]
+    sizes = [(unique[idx].w, unique[idx].h) for idx in pending]
+    strategies = [strategy] * len(pending)
+    # Tiles that get stored are loaded as stored, so later crops can reuse them.
+    keep = cache is not None or memo is not None
+    crops = [stored_crop(unique[idx]) if keep else unique[idx].crop for idx in pending]
+    loader = load_tile if profile is None else load_tile_profiled
+    loaded = _map_loads(loader, (files, sizes, strategies, crops), min(jobs, len(pending)), executor, pool)
+    if profile is not None:
+        for im, record in loaded:
+            profile.add_tile(record)
+        loaded = [im for im, _record in loaded]
+
+    for idx, crop, im in zip(pending, crops, loaded):
+        if cache is not None:
+            cache.put(keys[idx], im)
+        if memo is not None:
+            memo.put(memo_keys[idx], im)
+        tiles[idx] = crop_tile(im, unique[idx].crop) if crop is None else im
+    return [tiles[slot] for slot in slots]
+
+
+def parse_memory_size(text: str) -> int:
+    """Parse a memory size like 512M, 2G or 1048576 into bytes.
+
+    Parameters
+    ----------
+        text : Size with an optional K/M/G suffix (binary units).
+
+    Returns
+    -------
+        Size in bytes.
+
+    Raises
+    ------
+        SystemExit
+            If the format is invalid or the value is non-positive.
+    """
+    units = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    try:
+        value = text.strip().upper().removesuffix("IB").removesuffix("B")
+        suffix = value[-1] if value and value[-1] in units else ""
+        number = float(value[:-1] if suffix else value)
+        size = int(number * units[suffix])
+        if size <= 0:
+            raise ValueError
+        return size
+    except Exception as exc:
+        raise SystemExit(
+            f"Invalid memory size '{text}'. Use e.g. 512M or 2G"
+        ) from exc
+
+
+def probe_source(file_path: str) -> tuple[tuple[int, int], str, str | None]:
+    """Read an image's size, mode and format from its header only.
+
+    Parameters
+    ----------
+        file_path : Source image path.
+
+    Returns
+    -------
+        Tuple of ((width, height), mode, format).
+
+    Raises
+    ------
+        SystemExit
+            If the file cannot be opened as an image.
+    """
+    try:
+        with Image.open(file_path) as im:
+            return im.size, im.mode, im.format
+    except Exception as exc:
+        raise SystemExit(f"Cannot read image '{file_path}': {exc}") from exc
+
+
+@dataclass
+class SourceProbe:
+    """Header facts about a source image; ``error`` is set if it is unusable."""
+    size: tuple[int, int] = (0, 0)
+    mode: str = ""
+    format: str | None = None
+    tile_mode: str = "RGBA"
+    error: str | None = None
+
+
+def _probe(path: str) -> SourceProbe:
+    if not os.path.isfile(path):
+        return SourceProbe(error="file not found")
+    try:
+        with Image.open(path) as im:
+            return SourceProbe(im.size, im.mode, im.format, source_tile_mode(im))
+    except Exception as exc:  # pylint: disable=broad-except
+        return SourceProbe(error=f"cannot read image: {exc}")
+
+
+def probe_sources(
+    files: Iterable[str],
+    jobs: int | None = None,
+    probes: dict[str, SourceProbe] | None = None,
+) -> dict[str, SourceProbe]:
+    """Read the headers of many files concurrently, without decoding pixels.
+
+    Header reads are I/O bound, so more threads than CPUs pay off on slow or
+    network storage.
+
+    Parameters
+    ----------
+        files : Source image paths.
+        jobs : Reader threads (default ``PROBE_WORKERS``).
+        probes : Results to reuse and extend, keyed by resolved path.
+
+    Returns
+    -------
+        ``probes`` (or a new dict) with an entry per resolved file path.
+    """
+    probes = {} if probes is None else probes
+    missing = list(dict.fromkeys(
+        path for path in map(os.path.realpath, files) if path not in probes
+    ))
+    workers = min(jobs or PROBE_WORKERS, len(missing))
+    if workers <= 1:
+        probes.update(zip(missing, map(_probe, missing)))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            probes.update(zip(missing, pool.map(_probe, missing)))
+    return probes
+
+
+def cull_hidden(items: List[Item], canvas_size: tuple[int, int]) -> List[Item]:
+    """Drop items that leave no pixel in the composed image, crop the rest.
+
+    Pastes replace pixels rather than blend them, so an item is hidden when
+    it lies outside the canvas or later items cover every pixel of it,
+    whatever their alpha. Partly visible items get a ``crop``: the bounding
+    box of their visible part, in tile coordinates, shared by all items
+    using the same file and resolution so they still share one tile. Only
+    item rectangles are compared; no image is opened.
+
+    Parameters
+    ----------
+        items : Parsed layout items, in paste order.
+        canvas_size : Canvas (width, height).
+
+    Returns
+    -------
+        The visible items, in paste order, with ``crop`` set where only part
+        of the tile is visible.
+    """
+    parts = visible_parts([item_rect(it) for it in items], (0, 0, canvas_size[0], canvas_size[1]))
+    bounds: dict[tuple[str, int, int], tuple[int, int, int, int]] = {}
+    visible = []
+    for it, part in zip(items, parts):
+        if not part:
+            continue
+        key = (os.path.realpath(it.file), it.w, it.h)
+        box = (
+            min(rect[0] for rect in part) - it.x,
+            min(rect[1] for rect in part) - it.y,
+            max(rect[2] for rect in part) - it.x,
+            max(rect[3] for rect in part) - it.y,
+        )
+        old = bounds.get(key, box)
+        bounds[key] = (
+            min(old[0], box[0]), min(old[1], box[1]), max(old[2], box[2]), max(old[3], box[3])
+        )
+        visible.append((key, it))
+    return [
+        replace(it, crop=None if bounds[key] == (0, 0, it.w, it.h) else bounds[key])
+        for key, it in visible
+    ]
+
+
+def canvas_mode(
+    items: List[Item],
+    canvas_size: tuple[int, int],
+    probes: Mapping[str, SourceProbe] | None = None,
+) -> str:
+    """Pick the canvas mode: RGB when opaque tiles cover it, else RGBA.
+
+    Pastes replace pixels rather than blend them, so any visible item whose
+    source may carry alpha forces RGBA; otherwise the canvas can drop its
+    alpha plane once the opaque items cover every pixel. Only image headers
+    are read.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        canvas_size : Canvas (width, height).
+        probes : Headers already read by ``probe_sources``.
+
+    Returns
+    -------
+        ``"RGB"`` or ``"RGBA"``.
+    """
+    box = (0, 0, canvas_size[0], canvas_size[1])
+    modes: dict[str, str] = {
+        path: probe.tile_mode for path, probe in (probes or {}).items() if probe.error is None
+    }
+    rects = []
+    for it in items:
+        rect = clip_rect(tile_box(it), box)
+        if rect is None:
+            continue
+        path = os.path.realpath(it.file)
+        if path not in modes:
+            modes[path] = probe_tile_mode(it.file)
+        if modes[path] != "RGB":
+            return "RGBA"
+        rects.append(rect)
+    return "RGB" if covers(rects, box) else "RGBA"
+
+
+@dataclass
+class MemoryPlan:
+    """Compose memory estimate and the execution plan chosen for a budget."""
+    canvas_size: tuple[int, int]
+    baseline_bytes: int
+    tile_bytes: int
+    max_tile_bytes: int
+    decode_bytes: List[int]
+    jobs: int
+    release_tiles: bool = False
+    band_height: int | None = None
+    canvas_bands: int = 4
+
+    def inflight_bytes(self, jobs: int) -> int:
+        """Return peak bytes of ``jobs`` concurrent decodes (largest first)."""
+        return sum(sorted(self.decode_bytes, reverse=True)[:jobs])
+
+    def estimate(self) -> int:
+        """Return estimated peak bytes for the chosen plan."""
+        canvas_w, canvas_h = self.canvas_size
+        inflight = self.baseline_bytes + self.inflight_bytes(self.jobs)
+        if self.band_height is not None:
+            # Strip plus the shifted/filtered copies made by the PNG writer.
+            strip = canvas_w * self.band_height * self.canvas_bands * 3
+            return inflight + self.max_tile_bytes + strip
+        if self.release_tiles:
+            return canvas_w * canvas_h * self.canvas_bands + inflight + self.max_tile_bytes * self.jobs
+        return canvas_w * canvas_h * self.canvas_bands + self.tile_bytes + inflight
+
+
+def plan_memory(
+    items: List[Item],
+    canvas_size: tuple[int, int],
+    budget: int,
+    jobs: int,
+    *,
+    strategy: str = "exact",
+    mode: str = "RGBA",
+    probes: Mapping[str, SourceProbe] | None = None,
+) -> MemoryPlan:
+    """Estimate compose memory from image headers and fit it to a budget.
+
+    Full decodes are never performed. The plan degrades in steps until the
+    estimate fits: fewer workers, then releasing tiles right after pasting,
+    then banded streaming with the tallest strip that fits.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        canvas_size : Canvas (width, height).
+        budget : Memory budget in bytes.
+        jobs : Requested worker count.
+        strategy : Resample strategy (affects JPEG draft decode size).
+        mode : Canvas mode (sets the canvas bytes per pixel).
+        probes : Headers already read by ``probe_sources``.
+
+    Returns
+    -------
+        Memory plan; its ``estimate()`` may still exceed the budget when even
+        the smallest banded plan does not fit.
+    """
+    unique: dict[TileKey, Item] = {}
+    for it in items:
+        unique.setdefault(tile_key(it), it)
+
+    decode_bytes = []
+    tile_bytes = 0
+    max_tile = 0
+    for it in unique.values():
+        probe = (probes or {}).get(os.path.realpath(it.file))
+        if probe is not None and probe.error is None:
+            (src_w, src_h), src_mode, fmt = probe.size, probe.mode, probe.format
+        else:
+            (src_w, src_h), src_mode, fmt = probe_source(it.file)
+        if strategy != "exact" and fmt == "JPEG":
+            gap = RESAMPLE_GAPS[strategy]
+            scale = 1
+            while scale < 8 and src_w // (scale * 2) >= it.w * gap and src_h // (scale * 2) >= it.h * gap:
+                scale *= 2
+            src_w, src_h = -(-src_w // scale), -(-src_h // scale)
+        tile_w, tile_h = tile_size(it)
+        tile = tile_w * tile_h * 4
+        # Decoded source, its RGBA conversion, the premultiplied copy LANCZOS
+        # works on, the horizontal-pass intermediate, and the resized tile.
+        decode_bytes.append(src_w * src_h * (len(src_mode) + 8) + tile_w * src_h * 4 + tile)
+        tile_bytes += tile
+        max_tile = max(max_tile, tile)
+
+    canvas_w, canvas_h = canvas_size
+    plan = MemoryPlan(
+        canvas_size=canvas_size,
+        # Interpreter, Pillow and layout state already resident.
+        baseline_bytes=peak_rss_bytes() or 0,
+        tile_bytes=tile_bytes,
+        max_tile_bytes=max_tile,
+        decode_bytes=decode_bytes,
+        jobs=max(1, min(jobs, len(decode_bytes))),
+        canvas_bands=len(mode),
+    )
+
+    while plan.estimate() > budget and plan.jobs > 1:
+        plan.jobs -= 1
+    if plan.estimate() <= budget:
+        return plan
+
+    plan.release_tiles = True
+    if plan.estimate() <= budget:
+        return plan
+
+    plan.release_tiles = False
+    spare = budget - plan.baseline_bytes - plan.inflight_bytes(1) - max_tile
+    plan.band_height = max(16, min(canvas_h, spare // max(1, canvas_w * plan.canvas_bands * 3)))
+    return plan
+
+
+def peak_rss_bytes() -> int | None:
+    """Return this process's peak resident set size, if the OS reports it."""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def compose_canvas(
+    items: List[Item],
+    canvas_size: tuple[int, int],
+    *,
+    jobs: int | None = None,
+    executor: str = "thread",
+    cache: TileCache | None = None,
+    strategy: str = "exact",
+    release_tiles: bool = False,
+    mode: str = "RGBA",
+    memo: TileMemo | None = None,
+    pool: Executor | None = None,
+    profile: ComposeProfile | None = None,
+) -> Image.Image:
+    """Compose items onto an in-memory canvas.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        canvas_size : Canvas (width, height).
+        jobs : Worker count for decode/resize.
+        executor : Worker pool type, ``"thread"`` or ``"process"``.
+        cache : Optional persistent tile cache.
+        strategy : Resample strategy, one of ``RESAMPLE_STRATEGIES``.
+        release_tiles : Load tiles ``jobs`` items at a time and drop each one
+            after its last paste, instead of holding every tile at once.
+        mode : Canvas mode; ``"RGB"`` only when ``canvas_mode()`` allows it.
+        memo : Optional in-memory tile memo kept across composes.
+        pool : Optional long-lived executor for decode/resize.
+        profile : Optional profile receiving ``load`` and ``paste`` stages.
+
+    Returns
+    -------
+        Composed canvas.
+    """
+    canvas = Image.new(mode, canvas_size)
+    if not release_tiles:
+        with profile_stage(profile, "load"):
+            tiles = load_tiles(
+                items,
+                jobs=jobs,
+                executor=executor,
+                cache=cache,
+                strategy=strategy,
+                memo=memo,
+                pool=pool,
+                profile=profile,
+            )
+        with profile_stage(profile, "paste"):
+            for it, im in zip(items, tiles):
+                canvas.paste(im, tile_box(it)[:2])
+        return canvas
+
+    keys = [tile_key(it) for it in items]
+    last_use = {key: idx for idx, key in enumerate(keys)}
+    window = jobs or default_jobs()
+    held: dict[TileKey, Image.Image] = {}
+    for start in range(0, len(items), window):
+        chunk = range(start, min(start + window, len(items)))
+        missing = {keys[idx]: items[idx] for idx in chunk if keys[idx] not in held}
+        if missing:
+            with profile_stage(profile, "load"):
+                loaded = load_tiles(
+                    list(missing.values()),
+                    jobs=jobs,
+                    executor=executor,
+                    cache=cache,
+                    strategy=strategy,
+                    memo=memo,
+                    pool=pool,
+                    profile=profile,
+                )
+            held.update(zip(missing, loaded))
+        with profile_stage(profile, "paste"):
+            for idx in chunk:
+                canvas.paste(held[keys[idx]], tile_box(items[idx])[:2])
+                if last_use[keys[idx]] == idx:
+                    del held[keys[idx]]
+    return canvas
+
+
+def resolve_encode(encode: EncodeOptions | None, output_path: str) -> EncodeOptions:
+    """Resolve encoder options for an output path.
+
+    Parameters
+    ----------
+        encode : Requested encoder options (None for defaults).
+        output_path : Output path used to infer the format.
+
+    Returns
+    -------
+        Resolved encoder options.
+
+    Raises
+    ------
+        SystemExit
+            If the options are invalid.
+    """
+    try:
+        return (encode or EncodeOptions()).resolve(output_path)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+
+
+def compose_banded(
+    items: List[Item],
+    canvas_size: tuple[int, int],
+    output_path: str,
+    band_height: int,
+    *,
+    jobs: int | None = None,
+    executor: str = "thread",
+    cache: TileCache | None = None,
+    strategy: str = "exact",
+    encode: EncodeOptions | None = None,
+    mode: str = "RGBA",
+    profile: ComposeProfile | None = None,
+) -> EncodeStats:
+    """Compose the canvas in horizontal strips streamed straight to disk.
+
+    Only items intersecting the current strip are loaded, and each tile is
+    released once the strips pass its bottom edge, so peak memory follows the
+    strip height and the tiles crossing it rather than the canvas area.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        canvas_size : Canvas (width, height).
+        output_path : Destination path (PNG, uncompressed TIFF or raw).
+        band_height : Strip height in pixels.
+        jobs : Worker count for tiles first needed by a strip.
+        executor : Worker pool type, ``"thread"`` or ``"process"``.
+        cache : Optional persistent tile cache.
+        strategy : Resample strategy, one of ``RESAMPLE_STRATEGIES``.
+        encode : Output encoder options.
+        mode : Strip and output mode, ``"RGB"`` or ``"RGBA"``.
+        profile : Optional profile receiving ``load`` and ``paste`` stages.
+
+    Returns
+    -------
+        Encoder statistics (time spent in the stream writer).
+
+    Raises
+    ------
+        SystemExit
+            If the band height or output format is unsupported.
+    """
+    if band_height < 1:
+        raise SystemExit("band height must be >= 1")
+    opts = resolve_encode(encode, output_path)
+    writer_cls = STREAM_WRITERS.get(opts.format or "")
+    if writer_cls is None or opts.tiff_compression == "lzw":
+        raise SystemExit(
+            f"Banded compose supports {', '.join(STREAM_WRITERS)} outputs "
+            f"(TIFF uncompressed), got '{output_path}'"
+        )
+    writer_args = {}
+    if opts.format == "png":
+        if opts.compress_level is not None:
+            writer_args["compress_level"] = opts.compress_level
+        if opts.png_filter not in (None, "adaptive"):
+            writer_args["filter_method"] = opts.png_filter
+
+    canvas_w, canvas_h = canvas_size
+    keys = [tile_key(it) for it in items]
+    boxes = [tile_box(it) for it in items]
+    release_at: dict[TileKey, int] = {}
+    for key, box in zip(keys, boxes):
+        release_at[key] = max(release_at.get(key, 0), box[3])
+
+    tiles: dict[TileKey, Image.Image] = {}
+    encode_seconds = 0.0
+    with open(output_path, "wb") as fp:
+        writer = writer_cls(fp, canvas_size, mode, **writer_args)
+        for top in range(0, canvas_h, band_height):
+            bottom = min(top + band_height, canvas_h)
+            visible = [
+                (key, it, box) for key, it, box in zip(keys, items, boxes)
+                if box[1] < bottom and box[3] > top and box[0] < canvas_w and box[2] > 0
+            ]
+            missing = {key: it for key, it, _box in visible if key not in tiles}
+            if missing:
+                with profile_stage(profile, "load"):
+                    loaded = load_tiles(
+                        list(missing.values()),
+                        jobs=jobs,
+                        executor=executor,
+                        cache=cache,
+                        strategy=strategy,
+                        profile=profile,
+                    )
+                tiles.update(zip(missing, loaded))
+
+            with profile_stage(profile, "paste"):
+                strip = Image.new(mode, (canvas_w, bottom - top))
+                for key, _it, box in visible:
+                    y0 = max(top, box[1])
+                    y1 = min(bottom, box[3])
+                    strip.paste(
+                        tiles[key].crop((0, y0 - box[1], box[2] - box[0], y1 - box[1])),
+                        (box[0], y0 - top),
+                    )
+            start = time.perf_counter()
+            writer.write(strip)
+            encode_seconds += time.perf_counter() - start
+
+            for key in [key for key in tiles if release_at[key] <= bottom]:
+                del tiles[key]
+        start = time.perf_counter()
+        writer.close()
+        encode_seconds += time.perf_counter() - start
+    return EncodeStats(format=opts.format, bytes_written=writer.bytes_written, seconds=encode_seconds)
+
+
+def manifest_path(output_path: str) -> Path:
+    """Return the incremental-compose manifest path stored next to an output."""
+    return Path(f"{output_path}{MANIFEST_SUFFIX}")
+
+
+def encode_settings(encode: EncodeOptions) -> dict:
+    """Return the resolved encoder settings that shape an output file.
+
+    The encoder's worker count is left out: it changes how fast the output
+    is written, not what is written.
+    """
+    settings = asdict(encode)
+    settings.pop("jobs", None)
+    return settings
+
+
+def build_manifest(
+    items: List[Item],
+    canvas_size: tuple[int, int],
+    strategy: str,
+    previous: dict | None = None,
+    mode: str = "RGBA",
+    *,
+    encode: EncodeOptions | None = None,
+) -> dict:
+    """Describe a compose run for later incremental diffs.
+
+    Input hashes from ``previous`` are reused when a file's size and mtime
+    are unchanged, so unchanged sources are not re-read.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        canvas_size : Canvas (width, height).
+        strategy : Resample strategy used for the tiles.
+        previous : Previous manifest, if any.
+        mode : Canvas mode of the render.
+        encode : Resolved encoder options of the output.
+
+    Returns
+    -------
+        JSON-serializable manifest (without output stamps).
+    """
+    known = {}
+    for entry in (previous or {}).get("items", []):
+        known[(entry["path"], entry["size"], entry["mtime_ns"])] = entry["digest"]
+
+    entries = []
+    digests: dict[str, tuple[int, int, str]] = {}
+    for it in items:
+        path = os.path.realpath(it.file)
+        if path not in digests:
+            st = os.stat(path)
+            digest = known.get((path, st.st_size, st.st_mtime_ns)) or file_digest(path)
+            digests[path] = (st.st_size, st.st_mtime_ns, digest)
+        size, mtime_ns, digest = digests[path]
+        entries.append({
+            "file": it.file,
+            "path": path,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "digest": digest,
+            "x": it.x,
+            "y": it.y,
+            "w": it.w,
+            "h": it.h,
+        })
+    return {
+        "version": MANIFEST_VERSION,
+        "canvas": list(canvas_size),
+        "strategy": strategy,
+        "mode": mode,
+        "encode": None if encode is None else encode_settings(encode),
+        "items": entries,
+    }
+
+
+def output_stamp(output_path: str) -> list[int] | None:
+    """Return [size, mtime_ns] of an output file, or None if missing."""
+    try:
+        st = os.stat(output_path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def dirty_rects(previous: dict, current: dict) -> List[tuple[int, int, int, int]]:
+    """Return merged rectangles that differ between two manifests.
+
+    Items are compared by layout index; any change in source content,
+    position or size marks both the old and the new rectangle dirty.
+
+    Parameters
+    ----------
+        previous : Manifest of the last render.
+        current : Manifest of the layout about to be rendered.
+
+    Returns
+    -------
+        Non-overlapping-ish (x0, y0, x1, y1) boxes clipped to the canvas.
+    """
+    keys = ("digest", "x", "y", "w", "h")
+    old_items = previous["items"]
+    new_items = current["items"]
+    rects = []
+    for idx in range(max(len(old_items), len(new_items))):
+        old = old_items[idx] if idx < len(old_items) else None
+        new = new_items[idx] if idx < len(new_items) else None
+        if old and new and all(old[k] == new[k] for k in keys):
+            continue
+        for entry in (old, new):
+            if entry:
+                rects.append((entry["x"], entry["y"], entry["x"] + entry["w"], entry["y"] + entry["h"]))
+
+    canvas_w, canvas_h = current["canvas"]
+    clipped = []
+    for x0, y0, x1, y1 in rects:
+        box = (max(0, x0), max(0, y0), min(canvas_w, x1), min(canvas_h, y1))
+        if box[0] < box[2] and box[1] < box[3]:
+            clipped.append(box)
+
+    # Merge overlapping boxes so shared pixels are rendered once: a box that
+    # overlaps a settled one absorbs it and goes back on the worklist.
+    merged: List[tuple[int, int, int, int]] = []
+    while clipped:
+        a = clipped.pop()
+        b = next(
+            (box for box in merged if a[0] < box[2] and box[0] < a[2] and a[1] < box[3] and box[1] < a[3]),
+            None,
+        )
+        if b is None:
+            merged.append(a)
+        else:
+            merged.remove(b)
+            clipped.append((min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])))
+    return merged
+
+
+def compose_regions(
+    canvas: Image.Image,
+    items: List[Item],
+    rects: List[tuple[int, int, int, int]],
+    *,
+    jobs: int | None = None,
+    executor: str = "thread",
+    cache: TileCache | None = None,
+    strategy: str = "exact",
+    profile: ComposeProfile | None = None,
+) -> None:
+    """Re-render rectangles of an existing canvas in place.
+
+    Each rectangle is rebuilt from transparent, pasting every item that
+    intersects it in layout order, so overlaps resolve as in a full render.
+    Only intersecting items are loaded.
+
+    Parameters
+    ----------
+        canvas : Previous output to patch.
+        items : Parsed layout items.
+        rects : (x0, y0, x1, y1) boxes to re-render.
+        jobs : Worker count for decode/resize.
+        executor : Worker pool type, ``"thread"`` or ``"process"``.
+        cache : Optional persistent tile cache.
+        strategy : Resample strategy, one of ``RESAMPLE_STRATEGIES``.
+        profile : Optional profile receiving ``load`` and ``paste`` stages.
+    """
+    def hits(it: Item, box: tuple[int, int, int, int]) -> bool:
+        x0, y0, x1, y1 = tile_box(it)
+        return x0 < box[2] and x1 > box[0] and y0 < box[3] and y1 > box[1]
+
+    needed = [it for it in items if any(hits(it, box) for box in rects)]
+    with profile_stage(profile, "load"):
+        tiles = dict(zip(
+            (tile_key(it) for it in needed),
+            load_tiles(
+                needed, jobs=jobs, executor=executor, cache=cache, strategy=strategy, profile=profile
+            ),
+        ))
+    with profile_stage(profile, "paste"):
+        for box in rects:
+            region = Image.new(canvas.mode, (box[2] - box[0], box[3] - box[1]))
+            for it in items:
+                if hits(it, box):
+                    x0, y0 = tile_box(it)[:2]
+                    region.paste(tiles[tile_key(it)], (x0 - box[0], y0 - box[1]))
+            canvas.paste(region, box[:2])
+
+
+@dataclass
+class IncrementalUpdate:
+    """Regions an incremental compose re-rendered into the previous output."""
+    rects: List[tuple[int, int, int, int]]
+    area: int
+    # None when nothing changed and the output was left as it was.
+    stats: EncodeStats | None = None
+
+
+def compose_incremental(
+    items: List[Item],
+    canvas_size: tuple[int, int],
+    output_path: str,
+    *,
+    jobs: int | None = None,
+    executor: str = "thread",
+    cache: TileCache | None = None,
+    strategy: str = "exact",
+    encode: EncodeOptions | None = None,
+    mode: str = "RGBA",
+    profile: ComposeProfile | None = None,
+) -> IncrementalUpdate | None:
+    """Patch only the changed regions of a previous output, if possible.
+
+    Parameters
+    ----------
+        items : Parsed layout items.
+        canvas_size : Canvas (width, height).
+        output_path : Output path holding the previous render.
+        jobs : Worker count for decode/resize.
+        executor : Worker pool type, ``"thread"`` or ``"process"``.
+        cache : Optional persistent tile cache.
+        strategy : Resample strategy, one of ``RESAMPLE_STRATEGIES``.
+        encode : Output encoder options.
+        mode : Canvas mode; a change from the previous render forces a full one.
+        profile : Optional profile receiving stage timings and byte counts.
+
+    Returns
+    -------
+        The re-rendered regions once the output is up to date, or None if a
+        full render is needed (no usable previous output, different
+        settings, or a raw output, which cannot be read back).
+    """
+    encode = resolve_encode(encode, output_path)
+    if encode.format == "raw":
+        return None
+    path = manifest_path(output_path)
+    try:
+        previous = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    expected = {
+        "version": MANIFEST_VERSION,
+        "canvas": list(canvas_size),
+        "strategy": strategy,
+        "mode": mode,
+        "encode": encode_settings(encode),
+        "output": output_stamp(output_path),
+    }
+    if any(previous.get(key) != value for key, value in expected.items()):
+        return None
+
+    current = build_manifest(items, canvas_size, strategy, previous, mode, encode=encode)
+    rects = dirty_rects(previous, current)
+    update = IncrementalUpdate(rects, sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in rects))
+    if rects:
+        try:
+            with Image.open(output_path) as im:
+                canvas = im.convert(mode)
+        except OSError:
+            # Unreadable previous output (e.g. replaced by another tool).
+            return None
+        compose_regions(
+            canvas,
+            items,
+            rects,
+            jobs=jobs,
+            executor=executor,
+            cache=cache,
+            strategy=strategy,
+            profile=profile,
+        )
+        update.stats = encode_image(canvas, output_path, encode)
+        if profile is not None:
+            profile.add("encode", update.stats.seconds)
+            profile.bytes_written += update.stats.bytes_written
+    current["output"] = output_stamp(output_path)
+    path.write_text(json.dumps(current, indent=2), encoding="utf-8")
+    return update
+
+
+@dataclass
+class Layout:
+    """A parsed layout file: its items, canvas size and output path."""
+    items: List[Item]
+    canvas_size: tuple[int, int]
+    output: str
+
+
+def load_layout(
+    config_path: Path,
+    output_override: str | None = None,
+    cache: LayoutCache | None = None,
+) -> Layout:
+    """Read and validate a layout file (YAML, JSON or TOML).
+
+    Parameters
+    ----------
+        config_path : Path to the layout file.
+        output_override : Optional output path to override the layout output.
+        cache : Optional parsed-layout cache; a hit skips parsing and
+            validation while the file's mtime and size are unchanged.
+
+    Returns
+    -------
+        Parsed layout.
+
+    Raises
+    ------
+        SystemExit
+            If the file is invalid or required fields are missing.
+    """
+    stamp = cache.stamp(config_path) if cache is not None else None
+    record = cache.get(stamp) if stamp is not None else None
+    if record is not None:
+        layout = Layout(
+            items=[Item(*row) for row in record["items"]],
+            canvas_size=tuple(record["canvas"]),
+            output=record["output"],
+        )
+    else:
+        layout = parse_layout(load_layout_file(config_path))
+        if stamp is not None:
+            cache.put(stamp, {
+                "canvas": list(layout.canvas_size),
+                "output": layout.output,
+                "items": [[it.file, it.x, it.y, it.w, it.h, it.resolution] for it in layout.items],
+            })
+    if output_override:
+        layout = replace(layout, output=output_override)
+    return layout
+
+
+def parse_layout(data: dict, output_override: str | None = None) -> Layout:
+    """Validate an already-loaded layout mapping.
+
+    The canvas is ``canvas_width`` x ``canvas_height`` when both are set,
+    otherwise the extent of the items.
+
+    Parameters
+    ----------
+        data : Layout mapping (as loaded from YAML or JSON).
+        output_override : Optional output path to override the layout output.
+
+    Returns
+    -------
+        Parsed layout.
+
+    Raises
+    ------
+        SystemExit
+            If required fields are missing or invalid.
+    """
+    if not isinstance(data, dict):
+        raise SystemExit("Config root must be a mapping/object.")
+    output_path = output_override or data.get("output") or "wallpaper.png"
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        raise SystemExit("Config must include non-empty 'items' list.")
+
+    # Optional explicit canvas size
+    canvas_w = data.get("canvas_width")
+    canvas_h = data.get("canvas_height")
+    if canvas_w is not None and canvas_h is not None:
+        try:
+            canvas_w = int(canvas_w)
+            canvas_h = int(canvas_h)
+        except Exception as exc:
+            raise SystemExit("canvas_width and canvas_height must be integers") from exc
+        if canvas_w <= 0 or canvas_h <= 0:
+            raise SystemExit("canvas_width and canvas_height must be > 0")
+
+    parsed = parse_items(items)
+
+    if canvas_w is None or canvas_h is None:
+        canvas_w = max(it.x + it.w for it in parsed)
+        canvas_h = max(it.y + it.h for it in parsed)
+    return Layout(items=parsed, canvas_size=(canvas_w, canvas_h), output=output_path)
+
+
+@dataclass
+class ComposeOptions:
+    """Worker, cache, resample and profiling settings for the compose API."""
+    jobs: int | None = None
+    executor: str = "thread"
+    cache: TileCache | None = None
+    strategy: str = "exact"
+    memo: TileMemo | None = None
+    pool: Executor | None = field(default=None, repr=False)
+    release_tiles: bool = False
+    profile: ComposeProfile | None = field(default=None, repr=False)
+
+
+LayoutLike = Union[Layout, Mapping, Sequence[Item]]
+
+
+def as_layout(layout: LayoutLike, canvas_size: tuple[int, int] | None = None) -> Layout:
+    """Normalize a layout mapping, ``Layout`` or list of ``Item`` objects.
+
+    Parameters
+    ----------
+        layout : Parsed layout mapping (as loaded from YAML/JSON), a
+            ``Layout``, or a sequence of ``Item`` objects.
+        canvas_size : Canvas (width, height); defaults to the layout's
+            explicit canvas or the extent of the items.
+
+    Returns
+    -------
+        Layout with resolved canvas size.
+
+    Raises
+    ------
+        SystemExit
+            If the layout is invalid or empty.
+    """
+    if isinstance(layout, Layout):
+        parsed = layout
+    elif isinstance(layout, Mapping):
+        parsed = parse_layout(dict(layout))
+    else:
+        items = list(layout)
+        if not items or not all(isinstance(it, Item) for it in items):
+            raise SystemExit("Layout must be a mapping or a non-empty list of Item objects.")
+        parsed = Layout(
+            items=items,
+            canvas_size=(max(it.x + it.w for it in items), max(it.y + it.h for it in items)),
+            output="",
+        )
+    if canvas_size is not None:
+        parsed = replace(parsed, canvas_size=tuple(canvas_size))
+    return parsed
+
+
+def compose_image(
+    layout: LayoutLike,
+    options: ComposeOptions | None = None,
+    canvas_size: tuple[int, int] | None = None,
+    mode: str | None = None,
+) -> Image.Image:
+    """Compose a layout into an in-memory image, without touching disk.
+
+    Items hidden by later items or outside the canvas are never opened (see
+    ``cull_hidden``).
+
+    Parameters
+    ----------
+        layout : Layout mapping, ``Layout``, or sequence of ``Item`` objects.
+        options : Worker, cache and resample settings.
+        canvas_size : Optional canvas (width, height) override.
+        mode : ``"RGB"`` or ``"RGBA"``; by default RGB when opaque items
+            cover the canvas (see ``canvas_mode``), else RGBA.
+
+    Returns
+    -------
+        Composed image.
+
+    Raises
+    ------
+        SystemExit
+            If the layout or options are invalid.
+    """
+    parsed = as_layout(layout, canvas_size)
+    parsed = replace(parsed, items=cull_hidden(parsed.items, parsed.canvas_size))
+    opts = options or ComposeOptions()
+    if mode is None:
+        mode = canvas_mode(parsed.items, parsed.canvas_size)
+    return compose_canvas(
+        parsed.items,
+        parsed.canvas_size,
+        jobs=opts.jobs,
+        executor=opts.executor,
+        cache=opts.cache,
+        strategy=opts.strategy,
+        release_tiles=opts.release_tiles,
+        mode=mode,
+        memo=opts.memo,
+        pool=opts.pool,
+        profile=opts.profile,
+    )
+
+
+def compose_bytes(
+    layout: LayoutLike,
+    format: str = "png",  # pylint: disable=redefined-builtin
+    options: ComposeOptions | None = None,
+    encode: EncodeOptions | None = None,
+    canvas_size: tuple[int, int] | None = None,
+) -> bytes:
+    """Compose a layout and return the encoded file contents.
+
+    Parameters
+    ----------
+        layout : Layout mapping, ``Layout``, or sequence of ``Item`` objects.
+        format : Output format, one of ``OUTPUT_FORMATS``.
+        options : Worker, cache and resample settings.
+        encode : Encoder tuning (its ``format`` is replaced by ``format``).
+        canvas_size : Optional canvas (width, height) override.
+
+    Returns
+    -------
+        Encoded image bytes.
+
+    Raises
+    ------
+        SystemExit
+            If the layout, options or format are invalid.
+    """
+    opts = resolve_encode(replace(encode or EncodeOptions(), format=format), f"image.{format}")
+    image = compose_image(
+        layout, options, canvas_size, mode="RGBA" if opts.format == "raw" else None
+    )
+    buffer = io.BytesIO()
+    stats = encode_image(image, buffer, opts)
+    if options is not None and options.profile is not None:
+        options.profile.add("encode", stats.seconds)
+        options.profile.bytes_written += stats.bytes_written
+    return buffer.getvalue()
+
+
+def compose_into(
+    layout: LayoutLike,
+    buffer,
+    options: ComposeOptions | None = None,
+    canvas_size: tuple[int, int] | None = None,
+    mode: str = "RGBA",
+) -> tuple[int, int]:
+    """Compose a layout as raw pixel rows into a caller-provided buffer.
+
+    Any writable, C-contiguous object supporting the buffer protocol works
+    (``bytearray``, ``memoryview``, ``mmap``, shared memory, NumPy arrays).
+    Rows are written top to bottom with ``len(mode)`` bytes per pixel.
+
+    Parameters
+    ----------
+        layout : Layout mapping, ``Layout``, or sequence of ``Item`` objects.
+        buffer : Writable buffer of at least width * height * len(mode) bytes.
+        options : Worker, cache and resample settings.
+        canvas_size : Optional canvas (width, height) override.
+        mode : ``"RGBA"`` (default) or ``"RGB"``.
+
+    Returns
+    -------
+        The canvas (width, height) written.
+
+    Raises
+    ------
+        ValueError
+            If the mode is unsupported or the buffer is read-only or too small.
+        SystemExit
+            If the layout or options are invalid.
+    """
+    if mode not in ("RGB", "RGBA"):
+        raise ValueError(f"Unsupported buffer mode: {mode}")
+    view = memoryview(buffer)
+    if view.readonly:
+        raise ValueError("Buffer is read-only")
+    view = view.cast("B")
+    parsed = as_layout(layout, canvas_size)
+    needed = parsed.canvas_size[0] * parsed.canvas_size[1] * len(mode)
+    if view.nbytes < needed:
+        raise ValueError(f"Buffer holds {view.nbytes} bytes, {needed} needed")
+    image = compose_image(parsed, options, mode=mode)
+    view[:needed] = image.tobytes()
+    return image.size
@@ -0,0 +1,351 @@
+"""Axis-aligned rectangle helpers used by the compose planners and the editor."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections.abc import Hashable, Iterator
+from typing import Iterable, List, Tuple
+
+
+Rect = Tuple[int, int, int, int]
+
+
+def clip_rect(rect: Rect, box: Rect) -> Rect | None:
+    """Clip a rectangle to a bounding box.
+
+    Parameters
+    ----------
+        rect : (x0, y0, x1, y1) rectangle.
+        box : (x0, y0, x1, y1) bounds.
+
+    Returns
+    -------
+        The clipped rectangle, or None if nothing of it is inside ``box``.
+    """
+    x0, y0 = max(rect[0], box[0]), max(rect[1], box[1])
+    x1, y1 = min(rect[2], box[2]), min(rect[3], box[3])
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return (x0, y0, x1, y1)
+
+
+def _covered_slabs(rects: List[Rect]) -> Iterator[Tuple[int, int, int]]:
+    """Yield ``(left, right, covered)`` for each slab between distinct x edges.
+
+    Sweeps the left and right edges in x order while a segment tree over
+    the distinct y edges counts how often each y span is covered, so each
+    edge costs O(log n) and ``covered`` (the height of the union within the
+    slab) is read off the root.
+    """
+    ys = sorted({y for r in rects for y in (r[1], r[3])})
+    row = {y: idx for idx, y in enumerate(ys)}
+    segments = max(1, len(ys) - 1)
+    count = [0] * (4 * segments)
+    length = [0] * (4 * segments)
+
+    def update(node: int, lo: int, hi: int, span: Tuple[int, int], delta: int) -> None:
+        start, stop = span
+        if stop <= lo or hi <= start:
+            return
+        if start <= lo and hi <= stop:
+            count[node] += delta
+        else:
+            mid = (lo + hi) // 2
+            update(2 * node, lo, mid, span, delta)
+            update(2 * node + 1, mid, hi, span, delta)
+        if count[node]:
+            length[node] = ys[hi] - ys[lo]
+        elif hi - lo == 1:
+            length[node] = 0
+        else:
+            length[node] = length[2 * node] + length[2 * node + 1]
+
+    events = sorted(
+        (x, delta, r[1], r[3]) for r in rects for x, delta in ((r[0], 1), (r[2], -1))
+    )
+    for idx, (x, delta, top, bottom) in enumerate(events):
+        update(1, 0, segments, (row[top], row[bottom]), delta)
+        if idx + 1 < len(events) and events[idx + 1][0] > x:
+            yield x, events[idx + 1][0], length[1]
+
+
+def union_area(rects: Iterable[Rect]) -> int:
+    """Return the area covered by the union of rectangles.
+
+    Sweeps the x edges with a segment tree over the y edges, so overlaps
+    are counted once and n rectangles cost O(n log n).
+
+    Parameters
+    ----------
+        rects : (x0, y0, x1, y1) rectangles; empty ones are ignored.
+
+    Returns
+    -------
+        Covered area in pixels.
+    """
+    rects = [r for r in rects if r[0] < r[2] and r[1] < r[3]]
+    return sum((right - left) * covered for left, right, covered in _covered_slabs(rects))
+
+
+def covers(rects: Iterable[Rect], box: Rect) -> bool:
+    """Return True if the rectangles jointly cover every pixel of ``box``.
+
+    Runs the ``union_area`` sweep over the clipped rectangles and stops at
+    the first slab that is not covered top to bottom.
+
+    Parameters
+    ----------
+        rects : (x0, y0, x1, y1) rectangles.
+        box : (x0, y0, x1, y1) area to test.
+
+    Returns
+    -------
+        Whether ``box`` is fully covered.
+    """
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return True
+    clipped: List[Rect] = [c for c in (clip_rect(r, box) for r in rects) if c]
+    edge = box[0]
+    for left, right, covered in _covered_slabs(clipped):
+        if left != edge or covered != box[3] - box[1]:
+            return False
+        edge = right
+    return edge == box[2]
+
+
+def overlapping_pairs(rects: List[Rect]) -> List[Tuple[int, int]]:
+    """Return index pairs ``(i, j)``, ``i < j``, of rectangles that overlap.
+
+    Sweeps the rectangles in order of their left edge, keeping only those
+    whose right edge is still ahead, so disjoint layouts cost a sort.
+
+    Parameters
+    ----------
+        rects : (x0, y0, x1, y1) rectangles; touching edges do not overlap.
+
+    Returns
+    -------
+        Overlapping pairs, sorted.
+    """
+    order = sorted(range(len(rects)), key=lambda idx: rects[idx][0])
+    active: List[int] = []
+    pairs = []
+    for idx in order:
+        x0, y0, _x1, y1 = rects[idx]
+        active = [other for other in active if rects[other][2] > x0]
+        for other in active:
+            if rects[other][1] < y1 and rects[other][3] > y0:
+                pairs.append((min(idx, other), max(idx, other)))
+        active.append(idx)
+    return sorted(pairs)
+
+
+def cut_rect(rect: Rect, hole: Rect) -> List[Rect]:
+    """Return ``rect`` minus ``hole`` as at most four disjoint rectangles.
+
+    Parameters
+    ----------
+        rect : (x0, y0, x1, y1) rectangle.
+        hole : (x0, y0, x1, y1) rectangle to cut out.
+
+    Returns
+    -------
+        Full-width bands above and below the hole, then the pieces left and
+        right of it; ``[rect]`` when they do not overlap.
+    """
+    inner = clip_rect(hole, rect)
+    if inner is None:
+        return [rect]
+    x0, y0, x1, y1 = rect
+    pieces = []
+    if inner[1] > y0:
+        pieces.append((x0, y0, x1, inner[1]))
+    if inner[3] < y1:
+        pieces.append((x0, inner[3], x1, y1))
+    if inner[0] > x0:
+        pieces.append((x0, inner[1], inner[0], inner[3]))
+    if inner[2] < x1:
+        pieces.append((inner[2], inner[1], x1, inner[3]))
+    return pieces
+
+
+class RectIndex:
+    """Uniform-grid index of rectangles for overlap queries within a box."""
+
+    def __init__(self, box: Rect, cells: int = 32):
+        """Create an empty index over ``box`` split into ``cells`` x ``cells`` bins."""
+        self.box = box
+        self.cell_w = max(1, -(-(box[2] - box[0]) // cells))
+        self.cell_h = max(1, -(-(box[3] - box[1]) // cells))
+        self.rects: List[Rect] = []
+        self._bins: dict[Tuple[int, int], List[int]] = {}
+
+    def _cells(self, rect: Rect) -> Tuple[range, range]:
+        x0, y0 = self.box[0], self.box[1]
+        return (
+            range((rect[0] - x0) // self.cell_w, (rect[2] - 1 - x0) // self.cell_w + 1),
+            range((rect[1] - y0) // self.cell_h, (rect[3] - 1 - y0) // self.cell_h + 1),
+        )
+
+    def add(self, rect: Rect) -> None:
+        """Index a rectangle lying inside the box."""
+        idx = len(self.rects)
+        self.rects.append(rect)
+        cols, rows = self._cells(rect)
+        for col in cols:
+            for row in rows:
+                self._bins.setdefault((col, row), []).append(idx)
+
+    def overlapping(self, rect: Rect) -> List[Rect]:
+        """Return the indexed rectangles overlapping ``rect`` (inside the box)."""
+        cols, rows = self._cells(rect)
+        if len(cols) * len(rows) >= len(self.rects):
+            # Scanning everything is cheaper than visiting the bins.
+            candidates: Iterable[Rect] = self.rects
+        else:
+            found = set()
+            for col in cols:
+                for row in rows:
+                    found.update(self._bins.get((col, row), ()))
+            candidates = (self.rects[idx] for idx in sorted(found))
+        x0, y0, x1, y1 = rect
+        return [
+            other for other in candidates
+            if other[0] < x1 and x0 < other[2] and other[1] < y1 and y0 < other[3]
+        ]
+
+
+def visible_parts(rects: List[Rect], box: Rect) -> List[List[Rect]]:
+    """Return the visible parts of rectangles painted in order over ``box``.
+
+    Rectangles are visited last to first while the area painted so far is
+    kept as disjoint pieces in a ``RectIndex``; each rectangle's visible
+    part is what remains after cutting out the pieces it overlaps, and is
+    then added to the painted area. The index only grows by visible area,
+    so stacks of covered rectangles stay cheap.
+
+    Parameters
+    ----------
+        rects : (x0, y0, x1, y1) rectangles in paint order.
+        box : (x0, y0, x1, y1) visible area, usually the canvas.
+
+    Returns
+    -------
+        Per rectangle, the disjoint rectangles of it left visible; empty for
+        rectangles that are fully hidden or outside ``box``.
+    """
+    painted = RectIndex(box)
+    parts: List[List[Rect]] = [[] for _ in rects]
+    for idx in range(len(rects) - 1, -1, -1):
+        clipped = clip_rect(rects[idx], box)
+        if clipped is None:
+            continue
+        fragments = [clipped]
+        for piece in painted.overlapping(clipped):
+            fragments = [part for fragment in fragments for part in cut_rect(fragment, piece)]
+            if not fragments:
+                break
+        for fragment in fragments:
+            painted.add(fragment)
+        parts[idx] = sorted(fragments)
+    return parts
+
+
+class EdgeIndex:
+    """Sorted edge positions of spans along one axis, for snapping.
+
+    Each span (an item's x or y extent) contributes its start and end edge.
+    Distinct positions are kept in a sorted list with a count per position,
+    so ``move`` is a couple of bisects and ``snap`` only visits the
+    positions within the threshold.
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        self._positions: List[int] = []
+        self._counts: dict[int, int] = {}
+        self._spans: dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def _add_edge(self, pos: int) -> None:
+        count = self._counts.get(pos, 0)
+        if not count:
+            insort(self._positions, pos)
+        self._counts[pos] = count + 1
+
+    def _remove_edge(self, pos: int) -> None:
+        count = self._counts[pos] - 1
+        if count:
+            self._counts[pos] = count
+        else:
+            del self._counts[pos]
+            del self._positions[bisect_left(self._positions, pos)]
+
+    def move(self, key: Hashable, start: int, length: int) -> None:
+        """Add span ``key`` at ``start``, or move it there if already indexed."""
+        old = self._spans.get(key)
+        if old == (start, start + length):
+            return
+        if old is not None:
+            self.remove(key)
+        self._spans[key] = (start, start + length)
+        self._add_edge(start)
+        self._add_edge(start + length)
+
+    def remove(self, key: Hashable) -> None:
+        """Drop span ``key`` if indexed."""
+        span = self._spans.pop(key, None)
+        if span is not None:
+            self._remove_edge(span[0])
+            self._remove_edge(span[1])
+
+    def clear(self) -> None:
+        """Drop every span."""
+        self._positions.clear()
+        self._counts.clear()
+        self._spans.clear()
+
+    def nearest(self, pos: int, threshold: int, exclude: Hashable = None) -> int | None:
+        """Return the indexed edge closest to ``pos`` within ``threshold``.
+
+        Edges that belong only to span ``exclude`` are skipped.
+        """
+        own = self._spans.get(exclude, ()) if exclude is not None else ()
+        best = None
+        idx = bisect_left(self._positions, pos - threshold)
+        while idx < len(self._positions) and self._positions[idx] <= pos + threshold:
+            edge = self._positions[idx]
+            idx += 1
+            if self._counts[edge] <= sum(1 for mine in own if mine == edge):
+                continue
+            if best is None or abs(edge - pos) < abs(best - pos):
+                best = edge
+        return best
+
+    def snap(
+        self, key: Hashable, start: int, length: int, threshold: int
+    ) -> Tuple[int, int | None]:
+        """Snap a span so its start or end lands on the closest other edge.
+
+        Parameters
+        ----------
+            key : Span being moved; its own edges are ignored.
+            start : Proposed start of the span.
+            length : Span length.
+            threshold : Largest distance that snaps.
+
+        Returns
+        -------
+            (start, edge): the snapped start and the edge it aligned to, or
+            the proposed start and None when no edge is close enough.
+        """
+        best_start, best_edge = start, None
+        for offset in (0, length):
+            edge = self.nearest(start + offset, threshold, key)
+            if edge is not None and (
+                best_edge is None or abs(edge - offset - start) < abs(best_start - start)
+            ):
+                best_start, best_edge = edge - offset, edge
+        return best_start, best_edge
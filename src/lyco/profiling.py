@@ -0,0 +1,93 @@
+"""Per-stage and per-tile timing reports for ``lyco compose --profile``."""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterator
+
+
+PROFILE_VERSION = 1
+TILE_STAGES = ("open", "decode", "convert", "resize")
+
+
+class ComposeProfile:
+    """Collect stage durations, tile timings and byte counts for one compose.
+
+    Stage durations are wall time in the compose thread. Tile records come
+    from the decode workers; their per-stage times are also summed into
+    ``tile_stages``, which can exceed the ``load`` stage when workers run in
+    parallel. Safe to update from several threads.
+    """
+
+    def __init__(self):
+        """Create an empty profile and start its wall clock."""
+        self.stages: dict[str, float] = {}
+        self.tiles: list[dict] = []
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._started = time.perf_counter()
+        self._wall: float | None = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add ``seconds`` to stage ``name``."""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add_tile(self, record: dict) -> None:
+        """Record one tile load (see ``engine.load_tile_profiled``)."""
+        with self._lock:
+            self.tiles.append(record)
+            self.bytes_read += record.get("bytes_read", 0)
+
+    def finish(self) -> None:
+        """Stop the wall clock; later ``to_dict`` calls report the same time."""
+        if self._wall is None:
+            self._wall = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        """Return the JSON-ready report, slowest tiles first."""
+        with self._lock:
+            tiles = sorted(self.tiles, key=lambda rec: rec["seconds"], reverse=True)
+            tile_stages = {
+                name: sum(rec.get("stages", {}).get(name, 0.0) for rec in tiles)
+                for name in TILE_STAGES
+            }
+            return {
+                "version": PROFILE_VERSION,
+                "wall_seconds": (
+                    self._wall if self._wall is not None else time.perf_counter() - self._started
+                ),
+                "stages": dict(self.stages),
+                "tile_stages": tile_stages,
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+                "tiles": tiles,
+            }
+
+    def write(self, target: str) -> None:
+        """Write the report as JSON to a path, or to stdout for ``"-"``."""
+        text = json.dumps(self.to_dict(), indent=2) + "\n"
+        if target == "-":
+            sys.stdout.write(text)
+        else:
+            Path(target).write_text(text, encoding="utf-8")
+
+
+def profile_stage(profile: ComposeProfile | None, name: str) -> AbstractContextManager:
+    """Return ``profile.stage(name)``, or a no-op context without a profile."""
+    return nullcontext() if profile is None else profile.stage(name)
@@ -0,0 +1,430 @@
+"""Long-lived local compose service (``lyco serve``).
+
+Layouts are POSTed as YAML or JSON documents and composed with a worker
+pool and in-memory tile memo that live as long as the server, so repeat
+requests skip interpreter startup and cold decodes.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from . import engine
+from .encode import EncodeOptions, encode_image
+from .tile_cache import TileCache, TileMemo
+
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_MEMO_BYTES = 512 * 1024 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+CONTENT_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "tiff": "image/tiff",
+    "raw": "application/octet-stream",
+}
+
+
+class ServiceBusy(Exception):
+    """Raised when the request queue is full."""
+
+
+class ComposeService:
+    """Compose state shared by all requests: pool, tile memo and counters."""
+
+    def __init__(
+        self,
+        *,
+        jobs: int | None = None,
+        executor: str = "thread",
+        cache: TileCache | None = None,
+        strategy: str = "exact",
+        encode: EncodeOptions | None = None,
+        max_concurrency: int | None = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        memo_bytes: int = DEFAULT_MEMO_BYTES,
+        output_dir: str | None = None,
+    ):
+        """Create the service and its worker pool.
+
+        Parameters
+        ----------
+            jobs : Decode/resize workers shared by all requests.
+            executor : Worker pool type, ``"thread"`` or ``"process"``.
+            cache : Optional persistent tile cache.
+            strategy : Resample strategy, one of ``RESAMPLE_STRATEGIES``.
+            encode : Default encoder options (format defaults to PNG).
+            max_concurrency : Requests composed at once (defaults to ``jobs``).
+            max_queue : Requests allowed to wait for a slot; more get HTTP 503.
+            memo_bytes : Cap on decoded tile bytes kept in memory.
+            output_dir : Directory that ``output`` paths are confined to;
+                without it server-side writes are refused.
+
+        Raises
+        ------
+            SystemExit
+                If the worker options or limits are invalid.
+        """
+        self.jobs = engine.check_pool_args(jobs, executor, strategy)
+        self.max_concurrency = max_concurrency or self.jobs
+        if self.max_concurrency < 1 or max_queue < 0:
+            raise SystemExit("max concurrency must be >= 1 and max queue >= 0")
+        self.max_queue = max_queue
+        self.cache = cache
+        self.encode = encode or EncodeOptions()
+        self.output_dir = Path(output_dir).resolve() if output_dir is not None else None
+        self.memo = TileMemo(max_bytes=memo_bytes)
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        self.pool = pool_cls(max_workers=self.jobs)
+        self.options = engine.ComposeOptions(
+            jobs=self.jobs,
+            executor=executor,
+            cache=cache,
+            strategy=strategy,
+            memo=self.memo,
+            pool=self.pool,
+        )
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.pending = 0
+        self.active = 0
+        self.peak_queue = 0
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.compose_seconds = 0.0
+
+    def render(
+        self,
+        data: dict,
+        fmt: str | None = None,
+        preset: str | None = None,
+        output: str | None = None,
+    ):
+        """Compose a layout mapping, waiting for a free slot first.
+
+        Parameters
+        ----------
+            data : Layout mapping.
+            fmt : Output format override (``OUTPUT_FORMATS``).
+            preset : Encoder preset override.
+            output : Write the result to this path, relative to ``output_dir``,
+                instead of returning it.
+
+        Returns
+        -------
+            Tuple of (encoded bytes or None when written, resolved options,
+            encoder statistics, canvas size).
+
+        Raises
+        ------
+            ServiceBusy
+                If ``max_queue`` requests are already waiting.
+            SystemExit
+                If the layout or options are invalid, or ``output`` is outside
+                ``output_dir``.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.pending >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                raise ServiceBusy(f"queue full ({self.max_queue} waiting)")
+            self.pending += 1
+            self.peak_queue = max(self.peak_queue, self.pending - self.max_concurrency)
+        try:
+            with self._slots:
+                with self._lock:
+                    self.active += 1
+                try:
+                    start = time.perf_counter()
+                    result = self._compose(data, fmt, preset, output)
+                    with self._lock:
+                        self.compose_seconds += time.perf_counter() - start
+                        self.succeeded += 1
+                    return result
+                finally:
+                    with self._lock:
+                        self.active -= 1
+        except (Exception, SystemExit):
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def output_path(self, output: str) -> str:
+        """Resolve a requested output path inside ``output_dir``.
+
+        Parameters
+        ----------
+            output : Requested path, relative to ``output_dir``.
+
+        Returns
+        -------
+            Absolute output path.
+
+        Raises
+        ------
+            SystemExit
+                If no ``output_dir`` is set or the path resolves outside it.
+        """
+        if self.output_dir is None:
+            raise SystemExit("server-side output is disabled; start lyco serve with --output-dir")
+        target = (self.output_dir / output).resolve()
+        if target == self.output_dir or not target.is_relative_to(self.output_dir):
+            raise SystemExit(f"output must be a file inside {self.output_dir}: {output}")
+        return str(target)
+
+    def _compose(self, data: dict, fmt: str | None, preset: str | None, output: str | None):
+        if output is not None:
+            output = self.output_path(output)
+        layout = engine.parse_layout(data, output)
+        opts = replace(self.encode, format=fmt or self.encode.format, preset=preset or self.encode.preset)
+        if output is None and not opts.format:
+            opts.format = "png"
+        opts = engine.resolve_encode(opts, output or f"response.{opts.format}")
+        canvas = engine.compose_image(layout, self.options, mode="RGBA" if opts.format == "raw" else None)
+        if output is not None:
+            return None, opts, encode_image(canvas, output, opts), layout.canvas_size
+        buffer = io.BytesIO()
+        stats = encode_image(canvas, buffer, opts)
+        return buffer.getvalue(), opts, stats, layout.canvas_size
+
+    def metrics(self) -> dict:
+        """Return request, queue and tile memo counters."""
+        with self._lock:
+            data = {
+                "uptime_seconds": round(time.time() - self.started, 3),
+                "requests_total": self.requests,
+                "requests_ok": self.succeeded,
+                "requests_failed": self.failed,
+                "requests_rejected": self.rejected,
+                "active": self.active,
+                "queue_depth": self.pending - self.active,
+                "peak_queue_depth": self.peak_queue,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "compose_seconds_total": round(self.compose_seconds, 6),
+            }
+        data.update({
+            "memo_entries": len(self.memo),
+            "memo_bytes": self.memo.bytes,
+            "memo_hits": self.memo.hits,
+            "memo_misses": self.memo.misses,
+        })
+        if self.cache is not None:
+            data.update({"cache_hits": self.cache.hits, "cache_misses": self.cache.misses})
+        return data
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        self.pool.shutdown()
+
+
+def parse_document(body: bytes, content_type: str = "") -> dict:
+    """Parse a POSTed layout document (JSON, or YAML otherwise).
+
+    Parameters
+    ----------
+        body : Request body.
+        content_type : Request Content-Type header.
+
+    Returns
+    -------
+        Layout mapping.
+
+    Raises
+    ------
+        SystemExit
+            If the document cannot be parsed.
+    """
+    text = body.decode("utf-8")
+    try:
+        if "json" in content_type:
+            return json.loads(text)
+        # YAML is a superset of JSON, so JSON bodies without the header parse too.
+        return engine.parse_yaml(text)
+    except Exception as exc:
+        raise SystemExit(f"Invalid layout document: {exc}") from exc
+
+
+class ComposeRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler: ``POST /compose`` and ``GET /metrics``."""
+
+    server_version = "lyco-serve"
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, service: ComposeService, quiet: bool = False, **kwargs):
+        # Set before the base class, whose __init__ handles the request.
+        self.service = service
+        self.quiet = quiet
+        super().__init__(*args, **kwargs)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: dict, headers: dict | None = None) -> None:
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json", headers)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve ``/metrics`` (JSON counters)."""
+        if urlsplit(self.path).path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Compose the POSTed layout; ``?output=PATH`` writes it under ``--output-dir``."""
+        url = urlsplit(self.path)
+        if url.path != "/compose":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length header"})
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": f"layout documents are limited to {MAX_BODY_BYTES} bytes"})
+            return
+        body = self.rfile.read(length)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            data = parse_document(body, self.headers.get("Content-Type", ""))
+            payload, opts, stats, size = self.service.render(
+                data, query.get("format"), query.get("encode"), query.get("output")
+            )
+        except ServiceBusy as exc:
+            self._send_json(503, {"error": str(exc)}, {"Retry-After": "1"})
+            return
+        except (SystemExit, ValueError, OSError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        except Exception as exc:  # pylint: disable=broad-except
+            self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+
+        headers = {
+            "X-Lyco-Size": f"{size[0]}x{size[1]}",
+            "X-Lyco-Encode-Seconds": f"{stats.seconds:.6f}",
+        }
+        if payload is None:
+            self._send_json(200, {
+                "output": query["output"],
+                "format": opts.format,
+                "bytes": stats.bytes_written,
+                "size": list(size),
+            }, headers)
+        else:
+            self._send(200, payload, CONTENT_TYPES.get(opts.format, "application/octet-stream"), headers)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded HTTP server on a Unix domain socket."""
+    daemon_threads = True
+
+
+def make_server(
+    service: ComposeService,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+    quiet: bool = False,
+):
+    """Create (but do not start) an HTTP server bound to ``service``.
+
+    Parameters
+    ----------
+        service : Shared compose service.
+        host : TCP host (ignored with ``socket_path``).
+        port : TCP port; 0 picks a free one.
+        socket_path : Listen on this Unix socket instead of TCP.
+        quiet : Suppress per-request access logging.
+
+    Returns
+    -------
+        Bound server; call ``serve_forever()`` to run it.
+
+    Raises
+    ------
+        SystemExit
+            If ``socket_path`` exists and is not a socket.
+    """
+    handler = partial(ComposeRequestHandler, service=service, quiet=quiet)
+    if socket_path is not None:
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise SystemExit(f"{socket_path} exists and is not a socket; refusing to replace it")
+            os.unlink(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def run_server(
+    service: ComposeService,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+) -> None:
+    """Serve until interrupted, then release the pool and socket.
+
+    Parameters
+    ----------
+        service : Shared compose service.
+        host : TCP host (ignored with ``socket_path``).
+        port : TCP port.
+        socket_path : Listen on this Unix socket instead of TCP.
+    """
+    server = make_server(service, host, port, socket_path)
+    address = server.server_address
+    where = socket_path or f"http://{address[0]}:{address[1]}"
+    print(f"Serving compose on {where} (POST /compose, GET /metrics)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped serving.")
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.unlink(socket_path)
@@ -0,0 +1,556 @@
+"""Compose caches: decoded tiles (on disk and in memory), parsed layouts and GUI previews."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+TILE_SUFFIX = ".tile"
+LAYOUT_CACHE_VERSION = 1
+LAYOUT_SUFFIX = ".layout.json"
+PREVIEW_CACHE_VERSION = 1
+DEFAULT_PREVIEW_MAX_BYTES = 256 * 1024 * 1024
+PREVIEW_SUFFIX = ".preview.webp"
+
+
+def default_cache_dir() -> Path:
+    """Return the default tile cache directory.
+
+    ``LYCO_CACHE_DIR`` wins when set; otherwise the XDG cache dir
+    (``$XDG_CACHE_HOME`` or ``~/.cache``) is used, or ``%LOCALAPPDATA%`` on
+    Windows.
+
+    Returns
+    -------
+        Path to the tile cache directory (not created).
+    """
+    override = os.environ.get("LYCO_CACHE_DIR")
+    if override:
+        return Path(override)
+    if sys.platform.startswith("win") and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "lyco" / "cache" / "tiles"
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "lyco" / "tiles"
+
+
+def file_digest(path: str | Path) -> str:
+    """Return a content hash of a file.
+
+    Parameters
+    ----------
+        path : File to hash.
+
+    Returns
+    -------
+        Hex digest of the file contents.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskStore:
+    """Directory of cache entry files with a size cap and LRU eviction.
+
+    Entries live in ``root/<key[:2]>/<key><suffix>``. Recency is tracked
+    through file mtimes, which subclasses bump on every hit with ``_touch``.
+    Subclasses define the keys and the entry encoding.
+    """
+
+    suffix = ""
+
+    def __init__(self, root: Path, max_bytes: int):
+        """Create a store rooted at ``root``.
+
+        Parameters
+        ----------
+            root : Cache directory.
+            max_bytes : Size cap; least recently used entries are evicted above it.
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total: int | None = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _store(self, path: Path, data: bytes) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            # An overwritten entry no longer counts towards the total.
+            replaced = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_name, path)
+        except OSError:
+            Path(tmp_name).unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _mtime, size, _path in self._entries())
+            else:
+                self._total += len(data) - replaced
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob(f"*/*{self.suffix}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """Evict least recently used entries until under ``max_bytes``.
+
+        Returns
+        -------
+            Number of entries removed.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _mtime, size, _path in entries)
+            removed = 0
+            for _mtime, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self._total = total
+            return removed
+
+    def stats(self) -> dict:
+        """Return cache statistics.
+
+        Returns
+        -------
+            Mapping with root, entry count, bytes used, cap, and run hit/miss counts.
+        """
+        entries = self._entries()
+        return {
+            "root": str(self.root),
+            "entries": len(entries),
+            "bytes": sum(size for _mtime, size, _path in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> int:
+        """Remove every cached entry.
+
+        Returns
+        -------
+            Number of entries removed.
+        """
+        removed = 0
+        with self._lock:
+            for _mtime, _size, path in self._entries():
+                path.unlink(missing_ok=True)
+                removed += 1
+            self._total = 0
+        return removed
+
+
+class TileCache(DiskStore):
+    """Content-addressed store of ready-to-paste tiles with LRU eviction.
+
+    Tiles are stored as raw pixel bytes (no encode/decode cost).
+    """
+
+    suffix = TILE_SUFFIX
+
+    def __init__(self, root: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Create a cache rooted at ``root``.
+
+        Parameters
+        ----------
+            root : Cache directory (defaults to ``default_cache_dir()``).
+            max_bytes : Size cap; least recently used tiles are evicted above it.
+        """
+        super().__init__(root if root is not None else default_cache_dir(), max_bytes)
+        self._digests: dict[tuple[str, int, int], str] = {}
+
+    def source_digest(self, file_path: str) -> str:
+        """Return the content hash of a source, memoized on path+size+mtime.
+
+        Parameters
+        ----------
+            file_path : Source image path.
+
+        Returns
+        -------
+            Hex digest of the file contents.
+        """
+        st = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            digest = file_digest(file_path)
+            self._digests[memo_key] = digest
+        return digest
+
+    def key(
+        self,
+        file_path: str,
+        size: tuple[int, int],
+        resample: str = "lanczos",
+        mode: str = "RGBA",
+        crop: tuple[int, int, int, int] | None = None,
+    ) -> str:
+        """Build the cache key for a tile.
+
+        Parameters
+        ----------
+            file_path : Source image path.
+            size : Target (width, height).
+            resample : Resample filter/strategy name.
+            mode : Tile colour mode.
+            crop : Part of the tile stored, or None for all of it.
+
+        Returns
+        -------
+            Hex cache key.
+        """
+        parts = [
+            f"v{CACHE_VERSION}",
+            self.source_digest(file_path),
+            f"{size[0]}x{size[1]}",
+            resample,
+            mode,
+        ]
+        if crop is not None:
+            parts.append("crop=" + ",".join(map(str, crop)))
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def get(self, key: str, size: tuple[int, int], mode: str = "RGBA") -> Image.Image | None:
+        """Return a cached tile, or None on a miss.
+
+        Parameters
+        ----------
+            key : Cache key from ``key()``.
+            size : Expected tile (width, height).
+            mode : Expected tile colour mode.
+
+        Returns
+        -------
+            The cached image, or None.
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        expected = size[0] * size[1] * len(mode)
+        if len(data) != expected:
+            # Truncated or foreign file; drop it and treat as a miss.
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return Image.frombytes(mode, size, data)
+
+    def put(self, key: str, image: Image.Image) -> None:
+        """Store a tile and evict old entries if the cap is exceeded.
+
+        Parameters
+        ----------
+            key : Cache key from ``key()``.
+            image : Tile to store.
+        """
+        self._store(self._path(key), image.tobytes())
+
+
+def _image_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+class TileMemo:
+    """In-process store of ready tiles for long-running composes.
+
+    Entries are keyed on the source's path, size and mtime, so an edited
+    file misses while every other tile stays warm. ``prune()`` drops tiles
+    that went unused since the previous prune; with ``max_bytes`` set, least
+    recently used tiles are also dropped as the memo fills.
+    """
+
+    def __init__(self, max_bytes: int | None = None):
+        """Create an empty memo.
+
+        Parameters
+        ----------
+            max_bytes : Optional cap on the pixel bytes held.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._tiles: OrderedDict[tuple, Image.Image] = OrderedDict()
+        self._used: set[tuple] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(
+        file_path: str,
+        size: tuple[int, int],
+        resample: str = "lanczos",
+        crop: tuple[int, int, int, int] | None = None,
+    ) -> tuple:
+        """Build the memo key for a tile.
+
+        Parameters
+        ----------
+            file_path : Source image path.
+            size : Target (width, height).
+            resample : Resample filter/strategy name.
+            crop : Part of the tile stored, or None for all of it.
+
+        Returns
+        -------
+            Hashable key including the source's current size and mtime.
+        """
+        st = os.stat(file_path)
+        return (os.path.realpath(file_path), st.st_size, st.st_mtime_ns, tuple(size), resample, crop)
+
+    def get(self, key: tuple) -> Image.Image | None:
+        """Return a memoized tile, or None on a miss."""
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._used.add(key)
+            self._tiles.move_to_end(key)
+            return tile
+
+    def put(self, key: tuple, image: Image.Image) -> None:
+        """Store a tile."""
+        with self._lock:
+            old = self._tiles.pop(key, None)
+            if old is not None:
+                self.bytes -= _image_bytes(old)
+            self._tiles[key] = image
+            self.bytes += _image_bytes(image)
+            self._used.add(key)
+            while self.max_bytes is not None and self.bytes > self.max_bytes and len(self._tiles) > 1:
+                _key, evicted = self._tiles.popitem(last=False)
+                self.bytes -= _image_bytes(evicted)
+
+    def prune(self) -> int:
+        """Drop tiles not used since the last prune.
+
+        Returns
+        -------
+            Number of tiles dropped.
+        """
+        with self._lock:
+            stale = [key for key in self._tiles if key not in self._used]
+            for key in stale:
+                self.bytes -= _image_bytes(self._tiles.pop(key))
+            self._used = set()
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+class LayoutCache:
+    """On-disk cache of parsed and validated layouts.
+
+    Entries are keyed on the layout's resolved path and checked against its
+    mtime and size. Each layout file owns one entry, overwritten when the
+    file changes, so edits do not accumulate stale entries.
+    """
+
+    def __init__(self, root: Path | None = None):
+        """Create a layout cache rooted at ``root``.
+
+        Parameters
+        ----------
+            root : Cache directory (defaults to ``layouts`` under
+                ``default_cache_dir()``).
+        """
+        self.root = Path(root) if root is not None else default_cache_dir() / "layouts"
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def stamp(path: str | Path) -> list | None:
+        """Return the (resolved path, mtime, size) key of a layout file.
+
+        Take the stamp before reading the file, so a write that races the
+        parse leaves an entry that no longer matches.
+
+        Returns
+        -------
+            The stamp, or None if the file cannot be stat'ed.
+        """
+        real = os.path.realpath(path)
+        try:
+            st = os.stat(real)
+        except OSError:
+            return None
+        return [real, st.st_mtime_ns, st.st_size]
+
+    def _path(self, real: str) -> Path:
+        digest = hashlib.blake2b(real.encode("utf-8"), digest_size=20).hexdigest()
+        return self.root / f"{digest}{LAYOUT_SUFFIX}"
+
+    def get(self, stamp: list) -> dict | None:
+        """Return the cached record for ``stamp``, or None on a miss."""
+        try:
+            entry = json.loads(self._path(stamp[0]).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entry = None
+        if (
+            not isinstance(entry, dict)
+            or entry.get("version") != LAYOUT_CACHE_VERSION
+            or entry.get("stamp") != stamp
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["layout"]
+
+    def put(self, stamp: list, record: dict) -> None:
+        """Store a parsed layout record under ``stamp``."""
+        path = self._path(stamp[0])
+        text = json.dumps({"version": LAYOUT_CACHE_VERSION, "stamp": stamp, "layout": record})
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(text)
+            os.replace(tmp_name, path)
+        except OSError:
+            Path(tmp_name).unlink(missing_ok=True)
+
+    def clear(self) -> int:
+        """Remove every cached layout.
+
+        Returns
+        -------
+            Number of layouts removed.
+        """
+        removed = 0
+        if self.root.exists():
+            for path in self.root.glob(f"*{LAYOUT_SUFFIX}"):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+class PreviewCache(DiskStore):
+    """On-disk store of GUI editor previews with LRU eviction.
+
+    Entries are keyed on the source's resolved path, mtime and size plus the
+    preview size, so an edited source misses. Previews are stored as lossy
+    WebP, a few KiB each.
+    """
+
+    suffix = PREVIEW_SUFFIX
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        max_bytes: int = DEFAULT_PREVIEW_MAX_BYTES,
+        quality: int = 85,
+    ):
+        """Create a preview cache rooted at ``root``.
+
+        Parameters
+        ----------
+            root : Cache directory (defaults to ``previews`` under
+                ``default_cache_dir()``).
+            max_bytes : Size cap; least recently used previews are evicted above it.
+            quality : WebP quality of stored previews.
+        """
+        super().__init__(root if root is not None else default_cache_dir() / "previews", max_bytes)
+        self.quality = quality
+
+    def key(self, file_path: str, size: tuple[int, int]) -> str:
+        """Build the cache key for a preview of ``file_path`` at ``size``.
+
+        Raises
+        ------
+            OSError
+                If the source cannot be stat'ed.
+        """
+        real = os.path.realpath(file_path)
+        st = os.stat(real)
+        parts = [
+            f"v{PREVIEW_CACHE_VERSION}",
+            real,
+            str(st.st_mtime_ns),
+            str(st.st_size),
+            f"{size[0]}x{size[1]}",
+        ]
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def get(self, key: str, size: tuple[int, int]) -> Image.Image | None:
+        """Return a cached RGBA preview of ``size``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with Image.open(path) as stored:
+                image = stored.convert("RGBA")
+        except OSError:
+            self.misses += 1
+            return None
+        if image.size != tuple(size):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return image
+
+    def put(self, key: str, image: Image.Image) -> None:
+        """Store a preview and evict old entries if the cap is exceeded."""
+        buffer = io.BytesIO()
+        try:
+            image.save(buffer, format="WEBP", quality=self.quality, method=0)
+        except (OSError, KeyError, ValueError):
+            # Pillow built without WebP support: run uncached.
+            return
+        self._store(self._path(key), buffer.getvalue())
@@ -0,0 +1,213 @@
+"""File change watchers for ``lyco watch``: inotify on Linux, stat polling elsewhere."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Iterable
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Directory events that can change a watched file, including editors that
+# save by writing a temp file and renaming it over the original.
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+def _watch_names(paths: Iterable[str]) -> dict[str, str]:
+    """Map the absolute and resolved form of each path to the path itself."""
+    names = {}
+    for path in paths:
+        names[os.path.abspath(path)] = path
+        names[os.path.realpath(path)] = path
+    return names
+
+
+class PollingWatcher:
+    """Detect changes by comparing file size and mtime at a fixed interval.
+
+    Works everywhere, including network volumes where inotify sees no
+    remote writes.
+    """
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        """Create a polling watcher.
+
+        Parameters
+        ----------
+            interval : Seconds between stat sweeps.
+        """
+        self.interval = interval
+        self._stamps: dict[str, tuple[int, int] | None] = {}
+
+    @staticmethod
+    def _stamp(path: str) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def watch(self, paths: Iterable[str]) -> None:
+        """Replace the watched set with ``paths`` and record their state."""
+        self._stamps = {path: self._stamp(path) for path in paths}
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Block until a watched file changes or ``timeout`` expires.
+
+        Parameters
+        ----------
+            timeout : Seconds to wait; None waits indefinitely.
+
+        Returns
+        -------
+            Changed paths (empty on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, stamp in self._stamps.items():
+                current = self._stamp(path)
+                if current != stamp:
+                    self._stamps[path] = current
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self) -> None:
+        """Release watcher resources (nothing to release for polling)."""
+
+
+class InotifyWatcher:
+    """Detect changes through Linux inotify, loaded from libc via ctypes.
+
+    The parent directory of every file is watched rather than the file
+    itself, so atomic saves (write to a temp file, rename over) are seen.
+    """
+
+    def __init__(self):
+        """Create an inotify instance.
+
+        Raises
+        ------
+            OSError
+                If inotify is unavailable on this platform.
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._dirs: dict[str, int] = {}
+        self._wds: dict[int, str] = {}
+        self._names: dict[str, str] = {}
+
+    def watch(self, paths: Iterable[str]) -> None:
+        """Replace the watched set with ``paths``.
+
+        Raises
+        ------
+            OSError
+                If a parent directory cannot be watched.
+        """
+        self._names = _watch_names(paths)
+        wanted = {os.path.dirname(name) for name in self._names}
+        for directory in set(self._dirs) - wanted:
+            self._libc.inotify_rm_watch(self._fd, self._dirs.pop(directory))
+        for directory in wanted - set(self._dirs):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"Cannot watch {directory}: {os.strerror(err)}")
+            self._dirs[directory] = wd
+        self._wds = {wd: directory for directory, wd in self._dirs.items()}
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Block until a watched file changes or ``timeout`` expires.
+
+        Parameters
+        ----------
+            timeout : Seconds to wait; None waits indefinitely.
+
+        Returns
+        -------
+            Changed paths (empty on timeout).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = set()
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                data = b""
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                directory = self._wds.get(wd)
+                if directory is None or not name:
+                    continue
+                path = self._names.get(os.path.join(directory, os.fsdecode(name)))
+                if path is not None:
+                    changed.add(path)
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Close the inotify descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def make_watcher(poll: bool = False, interval: float = DEFAULT_POLL_INTERVAL) -> InotifyWatcher | PollingWatcher:
+    """Return an inotify watcher when available, else a polling one.
+
+    Parameters
+    ----------
+        poll : Force the polling watcher (e.g. for network volumes).
+        interval : Polling interval in seconds.
+
+    Returns
+    -------
+        A watcher with ``watch()``, ``wait()`` and ``close()``.
+    """
+    if not poll:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            # Non-Linux platforms, or a libc without the inotify symbols.
+            pass
+    return PollingWatcher(interval)
@@ -0,0 +1,94 @@
+"""Tests for the in-memory compose API."""
+
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if SRC.exists():
+    sys.path.insert(0, str(SRC))
+
+import lyco  # noqa: E402
+from lyco import cli  # noqa: E402
+
+
+class TestComposeApi(unittest.TestCase):
+    """Tests for compose_image, compose_bytes and compose_into."""
+
+    def setUp(self):
+        from PIL import Image
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        items = []
+        for idx in range(3):
+            path = self.tmp_path / f"img{idx}.png"
+            Image.new("RGBA", (30, 20), (idx * 80, 90, 200 - idx * 60, 255 - idx * 40)).save(path)
+            items.append({"file": str(path), "x": idx * 12, "y": idx * 4, "resolution": "15x10"})
+        self.layout = {"items": items}
+        self.layout_path = self.tmp_path / "layout.yml"
+        cli.save_yaml(self.layout_path, self.layout)
+        self.expected = self.tmp_path / "expected.png"
+        cli.compose_from_yaml(self.layout_path, str(self.expected), cli.ComposeOptions(jobs=1))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _expected_pixels(self) -> bytes:
+        from PIL import Image
+
+        with Image.open(self.expected) as im:
+            return im.convert("RGBA").tobytes()
+
+    def test_compose_image_from_mapping_and_items(self):
+        image = lyco.compose_image(self.layout, lyco.ComposeOptions(jobs=1))
+        self.assertEqual(image.size, (39, 18))
+        self.assertEqual(image.convert("RGBA").tobytes(), self._expected_pixels())
+
+        items = lyco.parse_items(self.layout["items"])
+        from_items = lyco.compose_image(items, canvas_size=(40, 20))
+        self.assertEqual(from_items.size, (40, 20))
+        self.assertEqual(from_items.crop((0, 0, 39, 18)).tobytes(), image.tobytes())
+
+    def test_compose_bytes_matches_file_output(self):
+        from PIL import Image
+
+        self.assertEqual(lyco.compose_bytes(self.layout), self.expected.read_bytes())
+        webp = lyco.compose_bytes(self.layout, format="webp")
+        with Image.open(io.BytesIO(webp)) as im:
+            self.assertEqual((im.format, im.size), ("WEBP", (39, 18)))
+        self.assertEqual(len(lyco.compose_bytes(self.layout, format="raw")), 39 * 18 * 4)
+
+    def test_compose_into_writable_buffers(self):
+        buffer = bytearray(39 * 18 * 4 + 7)
+        self.assertEqual(lyco.compose_into(self.layout, buffer), (39, 18))
+        self.assertEqual(bytes(buffer[:39 * 18 * 4]), self._expected_pixels())
+
+        view = memoryview(bytearray(39 * 18 * 3))
+        lyco.compose_into(self.layout, view, mode="RGB")
+        with self.assertRaises(ValueError):
+            lyco.compose_into(self.layout, bytearray(10))
+        with self.assertRaises(ValueError):
+            lyco.compose_into(self.layout, bytes(39 * 18 * 4))
+
+    def test_profile_option(self):
+        profile = lyco.ComposeProfile()
+        data = lyco.compose_bytes(self.layout, options=lyco.ComposeOptions(jobs=1, profile=profile))
+        report = profile.to_dict()
+        self.assertEqual(set(report["stages"]), {"load", "paste", "encode"})
+        self.assertEqual(report["bytes_written"], len(data))
+        self.assertEqual([rec["source"] for rec in report["tiles"]], ["decode"] * 3)
+
+    def test_invalid_layouts(self):
+        with self.assertRaises(SystemExit):
+            lyco.compose_image({"items": []})
+        with self.assertRaises(SystemExit):
+            lyco.compose_image([])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for the benchmark baseline comparison."""
+
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import bench_compose as bench  # noqa: E402
+
+
+def _report(wall: float, load: float, rss: float) -> dict:
+    return {"cases": {"hd-1-jpeg-unique": {
+        "wall_s": wall,
+        "stages": {"parse": 0.01, "load": load},
+        "peak_rss_mb": rss,
+    }}}
+
+
+class TestCompareReports(unittest.TestCase):
+    """Tests for regression detection against a baseline."""
+
+    def test_regressions_past_threshold_and_floor(self):
+        baseline = _report(wall=1.0, load=0.5, rss=100.0)
+        self.assertEqual(bench.compare_reports(baseline, _report(1.2, 0.6, 110.0), 0.25), [])
+        regressions = bench.compare_reports(baseline, _report(1.5, 0.5, 200.0), 0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("hd-1-jpeg-unique wall_s: 1.000 -> 1.500"))
+        self.assertIn("peak_rss_mb", regressions[1])
+
+        # Tiny timings under the absolute floor are treated as noise.
+        self.assertEqual(bench.compare_reports(_report(0.01, 0.01, 10.0), _report(0.04, 0.04, 20.0), 0.25), [])
+        self.assertEqual(bench.compare_reports(baseline, {"cases": {"new-case": {}}}, 0.25), [])
+
+    def test_suites_cover_requested_range(self):
+        cases = bench.SUITES["full"]
+        self.assertEqual({case.canvas for case in cases}, set(bench.CANVASES))
+        self.assertEqual({case.fmt for case in cases}, {"jpeg", "png"})
+        self.assertEqual((min(c.items for c in cases), max(c.items for c in cases)), (1, 1000))
+        self.assertTrue(any(case.unique < case.items for case in cases))
+
+
+if __name__ == "__main__":
+    unittest.main()
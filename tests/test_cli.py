@@ -1,5 +1,6 @@
 ﻿"""Tests for CLI helpers and compose workflow."""
 
+import importlib.util
 import os
 import sys
 import tempfile
@@ -12,7 +13,26 @@ SRC = ROOT / "src"
 if SRC.exists():
     sys.path.insert(0, str(SRC))
 
-from lyco import cli  # noqa: E402
+from lyco import cli, engine  # noqa: E402
+
+
+def write_layout(tmp_path: Path) -> Path:
+    """Write six overlapping RGBA sources and a layout using them; return the layout path."""
+    from PIL import Image
+
+    lines = ["output: out.png", "items:"]
+    for idx in range(6):
+        img = tmp_path / f"img{idx}.png"
+        Image.new("RGBA", (40 + idx * 7, 30 + idx * 5), (idx * 40, 255 - idx * 30, 90, 255)).save(img)
+        lines += [
+            f"  - file: \"{img}\"",
+            f"    x: {(idx % 3) * 24}",
+            f"    y: {(idx // 3) * 18}",
+            "    resolution: \"32x24\"",
+        ]
+    layout = tmp_path / "layout.yml"
+    layout.write_text("\n".join(lines), encoding="utf-8")
+    return layout
 
 
 class TestParseResolution(unittest.TestCase):
@@ -41,6 +61,80 @@ class TestYamlHelpers(unittest.TestCase):
             self.assertEqual(loaded, data)
 
 
+class TestLayoutFormats(unittest.TestCase):
+    """Tests for JSON/TOML layouts and the parsed-layout cache."""
+
+    LAYOUT = {
+        "canvas_width": 50,
+        "canvas_height": 40,
+        "output": "out.png",
+        "items": [
+            {"file": "a.png", "x": 0, "y": 0, "resolution": "20x10"},
+            {"file": "b.png", "x": 20, "y": 5, "resolution": "30x35"},
+        ],
+    }
+    TOML = """canvas_width = 50
+canvas_height = 40
+output = "out.png"
+
+[[items]]
+file = "a.png"
+x = 0
+y = 0
+resolution = "20x10"
+
+[[items]]
+file = "b.png"
+x = 20
+y = 5
+resolution = "30x35"
+"""
+
+    def test_json_and_toml_match_yaml(self):
+        import json
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            yml = tmp_path / "layout.yml"
+            cli.save_yaml(yml, self.LAYOUT)
+            (tmp_path / "layout.json").write_text(json.dumps(self.LAYOUT), encoding="utf-8")
+            (tmp_path / "layout.toml").write_text(self.TOML, encoding="utf-8")
+            (tmp_path / "out.png.lyco.json").write_text("{}", encoding="utf-8")
+            expected = cli.load_layout(yml)
+            for name in ("layout.json", "layout.toml"):
+                self.assertEqual(cli.load_layout(tmp_path / name), expected)
+            self.assertEqual(
+                [path.name for path in cli.find_layouts([tmp])],
+                ["layout.json", "layout.toml", "layout.yml"],
+            )
+            (tmp_path / "broken.toml").write_text("items = [", encoding="utf-8")
+            with self.assertRaises(SystemExit):
+                cli.load_layout(tmp_path / "broken.toml")
+
+    def test_layout_cache_skips_parsing_until_file_changes(self):
+        from unittest import mock
+        from lyco.tile_cache import LayoutCache
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            path = tmp_path / "layout.yml"
+            cli.save_yaml(path, self.LAYOUT)
+            cache = LayoutCache(tmp_path / "cache")
+            with mock.patch.object(engine, "load_layout_file", wraps=engine.load_layout_file) as parse:
+                first = cli.load_layout(path, cache=cache)
+                again = cli.load_layout(path, "other.png", cache=cache)
+                self.assertEqual(parse.call_count, 1)
+                self.assertEqual(again.items, first.items)
+                self.assertEqual(again.output, "other.png")
+
+                cli.save_yaml(path, dict(self.LAYOUT, canvas_width=60))
+                os.utime(path, ns=(1, 1))
+                self.assertEqual(cli.load_layout(path, cache=cache).canvas_size, (60, 40))
+                self.assertEqual(parse.call_count, 2)
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            self.assertEqual(cache.clear(), 1)
+
+
 class TestCompose(unittest.TestCase):
     """Tests for composing a PNG from YAML."""
 
@@ -97,6 +191,916 @@ class TestCompose(unittest.TestCase):
                 cli.compose_from_yaml(layout, None)
 
 
+class TestComposeParallel(unittest.TestCase):
+    """Tests for the --jobs worker pool in compose."""
+
+    def test_parallel_output_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            serial = tmp_path / "serial.png"
+            cli.compose_from_yaml(layout, str(serial), cli.ComposeOptions(jobs=1))
+            for executor in cli.EXECUTORS:
+                out = tmp_path / f"{executor}.png"
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=4, executor=executor))
+                self.assertEqual(out.read_bytes(), serial.read_bytes(), msg=executor)
+
+    def test_invalid_jobs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            layout = write_layout(Path(tmp))
+            with self.assertRaises(SystemExit):
+                cli.compose_from_yaml(layout, str(Path(tmp) / "out.png"), cli.ComposeOptions(jobs=0))
+
+
+class TestComposeDedup(unittest.TestCase):
+    """Tests for in-run deduplication of identical tiles."""
+
+    def test_duplicate_items_decode_once(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            img = Path(tmp) / "img.png"
+            Image.new("RGBA", (20, 20), (0, 0, 255, 255)).save(img)
+            items = [
+                cli.Item(file=str(img), x=0, y=0, w=10, h=10, resolution="10x10"),
+                cli.Item(file=str(img), x=10, y=0, w=10, h=10, resolution="10x10"),
+                cli.Item(file=str(img), x=0, y=10, w=12, h=10, resolution="12x10"),
+                cli.Item(file=str(Path(tmp) / "." / "img.png"), x=10, y=10, w=10, h=10, resolution="10x10"),
+            ]
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                tiles = cli.load_tiles(items, jobs=1)
+            self.assertEqual(load_mock.call_count, 2)
+            self.assertIs(tiles[0], tiles[1])
+            self.assertIs(tiles[0], tiles[3])
+            self.assertEqual(tiles[2].size, (12, 10))
+
+
+class TestResampleStrategy(unittest.TestCase):
+    """Tests for the draft/reduce resample fast paths."""
+
+    PSNR_THRESHOLD = 30.0
+
+    @staticmethod
+    def _psnr(a, b) -> float:
+        import math
+        from PIL import ImageChops, ImageStat
+
+        stat = ImageStat.Stat(ImageChops.difference(a, b))
+        mse = sum(stat.sum2) / (len(stat.sum2) * a.width * a.height)
+        if mse == 0:
+            return float("inf")
+        return 10 * math.log10(255 ** 2 / mse)
+
+    def test_fast_strategies_stay_close_to_exact(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "large.jpg"
+            detail = Image.effect_mandelbrot((1600, 1200), (-2.0, -1.2, 1.0, 1.2), 64)
+            gradient = Image.linear_gradient("L").resize((1600, 1200))
+            Image.merge("RGB", (detail, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT))).save(
+                src, quality=92
+            )
+            exact = cli.load_tile(str(src), (200, 150), "exact")
+            for strategy in ("balanced", "fast"):
+                tile = cli.load_tile(str(src), (200, 150), strategy)
+                self.assertEqual((tile.mode, tile.size), ("RGB", (200, 150)))
+                self.assertGreaterEqual(self._psnr(exact, tile), self.PSNR_THRESHOLD, msg=strategy)
+
+    def test_invalid_strategy(self):
+        item = cli.Item(file="missing.png", x=0, y=0, w=1, h=1, resolution="1x1")
+        with self.assertRaises(SystemExit):
+            cli.load_tiles([item], jobs=1, strategy="bogus")
+
+
+class TestComposeBanded(unittest.TestCase):
+    """Tests for streaming banded composition."""
+
+    def test_banded_matches_full_canvas(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            full = tmp_path / "full.png"
+            cli.compose_from_yaml(layout, str(full), cli.ComposeOptions(jobs=1))
+            expected = Image.open(full).tobytes()
+            for name in ("banded.png", "banded.tif"):
+                out = tmp_path / name
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=2), band_height=7)
+                self.assertEqual(Image.open(out).convert("RGBA").tobytes(), expected, msg=name)
+
+    def test_banded_rejects_unsupported_format(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            layout = write_layout(Path(tmp))
+            with self.assertRaises(SystemExit):
+                cli.compose_from_yaml(layout, str(Path(tmp) / "out.jpg"), band_height=8)
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """Tests for --max-memory planning."""
+
+    def test_parse_memory_size(self):
+        self.assertEqual(cli.parse_memory_size("512M"), 512 * 1024 ** 2)
+        self.assertEqual(cli.parse_memory_size("2g"), 2 * 1024 ** 3)
+        self.assertEqual(cli.parse_memory_size("1.5KiB"), 1536)
+        self.assertEqual(cli.parse_memory_size("4096"), 4096)
+        with self.assertRaises(SystemExit):
+            cli.parse_memory_size("lots")
+        with self.assertRaises(SystemExit):
+            cli.parse_memory_size("0M")
+
+    def test_plan_degrades_to_fit_budget(self):
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            layout = write_layout(Path(tmp))
+            items = cli.parse_items(cli.load_yaml(layout)["items"])
+            with mock.patch.object(engine, "peak_rss_bytes", return_value=0):
+                roomy = cli.plan_memory(items, (96, 48), 10 ** 9, 4)
+                self.assertEqual((roomy.jobs, roomy.release_tiles, roomy.band_height), (4, False, None))
+                tight = cli.plan_memory(items, (96, 48), roomy.estimate() - 1, 4)
+                self.assertLess(tight.jobs, 4)
+                tiny = cli.plan_memory(items, (96, 48), 1, 4)
+                self.assertEqual(tiny.jobs, 1)
+                self.assertIsNotNone(tiny.band_height)
+
+    def test_budgeted_compose_matches_unbudgeted(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            full = tmp_path / "full.png"
+            cli.compose_from_yaml(layout, str(full), cli.ComposeOptions(jobs=1))
+            items = cli.parse_items(cli.load_yaml(layout)["items"])
+            size = Image.open(full).size
+            released = cli.compose_canvas(items, size, jobs=2, release_tiles=True)
+            self.assertEqual(released.tobytes(), Image.open(full).tobytes())
+            budget = tmp_path / "budget.png"
+            cli.compose_from_yaml(layout, str(budget), cli.ComposeOptions(jobs=2), max_memory=1)
+            self.assertEqual(Image.open(budget).tobytes(), Image.open(full).tobytes())
+
+
+class TestComposeIncremental(unittest.TestCase):
+    """Tests for incremental recompose via the output manifest."""
+
+    def test_dirty_rects_merge_overlapping_changes(self):
+        def manifest(*rects):
+            items = [{"digest": "d", "x": x, "y": y, "w": w, "h": h} for x, y, w, h in rects]
+            return {"canvas": [100, 100], "items": items}
+
+        previous = manifest((0, 0, 10, 10), (5, 5, 10, 10), (50, 50, 5, 5), (80, 80, 5, 5))
+        current = manifest((1, 0, 10, 10), (5, 6, 10, 10), (50, 50, 5, 5), (98, 80, 5, 5))
+        rects = engine.dirty_rects(previous, current)
+        self.assertEqual(sorted(rects), [(0, 0, 15, 16), (80, 80, 85, 85), (98, 80, 100, 85)])
+
+    def test_move_rerenders_only_dirty_items(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            out = tmp_path / "out.png"
+            cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            self.assertTrue(cli.manifest_path(str(out)).exists())
+
+            data = cli.load_yaml(layout)
+            data["items"][0]["x"] = 2
+            cli.save_yaml(layout, data)
+
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            # Item 1 plus the neighbours overlapping its old/new rectangles.
+            self.assertEqual(load_mock.call_count, 4)
+
+            expected = tmp_path / "expected.png"
+            cli.compose_from_yaml(layout, str(expected), cli.ComposeOptions(jobs=1))
+            self.assertEqual(Image.open(out).tobytes(), Image.open(expected).tobytes())
+
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            self.assertEqual(load_mock.call_count, 0)
+
+    def test_engine_returns_regions_without_printing(self):
+        import contextlib
+        import io
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            out = tmp_path / "out.png"
+            cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            data = cli.load_yaml(layout)
+            data["items"][0]["x"] = 2
+            cli.save_yaml(layout, data)
+
+            parsed = cli.load_layout(layout)
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                update = engine.compose_incremental(
+                    cli.cull_hidden(parsed.items, parsed.canvas_size),
+                    parsed.canvas_size,
+                    str(out),
+                    jobs=1,
+                    mode="RGBA",
+                )
+            self.assertEqual(stdout.getvalue(), "")
+            self.assertTrue(update.rects)
+            self.assertEqual(update.area, sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in update.rects))
+            self.assertEqual(update.stats.bytes_written, out.stat().st_size)
+
+    def test_external_output_change_forces_full_render(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            out = tmp_path / "out.png"
+            cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            reference = Image.open(out).tobytes()
+            Image.new("RGBA", (8, 8)).save(out)
+            cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            self.assertEqual(Image.open(out).tobytes(), reference)
+
+    def test_raw_output_and_encoder_changes_force_full_render(self):
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            raw = tmp_path / "out.raw"
+            cli.compose_from_yaml(layout, str(raw), cli.ComposeOptions(jobs=1), incremental=True)
+            data = cli.load_yaml(layout)
+            data["items"][0]["x"] = 2
+            cli.save_yaml(layout, data)
+            cli.compose_from_yaml(layout, str(raw), cli.ComposeOptions(jobs=1), incremental=True)
+            expected = tmp_path / "expected.raw"
+            cli.compose_from_yaml(layout, str(expected), cli.ComposeOptions(jobs=1))
+            self.assertEqual(raw.read_bytes(), expected.read_bytes())
+
+            out = tmp_path / "out.png"
+            cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1), incremental=True)
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                cli.compose_from_yaml(
+                    layout, str(out), cli.ComposeOptions(jobs=1), incremental=True,
+                    encode=cli.EncodeOptions(compress_level=1),
+                )
+            self.assertEqual(load_mock.call_count, 6)
+
+
+class TestSkipWork(unittest.TestCase):
+    """Tests for the already-sized and opaque-source fast paths."""
+
+    def _write_halves(self, tmp_path: Path, right_mode: str = "RGB") -> Path:
+        from PIL import Image
+
+        left = tmp_path / "left.png"
+        right = tmp_path / "right.png"
+        Image.linear_gradient("L").convert("RGB").save(left)
+        Image.new(right_mode, (64, 48), (30, 120, 210, 255)[:len(right_mode)]).save(right)
+        layout = tmp_path / "layout.yml"
+        layout.write_text(
+            "items:\n"
+            f"  - file: \"{left}\"\n    x: 0\n    y: 0\n    resolution: \"40x30\"\n"
+            f"  - file: \"{right}\"\n    x: 32\n    y: 0\n    resolution: \"32x30\"\n",
+            encoding="utf-8",
+        )
+        return layout
+
+    def test_opaque_tile_matches_rgba_resize(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src.jpg"
+            Image.effect_mandelbrot((300, 200), (-2.0, -1.2, 1.0, 1.2), 32).convert("RGB").save(src)
+            tile = cli.load_tile(str(src), (70, 45))
+            self.assertEqual(tile.mode, "RGB")
+            with Image.open(src) as im:
+                reference = im.convert("RGBA").resize((70, 45), Image.LANCZOS)
+            self.assertEqual(tile.convert("RGBA").tobytes(), reference.tobytes())
+
+    def test_sized_source_is_not_resampled(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src.png"
+            Image.new("RGBA", (20, 10), (1, 2, 3, 128)).save(src)
+            with mock.patch.object(Image.Image, "resize", side_effect=AssertionError):
+                tile = cli.load_tile(str(src), (20, 10))
+            self.assertEqual((tile.mode, tile.getpixel((0, 0))), ("RGBA", (1, 2, 3, 128)))
+
+    def test_covered_canvas_drops_alpha(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = self._write_halves(tmp_path)
+            out = tmp_path / "out.png"
+            cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1))
+            banded = tmp_path / "banded.png"
+            cli.compose_from_yaml(layout, str(banded), cli.ComposeOptions(jobs=1), band_height=7)
+            items = cli.parse_items(cli.load_yaml(layout)["items"])
+            reference = Image.new("RGBA", (64, 30))
+            for it in items:
+                with Image.open(it.file) as im:
+                    reference.paste(im.convert("RGBA").resize((it.w, it.h), Image.LANCZOS), (it.x, it.y))
+            for path in (out, banded):
+                with Image.open(path) as im:
+                    self.assertEqual(im.mode, "RGB", msg=path.name)
+                    self.assertEqual(im.convert("RGBA").tobytes(), reference.tobytes(), msg=path.name)
+
+    def test_alpha_or_gaps_keep_rgba_canvas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = self._write_halves(tmp_path, right_mode="RGBA")
+            items = cli.parse_items(cli.load_yaml(layout)["items"])
+            self.assertEqual(cli.canvas_mode(items, (64, 30)), "RGBA")
+
+            layout = self._write_halves(tmp_path)
+            items = cli.parse_items(cli.load_yaml(layout)["items"])
+            self.assertEqual(cli.canvas_mode(items, (64, 30)), "RGB")
+            self.assertEqual(cli.canvas_mode(items, (64, 31)), "RGBA")
+            items[1].x = 41
+            self.assertEqual(cli.canvas_mode(items, (73, 30)), "RGBA")
+
+
+class TestComposeProfile(unittest.TestCase):
+    """Tests for --profile timing reports and --cprofile dumps."""
+
+    def test_profile_report_matches_output(self):
+        import json
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            for name, kwargs in (("full.png", {}), ("banded.png", {"band_height": 10})):
+                out = tmp_path / name
+                plain = tmp_path / f"plain-{name}"
+                cli.compose_from_yaml(layout, str(plain), cli.ComposeOptions(jobs=2), **kwargs)
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=2), profile="", **kwargs)
+                self.assertEqual(out.read_bytes(), plain.read_bytes(), msg=name)
+
+                report = json.loads(Path(f"{out}.profile.json").read_text(encoding="utf-8"))
+                self.assertEqual(
+                    set(report["stages"]), {"parse", "validate", "load", "paste", "encode"}
+                )
+                self.assertEqual(report["bytes_written"], out.stat().st_size)
+                self.assertEqual(len(report["tiles"]), 6)
+                sources = sorted(tmp_path.glob("img*.png"))
+                self.assertEqual(report["bytes_read"], sum(path.stat().st_size for path in sources))
+                tile = report["tiles"][0]
+                self.assertEqual(tile["target_size"], [32, 24])
+                self.assertEqual(set(tile["stages"]), {"open", "decode", "convert", "resize"})
+                seconds = [rec["seconds"] for rec in report["tiles"]]
+                self.assertEqual(seconds, sorted(seconds, reverse=True))
+
+    def test_cprofile_dump(self):
+        import pstats
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            prof = tmp_path / "out.prof"
+            argv = [
+                "lyco", "compose", "-c", str(layout), "-o", str(tmp_path / "out.png"),
+                "-j", "1", "--no-cache", "--cprofile", str(prof), "--profile", str(tmp_path / "r.json"),
+            ]
+            with mock.patch.object(sys, "argv", argv):
+                cli.main()
+            self.assertTrue((tmp_path / "r.json").exists())
+            functions = {func[2] for func in pstats.Stats(str(prof)).stats}
+            self.assertIn("load_tile_profiled", functions)
+
+
+class TestValidate(unittest.TestCase):
+    """Tests for header-only layout validation and the compose pre-flight."""
+
+    def _write_layout(self, tmp_path: Path) -> Path:
+        from PIL import Image
+
+        Image.new("RGB", (40, 30), (10, 20, 30)).save(tmp_path / "small.png")
+        Image.new("RGB", (200, 150), (30, 20, 10)).save(tmp_path / "large.jpg")
+        layout = tmp_path / "layout.yml"
+        cli.save_yaml(layout, {
+            "canvas_width": 100,
+            "canvas_height": 60,
+            "items": [
+                {"file": str(tmp_path / "large.jpg"), "x": 0, "y": 0, "resolution": "60x40"},
+                {"file": str(tmp_path / "small.png"), "x": 50, "y": 20, "resolution": "80x60"},
+                {"file": str(tmp_path / "missing.png"), "x": 0, "y": 40, "resolution": "10x10"},
+                {"file": str(tmp_path / "large.jpg"), "x": 200, "y": 0, "resolution": "60x40"},
+            ],
+        })
+        return layout
+
+    def test_report_lists_errors_and_warnings(self):
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = self._write_layout(tmp_path)
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                report, = cli.validate_layouts([layout])
+                with self.assertRaises(SystemExit) as ctx:
+                    cli.compose_from_yaml(layout, str(tmp_path / "out.png"), cli.ComposeOptions(jobs=1))
+            self.assertEqual(load_mock.call_count, 0)
+            self.assertIn("missing.png: file not found", str(ctx.exception))
+
+            self.assertFalse(report.ok)
+            found = {(issue.item, issue.level, issue.message.split(": ")[-1]) for issue in report.issues}
+            self.assertEqual(found, {
+                (2, "warning", "upscaled 2.00x from 40x30 to 80x60"),
+                (2, "warning", "overlaps item(s) #1"),
+                (2, "warning", "partly off the canvas"),
+                (3, "error", "file not found"),
+                (4, "warning", "entirely off the canvas"),
+            })
+
+            cli.save_yaml(layout, dict(cli.load_yaml(layout), items=cli.load_yaml(layout)["items"][:2]))
+            report, = cli.validate_layouts([layout], jobs=2)
+            self.assertTrue(report.ok)
+            self.assertEqual(report.mode, "RGBA")
+            self.assertGreater(report.estimated_bytes, 100 * 60 * 4)
+            self.assertGreater(report.estimated_seconds, 0)
+
+    def test_preflight_checks_errors_only(self):
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = self._write_layout(tmp_path)
+            with mock.patch.object(cli, "overlapping_pairs", side_effect=AssertionError("swept")):
+                report = cli.validate_layout(cli.load_layout(layout), errors_only=True)
+                with mock.patch.object(cli, "validate_layout", wraps=cli.validate_layout) as check:
+                    with self.assertRaises(SystemExit):
+                        cli.compose_from_yaml(layout, str(tmp_path / "out.png"), cli.ComposeOptions(jobs=1))
+            self.assertTrue(check.call_args.kwargs["errors_only"])
+            self.assertEqual(
+                [(issue.item, issue.level) for issue in report.issues], [(3, "error")]
+            )
+
+    def test_cli_summary_and_strict(self):
+        import json
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            layout = self._write_layout(tmp_path)
+            data = cli.load_yaml(layout)
+            clean = tmp_path / "clean.yml"
+            cli.save_yaml(clean, dict(data, items=data["items"][:1]))
+            warned = tmp_path / "warned.yml"
+            cli.save_yaml(warned, dict(data, items=data["items"][:2]))
+            summary = tmp_path / "summary.json"
+            parser = cli.build_arg_parser()
+            cli.run_validate_command(
+                parser.parse_args(["validate", str(clean), str(warned), "--summary", str(summary)])
+            )
+            report = json.loads(summary.read_text(encoding="utf-8"))
+            self.assertEqual([entry["ok"] for entry in report], [True, True])
+            with self.assertRaises(SystemExit):
+                cli.run_validate_command(parser.parse_args(["validate", str(warned), "--strict"]))
+            with self.assertRaises(SystemExit):
+                cli.run_validate_command(parser.parse_args(["validate", str(tmp_path)]))
+
+    def test_overlapping_pairs(self):
+        from lyco.geometry import overlapping_pairs
+
+        rects = [(0, 0, 10, 10), (10, 0, 20, 10), (5, 5, 15, 15), (30, 30, 40, 40), (0, 9, 40, 31)]
+        self.assertEqual(overlapping_pairs(rects), [(0, 2), (0, 4), (1, 2), (1, 4), (2, 4), (3, 4)])
+
+
+class TestOcclusion(unittest.TestCase):
+    """Tests for culling items hidden by later items or off the canvas."""
+
+    def test_visible_parts(self):
+        from lyco.geometry import union_area, visible_parts
+
+        rects = [(0, 0, 10, 10), (2, 2, 6, 6), (0, 0, 4, 10), (20, 0, 30, 5), (1, 1, 3, 3)]
+        parts = visible_parts(rects, (0, 0, 12, 10))
+        self.assertEqual([union_area(part) for part in parts], [52, 8, 36, 0, 4])
+        self.assertEqual(
+            [sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in part) for part in parts],
+            [52, 8, 36, 0, 4],
+        )
+        self.assertEqual(union_area(rect for part in parts for rect in part), 100)
+        self.assertEqual(visible_parts([(0, 0, 5, 5)] * 3, (0, 0, 5, 5)), [[], [], [(0, 0, 5, 5)]])
+
+    def test_union_area_and_covers_match_pixel_counts(self):
+        import random
+        from lyco.geometry import covers, union_area
+
+        rng = random.Random(7)
+        for _ in range(300):
+            rects = []
+            for _ in range(rng.randint(0, 6)):
+                x0, y0 = rng.randint(-3, 10), rng.randint(-3, 10)
+                rects.append((x0, y0, x0 + rng.randint(0, 8), y0 + rng.randint(0, 8)))
+            pixels = {
+                (x, y) for x0, y0, x1, y1 in rects for x in range(x0, x1) for y in range(y0, y1)
+            }
+            self.assertEqual(union_area(rects), len(pixels), rects)
+            box = (rng.randint(-2, 3), rng.randint(-2, 3), rng.randint(4, 10), rng.randint(4, 10))
+            full = all((x, y) in pixels for x in range(box[0], box[2]) for y in range(box[1], box[3]))
+            self.assertEqual(covers(rects, box), full, (rects, box))
+
+    def test_hidden_items_are_not_opened(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            for name, colour in (("back", (200, 0, 0)), ("left", (0, 200, 0)), ("right", (0, 0, 200))):
+                Image.new("RGB", (40, 30), colour).save(tmp_path / f"{name}.png")
+            item = lambda name, x, res: {"file": str(tmp_path / name), "x": x, "y": 0, "resolution": res}
+            visible = [item("left.png", 0, "20x20"), item("right.png", 20, "20x20")]
+            layout = tmp_path / "layout.yml"
+            cli.save_yaml(layout, {
+                "canvas_width": 40,
+                "canvas_height": 20,
+                "items": [
+                    item("back.png", 0, "40x20"),
+                    item("missing.png", 10, "20x20"),
+                    item("missing.png", 50, "10x10"),
+                ] + visible,
+            })
+            report, = cli.validate_layouts([layout])
+            self.assertTrue(report.ok)
+            found = [
+                (issue.item, issue.message) for issue in report.issues
+                if not issue.message.startswith("overlaps")
+            ]
+            self.assertEqual(found, [
+                (1, "hidden by later items"),
+                (2, "hidden by later items"),
+                (3, "entirely off the canvas"),
+            ])
+
+            out = tmp_path / "out.png"
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1))
+            self.assertEqual(
+                sorted(Path(call.args[0]).name for call in load_mock.call_args_list),
+                ["left.png", "right.png"],
+            )
+            expected = cli.compose_image({"items": visible}, cli.ComposeOptions(jobs=1))
+            with Image.open(out) as im:
+                self.assertEqual(im.tobytes(), expected.tobytes())
+
+
+class TestCroppedTiles(unittest.TestCase):
+    """Tests for resampling only the visible part of partly hidden items."""
+
+    def _write_source(self, path: Path):
+        from PIL import Image, ImageChops
+
+        fractal = Image.effect_mandelbrot((240, 180), (-2.0, -1.1, 0.8, 1.1), 64)
+        gradient = Image.linear_gradient("L").resize((240, 180))
+        image = Image.merge("RGBA", (fractal, gradient, ImageChops.multiply(fractal, gradient), gradient))
+        image.save(path)
+
+    def test_crop_matches_full_resize(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "src.png"
+            self._write_source(source)
+            for size in ((100, 75), (97, 61), (240, 180), (300, 200)):
+                for strategy in cli.RESAMPLE_STRATEGIES:
+                    full = cli.load_tile(str(source), size, strategy)
+                    for crop in ((0, 0, 40, 30), (13, 7, size[0], size[1] - 3), (50, 20, 51, 60)):
+                        part = cli.load_tile(str(source), size, strategy, crop)
+                        self.assertEqual(
+                            part.tobytes(), full.crop(crop).tobytes(), msg=(size, strategy, crop)
+                        )
+
+    def test_partly_hidden_items_load_cropped_tiles(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            source = tmp_path / "src.png"
+            self._write_source(source)
+            Image.new("RGB", (20, 20), (0, 90, 200)).save(tmp_path / "cover.png")
+            items = [
+                {"file": str(source), "x": -30, "y": 10, "resolution": "120x90"},
+                {"file": str(tmp_path / "cover.png"), "x": 50, "y": 0, "resolution": "50x60"},
+                {"file": str(source), "x": 60, "y": 40, "resolution": "100x75"},
+                {"file": str(source), "x": 90, "y": 75, "resolution": "100x75"},
+            ]
+            layout = tmp_path / "layout.yml"
+            cli.save_yaml(layout, {"canvas_width": 100, "canvas_height": 80, "items": items})
+
+            expected = Image.new("RGBA", (100, 80))
+            for item in cli.parse_items(items):
+                expected.paste(cli.load_tile(item.file, (item.w, item.h)), (item.x, item.y))
+            self.assertEqual(
+                [it.crop for it in cli.cull_hidden(cli.parse_items(items), (100, 80))],
+                [(30, 0, 90, 70), None, (0, 0, 40, 40), (0, 0, 40, 40)],
+            )
+
+            out = tmp_path / "out.png"
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1))
+            self.assertEqual(
+                [call.args[3] for call in load_mock.call_args_list],
+                [(30, 0, 90, 70), None, (0, 0, 40, 40)],
+            )
+            with Image.open(out) as im:
+                self.assertEqual(im.convert("RGBA").tobytes(), expected.tobytes())
+            banded = tmp_path / "banded.png"
+            cli.compose_from_yaml(layout, str(banded), cli.ComposeOptions(jobs=1), band_height=9)
+            with Image.open(banded) as im:
+                self.assertEqual(im.convert("RGBA").tobytes(), expected.tobytes())
+
+    def test_cache_holds_whole_tiles_across_crop_changes(self):
+        from unittest import mock
+        from PIL import Image
+        from lyco.tile_cache import TileCache
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            source = tmp_path / "src.png"
+            self._write_source(source)
+            Image.new("RGB", (20, 20), (0, 90, 200)).save(tmp_path / "cover.png")
+            items = [
+                {"file": str(source), "x": 0, "y": 0, "resolution": "120x90"},
+                {"file": str(tmp_path / "cover.png"), "x": 70, "y": 0, "resolution": "30x60"},
+                {"file": str(source), "x": 60, "y": 50, "resolution": "100x75"},
+            ]
+            layout = tmp_path / "layout.yml"
+            cli.save_yaml(layout, {"canvas_width": 100, "canvas_height": 80, "items": items})
+            cache_dir = tmp_path / "cache"
+            args = cli.build_arg_parser().parse_args(
+                ["cache", "warm", "-c", str(layout), "-j", "1", "--cache-dir", str(cache_dir)]
+            )
+            cli.run_cache_command(args)
+
+            cache = TileCache(cache_dir)
+            out = tmp_path / "out.png"
+            with mock.patch.object(engine, "load_tile", side_effect=AssertionError("decoded")):
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1, cache=cache))
+                # Moving the covering item changes the mostly visible items' crops.
+                items[1]["x"] = 30
+                cli.save_yaml(layout, {"canvas_width": 100, "canvas_height": 80, "items": items})
+                cli.compose_from_yaml(layout, str(out), cli.ComposeOptions(jobs=1, cache=cache))
+            self.assertEqual(cache.stats()["entries"], 3)
+
+            uncached = tmp_path / "uncached.png"
+            cli.compose_from_yaml(layout, str(uncached), cli.ComposeOptions(jobs=1))
+            with Image.open(out) as im, Image.open(uncached) as ref:
+                self.assertEqual(im.tobytes(), ref.tobytes())
+
+    def test_default_cache_loads_mostly_hidden_items_cropped(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            source = tmp_path / "src.png"
+            self._write_source(source)
+            Image.new("RGB", (20, 20), (0, 90, 200)).save(tmp_path / "cover.png")
+            items = [
+                {"file": str(source), "x": -30, "y": 10, "resolution": "120x90"},
+                {"file": str(tmp_path / "cover.png"), "x": 50, "y": 0, "resolution": "50x60"},
+                {"file": str(source), "x": 60, "y": 40, "resolution": "100x75"},
+            ]
+            layout = tmp_path / "layout.yml"
+            cli.save_yaml(layout, {"canvas_width": 100, "canvas_height": 80, "items": items})
+            out = tmp_path / "out.png"
+            argv = ["lyco", "compose", "-c", str(layout), "-o", str(out), "-j", "1"]
+            env = {"LYCO_CACHE_DIR": str(tmp_path / "cache")}
+
+            with mock.patch.dict(os.environ, env), mock.patch.object(sys, "argv", argv):
+                with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                    cli.main()
+                self.assertEqual(
+                    [call.args[3] for call in load_mock.call_args_list],
+                    [(30, 0, 90, 70), None, (0, 0, 40, 40)],
+                )
+                out.unlink()
+                with mock.patch.object(engine, "load_tile", side_effect=AssertionError("decoded")):
+                    cli.main()
+
+            uncached = tmp_path / "uncached.png"
+            cli.compose_from_yaml(layout, str(uncached), cli.ComposeOptions(jobs=1))
+            with Image.open(out) as im, Image.open(uncached) as ref:
+                self.assertEqual(im.tobytes(), ref.tobytes())
+
+
+class TestComposeBatch(unittest.TestCase):
+    """Tests for compose-batch over many layouts."""
+
+    def _write_batch(self, tmp_path: Path) -> list:
+        base = write_layout(tmp_path)
+        data = cli.load_yaml(base)
+        layouts = tmp_path / "layouts"
+        layouts.mkdir()
+        paths = []
+        for name, shift in (("alpha", 0), ("beta", 5)):
+            variant = dict(data, output=str(tmp_path / f"{name}.png"))
+            variant["items"] = [dict(item, x=item["x"] + shift) for item in data["items"]]
+            path = layouts / f"{name}.yml"
+            cli.save_yaml(path, variant)
+            paths.append(path)
+        broken = layouts / "broken.yml"
+        cli.save_yaml(broken, {"items": [{"file": "missing.png", "x": 0, "y": 0, "resolution": "4x4"}]})
+        return paths + [broken]
+
+    def test_batch_matches_single_composes_and_decodes_once(self):
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            alpha, beta, broken = self._write_batch(tmp_path)
+            with mock.patch.object(cli, "load_tile", wraps=cli.load_tile) as load_mock, \
+                    mock.patch.object(engine, "probe_tile_mode", wraps=engine.probe_tile_mode) as mode_mock:
+                results = cli.compose_batch([alpha, beta, broken], output_dir=tmp_path / "out", jobs=2)
+            # Six tiles shared by both layouts, plus the broken layout's attempt.
+            self.assertEqual(load_mock.call_count, 7)
+            # Canvas modes come from the batch's shared header probes; only the
+            # unreadable source is opened again.
+            self.assertEqual([Path(call.args[0]).name for call in mode_mock.call_args_list], ["missing.png"])
+            self.assertEqual([r.ok for r in results], [True, True, False])
+            self.assertIn("missing.png", results[2].error)
+            for path in (alpha, beta):
+                single = tmp_path / f"single-{path.stem}.png"
+                cli.compose_from_yaml(path, str(single), cli.ComposeOptions(jobs=1))
+                batched = tmp_path / "out" / f"{path.stem}.png"
+                self.assertEqual(batched.read_bytes(), single.read_bytes(), msg=path.name)
+
+    def test_output_collisions_are_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            alpha, _beta, _broken = self._write_batch(tmp_path)
+            results = cli.compose_batch([alpha, Path(str(alpha))], jobs=1)
+            self.assertEqual(len(results), 2)
+            self.assertTrue(results[0].ok)
+            self.assertIn("collides", results[1].error)
+
+    def test_find_layouts_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            alpha, beta, broken = self._write_batch(tmp_path)
+            self.assertEqual(cli.find_layouts([str(alpha.parent)]), [alpha, beta, broken])
+            self.assertEqual(cli.find_layouts([str(alpha.parent / "b*.yml")]), [beta, broken])
+            listing = tmp_path / "nightly.txt"
+            listing.write_text("# nightly set\nlayouts/beta.yml\n\nlayouts/alpha.yml\n", encoding="utf-8")
+            self.assertEqual(cli.find_layouts([str(listing), str(alpha)]), [beta, alpha])
+            with self.assertRaises(SystemExit):
+                cli.find_layouts([str(tmp_path / "nothing-*.yml")])
+
+    def test_cli_writes_summary_and_fails_on_errors(self):
+        import json
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            paths = self._write_batch(tmp_path)
+            summary = tmp_path / "summary.json"
+            args = cli.build_arg_parser().parse_args([
+                "compose-batch", str(paths[0].parent), "--output-dir", str(tmp_path / "out"),
+                "-j", "2", "--no-cache", "--summary", str(summary),
+            ])
+            with self.assertRaises(SystemExit):
+                cli.run_batch_command(args)
+            report = json.loads(summary.read_text(encoding="utf-8"))
+            self.assertEqual([entry["ok"] for entry in report], [True, True, False])
+            self.assertTrue((tmp_path / "out" / "alpha.png").exists())
+
+
+class TestPreviewLoader(unittest.TestCase):
+    """Tests for the Qt-free preview helpers used by the GUI."""
+
+    def test_previews_are_drained_once(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "src.png"
+            Image.new("RGB", (80, 60), (10, 200, 30)).save(path)
+            loader = cli.PreviewLoader(jobs=1)
+            try:
+                owner = object()
+                loader.request(owner, str(path), (20, 15))
+                loader.request("missing", str(Path(tmp) / "missing.png"), (20, 15))
+                results = loader.drain(timeout=10)
+                if len(results) < 2:
+                    results += loader.drain(timeout=10)
+                self.assertEqual(loader.drain(), [])
+            finally:
+                loader.close()
+        previews = {result[0]: result for result in results}
+        _owner, size, image = previews[owner]
+        self.assertEqual((size, image.mode, image.size), ((20, 15), "RGBA", (20, 15)))
+        self.assertIsNone(previews["missing"][2])
+
+    def test_submitted_jobs_are_not_drained(self):
+        loader = cli.PreviewLoader(jobs=1)
+        try:
+            self.assertEqual(loader.submit(sum, [1, 2, 3]).result(10), 6)
+            self.assertEqual(loader.drain(), [])
+        finally:
+            loader.close()
+
+    def test_match_items_reuses_same_image(self):
+        def items(*specs):
+            return [cli.Item(file=f, x=0, y=0, w=w, h=10, resolution=f"{w}x10") for f, w in specs]
+
+        old = items(("a", 10), ("b", 10), ("a", 10), ("c", 10))
+        self.assertEqual(cli.match_items(old, old), [0, 1, 2, 3])
+        # Same file at a new size, a new file, and a reordered duplicate.
+        new = items(("b", 10), ("a", 20), ("a", 10), ("d", 10), ("a", 10))
+        self.assertEqual(cli.match_items(old, new), [1, None, 2, None, 0])
+        self.assertEqual(cli.match_items([], new), [None] * 5)
+
+    def test_preview_levels_follow_view_scale(self):
+        size = (1920, 1080)
+        self.assertEqual(cli.preview_level(2.0, size), 0)
+        self.assertEqual(cli.preview_level(1.0, size), 0)
+        self.assertEqual(cli.preview_level(0.5, size), 1)
+        self.assertEqual(cli.preview_level(0.2, size), 2)
+        self.assertEqual(cli.preview_level(0.1, size), 3)
+        self.assertEqual(cli.preview_level(1e-6, size), 10)
+        self.assertEqual(cli.level_size(size, 0), size)
+        self.assertEqual(cli.level_size(size, 3), (240, 135))
+        self.assertEqual(cli.level_size((1001, 3), 2), (251, 1))
+        self.assertEqual(cli.level_size(size, 10), (2, 2))
+
+
+@unittest.skipUnless(importlib.util.find_spec("PyQt5"), "PyQt5 is not installed")
+class TestEditorExport(unittest.TestCase):
+    """Tests for exporting from the GUI editor on an offscreen display."""
+
+    def test_export_uses_moved_items_without_apply(self):
+        from unittest import mock
+        from PIL import Image
+        from PyQt5.QtWidgets import QApplication, QFileDialog
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(
+            os.environ, {"QT_QPA_PLATFORM": "offscreen"}
+        ):
+            tmp_path = Path(tmp)
+            layout = write_layout(tmp_path)
+            with mock.patch.object(QApplication, "exec_", return_value=0):
+                editor = cli.LayoutEditor(layout)
+            try:
+                editor.snap_threshold = 0
+                editor.layout_items[0].graphics_item.setPos(10, 5)
+                exported = tmp_path / "exported.png"
+                with mock.patch.object(QFileDialog, "getSaveFileName", return_value=(str(exported), "")):
+                    editor.on_export_png()
+                editor.export_job[1].result(10)
+            finally:
+                editor.previews.close()
+                editor.window.close()
+
+            data = cli.load_yaml(layout)
+            data.update(canvas_width=80, canvas_height=42)
+            data["items"][0].update(x=10, y=5)
+            cli.save_yaml(layout, data)
+            expected = tmp_path / "expected.png"
+            cli.compose_from_yaml(layout, str(expected), cli.ComposeOptions(jobs=1))
+            with Image.open(exported) as im, Image.open(expected) as ref:
+                self.assertEqual(im.convert("RGBA").tobytes(), ref.convert("RGBA").tobytes())
+
+
+class TestEdgeIndex(unittest.TestCase):
+    """Tests for the sorted edge index behind GUI snapping."""
+
+    def test_snap_to_closest_other_edge(self):
+        from lyco.geometry import EdgeIndex
+
+        edges = EdgeIndex()
+        edges.move("a", 0, 100)
+        edges.move("b", 100, 50)
+        edges.move("moving", 300, 40)
+        # Start edge snaps to a's end / b's start; end edge snaps to b's end.
+        self.assertEqual(edges.snap("moving", 104, 40, 10), (100, 100))
+        self.assertEqual(edges.snap("moving", 113, 40, 10), (110, 150))
+        # The moving span's own edges never attract it.
+        self.assertEqual(edges.snap("moving", 295, 40, 10), (295, None))
+        # A shared position stays snappable while another span still has it.
+        edges.move("c", 300, 10)
+        self.assertEqual(edges.snap("moving", 295, 40, 10), (300, 300))
+
+    def test_moves_and_removals_update_edges(self):
+        from lyco.geometry import EdgeIndex
+
+        edges = EdgeIndex()
+        edges.move("a", 0, 100)
+        edges.move("b", 100, 50)
+        edges.move("b", 500, 50)
+        self.assertEqual(edges.nearest(103, 10), 100)
+        self.assertEqual(edges.nearest(553, 10), 550)
+        edges.remove("a")
+        self.assertIsNone(edges.nearest(103, 10))
+        self.assertEqual(len(edges), 1)
+        edges.clear()
+        self.assertIsNone(edges.nearest(553, 10))
+
+
 if __name__ == "__main__":
     unittest.main()
-
+
@@ -79,6 +79,7 @@ class TestE2EInvocations(unittest.TestCase):
 
             env = os.environ.copy()
             env["PYTHONPATH"] = str(ROOT / "src")
+            env["LYCO_CACHE_DIR"] = str(tmp_path / "cache")
             result = self._run(
                 [sys.executable, "-m", "lyco", "compose", "-c", str(layout), "-o", str(output)],
                 env=env,
@@ -120,4 +121,4 @@ class TestE2ECompile(unittest.TestCase):
 
 if __name__ == "__main__":
     unittest.main()
-
+
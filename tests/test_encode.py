@@ -0,0 +1,176 @@
+"""Tests for streaming image writers."""
+
+import io
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if SRC.exists():
+    sys.path.insert(0, str(SRC))
+
+from lyco import encode  # noqa: E402
+
+
+def _sample_image(mode: str = "RGBA", size: tuple[int, int] = (37, 23)):
+    """Return a deterministic image with varied pixel values."""
+    from PIL import Image
+
+    detail = Image.effect_mandelbrot(size, (-2.0, -1.2, 1.0, 1.2), 32)
+    gradient = Image.linear_gradient("L").resize(size)
+    bands = [detail, gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT)]
+    if mode == "RGBA":
+        bands.append(gradient.transpose(Image.FLIP_TOP_BOTTOM))
+    return Image.merge(mode, bands)
+
+
+def _stream(writer_cls, image, band: int, **kwargs) -> bytes:
+    """Write an image through a stream writer in bands of ``band`` rows."""
+    buf = io.BytesIO()
+    writer = writer_cls(buf, image.size, image.mode, **kwargs)
+    for top in range(0, image.height, band):
+        writer.write(image.crop((0, top, image.width, min(top + band, image.height))))
+    writer.close()
+    return buf.getvalue()
+
+
+class TestPngStreamWriter(unittest.TestCase):
+    """Tests for the incremental PNG writer."""
+
+    def test_roundtrip_all_filters_and_modes(self):
+        from PIL import Image
+
+        for mode in ("RGB", "RGBA"):
+            image = _sample_image(mode)
+            for method in encode.PNG_FILTERS:
+                data = _stream(encode.PngStreamWriter, image, 5, filter_method=method)
+                decoded = Image.open(io.BytesIO(data))
+                self.assertEqual(decoded.mode, mode)
+                self.assertEqual(decoded.tobytes(), image.tobytes(), msg=f"{mode}/{method}")
+
+    def test_rejects_incomplete_stream(self):
+        image = _sample_image()
+        writer = encode.PngStreamWriter(io.BytesIO(), image.size)
+        writer.write(image.crop((0, 0, image.width, 4)))
+        with self.assertRaises(ValueError):
+            writer.close()
+
+
+class TestTiffStreamWriter(unittest.TestCase):
+    """Tests for the incremental TIFF writer."""
+
+    def test_roundtrip(self):
+        from PIL import Image
+
+        for mode in ("RGB", "RGBA"):
+            image = _sample_image(mode)
+            data = _stream(encode.TiffStreamWriter, image, 6)
+            decoded = Image.open(io.BytesIO(data))
+            self.assertEqual(decoded.mode, mode)
+            self.assertEqual(decoded.tobytes(), image.tobytes(), msg=mode)
+
+    def test_rejects_uneven_strips(self):
+        image = _sample_image()
+        writer = encode.TiffStreamWriter(io.BytesIO(), image.size)
+        writer.write(image.crop((0, 0, image.width, 4)))
+        with self.assertRaises(ValueError):
+            writer.write(image.crop((0, 4, image.width, 10)))
+
+
+class TestEncodeImage(unittest.TestCase):
+    """Tests for the configurable output encoder."""
+
+    def test_resolve_infers_format_and_applies_presets(self):
+        opts = encode.EncodeOptions(preset="small").resolve("out.TIFF")
+        self.assertEqual((opts.format, opts.tiff_compression), ("tiff", "lzw"))
+        opts = encode.EncodeOptions(preset="fast", compress_level=4).resolve("out.png")
+        self.assertEqual((opts.compress_level, opts.png_filter), (4, "up"))
+        self.assertIsNone(encode.EncodeOptions().resolve("out.bmp").format)
+        with self.assertRaises(ValueError):
+            encode.EncodeOptions(compress_level=11).resolve("out.png")
+        with self.assertRaises(ValueError):
+            encode.EncodeOptions(format="gif").resolve("out.png")
+
+    def test_lossless_roundtrip_for_each_format(self):
+        from PIL import Image
+
+        image = _sample_image()
+        variants = [
+            encode.EncodeOptions(format="png"),
+            encode.EncodeOptions(format="png", preset="fast"),
+            encode.EncodeOptions(format="png", png_filter="sub", compress_level=9),
+            encode.EncodeOptions(format="webp", preset="fast"),
+            encode.EncodeOptions(format="tiff"),
+            encode.EncodeOptions(format="tiff", preset="small"),
+        ]
+        for opts in variants:
+            buf = io.BytesIO()
+            stats = encode.encode_image(image, buf, opts)
+            self.assertEqual(stats.bytes_written, len(buf.getvalue()))
+            decoded = Image.open(io.BytesIO(buf.getvalue())).convert("RGBA")
+            self.assertEqual(decoded.tobytes(), image.tobytes(), msg=str(opts))
+
+        buf = io.BytesIO()
+        encode.encode_image(image, buf, encode.EncodeOptions(format="raw"))
+        self.assertEqual(buf.getvalue(), image.tobytes())
+
+    def test_buffer_target_requires_format(self):
+        with self.assertRaises(ValueError):
+            encode.encode_image(_sample_image(), io.BytesIO())
+
+
+class TestParallelPng(unittest.TestCase):
+    """Tests for the multi-threaded PNG writer."""
+
+    def test_adler32_combine(self):
+        import zlib
+
+        a, b = b"lyco" * 5000, bytes(range(256)) * 300
+        self.assertEqual(
+            encode.adler32_combine(zlib.adler32(a), zlib.adler32(b), len(b)),
+            zlib.adler32(a + b),
+        )
+
+    def test_roundtrip_matches_pillow(self):
+        import zlib
+        from unittest import mock
+        from PIL import Image
+
+        image = _sample_image("RGBA", (301, 97))
+        reference = io.BytesIO()
+        image.save(reference, format="PNG")
+        # Force many small chunks so sync-flush stitching and dictionaries are exercised.
+        with mock.patch.object(encode, "PARALLEL_CHUNK_BYTES", 4096):
+            for method in encode.PNG_FILTERS:
+                buf = io.BytesIO()
+                written = encode.write_png_parallel(image, buf, 6, method, jobs=3)
+                data = buf.getvalue()
+                self.assertEqual(written, len(data))
+                decoded = Image.open(io.BytesIO(data))
+                self.assertEqual(
+                    decoded.tobytes(), Image.open(io.BytesIO(reference.getvalue())).tobytes()
+                )
+                # zlib.decompress verifies the stitched stream and Adler-32 trailer.
+                idat, pos = b"", 8
+                while pos < len(data):
+                    length = int.from_bytes(data[pos:pos + 4], "big")
+                    if data[pos + 4:pos + 8] == b"IDAT":
+                        idat += data[pos + 8:pos + 8 + length]
+                    pos += length + 12
+                self.assertEqual(
+                    zlib.decompress(idat), encode.filter_scanlines(image, None, method)
+                )
+
+    def test_encode_image_uses_parallel_writer(self):
+        from PIL import Image
+
+        image = _sample_image()
+        buf = io.BytesIO()
+        encode.encode_image(image, buf, encode.EncodeOptions(format="png", jobs=2))
+        self.assertEqual(Image.open(io.BytesIO(buf.getvalue())).tobytes(), image.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+"""Tests for the local compose service (lyco serve)."""
+
+import http.client
+import json
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if SRC.exists():
+    sys.path.insert(0, str(SRC))
+
+from lyco import cli, engine  # noqa: E402
+from lyco.serve import ComposeService, make_server  # noqa: E402
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP client connection over a Unix domain socket."""
+
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class ServeTestCase(unittest.TestCase):
+    """Runs a compose service on a free localhost port for each test."""
+
+    service_args: dict = {}
+
+    def setUp(self):
+        from PIL import Image
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.layout = {"items": []}
+        for idx, colour in enumerate(((220, 30, 30), (30, 220, 30))):
+            path = self.tmp_path / f"img{idx}.png"
+            Image.new("RGB", (40, 30), colour).save(path)
+            self.layout["items"].append(
+                {"file": str(path), "x": idx * 16, "y": 0, "resolution": "16x12"}
+            )
+        self.service = ComposeService(jobs=1, **self.service_options())
+        self.server = make_server(self.service, port=0, quiet=True, **self.server_args())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def service_options(self) -> dict:
+        return dict(self.service_args)
+
+    def server_args(self) -> dict:
+        return {}
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        self._tmp.cleanup()
+
+    def connect(self) -> http.client.HTTPConnection:
+        host, port = self.server.server_address[:2]
+        return http.client.HTTPConnection(host, port, timeout=10)
+
+    def request(self, method: str, path: str, body: bytes | None = None, headers: dict | None = None):
+        conn = self.connect()
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+
+class TestServeHttp(ServeTestCase):
+    """Tests for compose requests over localhost HTTP."""
+
+    def test_yaml_post_returns_png_and_reuses_tiles(self):
+        from unittest import mock
+        import yaml
+
+        yaml_body = yaml.safe_dump(self.layout)
+        with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+            status, headers, body = self.request("POST", "/compose", yaml_body.encode("utf-8"))
+            self.assertEqual(status, 200, body)
+            self.assertEqual(headers["Content-Type"], "image/png")
+            self.assertEqual(headers["X-Lyco-Size"], "32x12")
+            status, _headers, again = self.request("POST", "/compose", yaml_body.encode("utf-8"))
+            self.assertEqual(status, 200)
+        self.assertEqual(load_mock.call_count, 2)
+        self.assertEqual(again, body)
+
+        layout_path = self.tmp_path / "layout.yml"
+        cli.save_yaml(layout_path, self.layout)
+        expected = self.tmp_path / "expected.png"
+        cli.compose_from_yaml(layout_path, str(expected), cli.ComposeOptions(jobs=1))
+        self.assertEqual(body, expected.read_bytes())
+
+        _status, _headers, metrics = self.request("GET", "/metrics")
+        metrics = json.loads(metrics)
+        self.assertEqual(metrics["requests_ok"], 2)
+        self.assertEqual(metrics["memo_hits"], 2)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    def test_output_is_refused_without_output_dir(self):
+        out = self.tmp_path / "out.png"
+        status, _headers, body = self.request(
+            "POST", f"/compose?output={out}", json.dumps(self.layout).encode("utf-8")
+        )
+        self.assertEqual(status, 400)
+        self.assertIn("--output-dir", json.loads(body)["error"])
+        self.assertFalse(out.exists())
+
+    def test_invalid_layout_is_a_client_error(self):
+        status, _headers, body = self.request("POST", "/compose", b"items: []")
+        self.assertEqual(status, 400)
+        self.assertIn("items", json.loads(body)["error"])
+        status, _headers, _body = self.request("GET", "/nope")
+        self.assertEqual(status, 404)
+
+    def test_malformed_content_length_is_a_client_error(self):
+        status, _headers, body = self.request(
+            "POST", "/compose", b"items: []", {"Content-Length": "nine"}
+        )
+        self.assertEqual(status, 400)
+        self.assertIn("Content-Length", json.loads(body)["error"])
+
+
+class TestServeOutputDir(ServeTestCase):
+    """Tests for server-side writes confined to --output-dir."""
+
+    def service_options(self) -> dict:
+        self.output_dir = self.tmp_path / "out"
+        self.output_dir.mkdir()
+        return {"output_dir": str(self.output_dir)}
+
+    def test_json_post_writes_output(self):
+        status, _headers, body = self.request(
+            "POST",
+            "/compose?output=out.webp",
+            json.dumps(self.layout).encode("utf-8"),
+            {"Content-Type": "application/json"},
+        )
+        self.assertEqual(status, 200, body)
+        reply = json.loads(body)
+        out = self.output_dir / "out.webp"
+        self.assertEqual((reply["format"], reply["bytes"]), ("webp", out.stat().st_size))
+
+    def test_output_outside_output_dir_is_refused(self):
+        body = json.dumps(self.layout).encode("utf-8")
+        for output in ("../x.png", str(self.tmp_path / "x.png")):
+            status, _headers, reply = self.request("POST", f"/compose?output={output}", body)
+            self.assertEqual(status, 400, output)
+            self.assertIn("inside", json.loads(reply)["error"])
+        self.assertFalse((self.tmp_path / "x.png").exists())
+
+
+class TestServeLimits(ServeTestCase):
+    """Tests for concurrency and queue-depth limits."""
+
+    service_args = {"max_concurrency": 1, "max_queue": 0}
+
+    def test_full_queue_is_rejected(self):
+        from unittest import mock
+
+        release = threading.Event()
+        entered = threading.Event()
+        original = self.service._compose
+
+        def slow_compose(*args):
+            entered.set()
+            release.wait(10)
+            return original(*args)
+
+        body = json.dumps(self.layout).encode("utf-8")
+        results = []
+        with mock.patch.object(self.service, "_compose", side_effect=slow_compose):
+            first = threading.Thread(target=lambda: results.append(self.request("POST", "/compose", body)))
+            first.start()
+            self.assertTrue(entered.wait(10))
+            status, headers, _body = self.request("POST", "/compose", body)
+            self.assertEqual(status, 503)
+            self.assertEqual(headers["Retry-After"], "1")
+            metrics = json.loads(self.request("GET", "/metrics")[2])
+            self.assertEqual((metrics["active"], metrics["requests_rejected"]), (1, 1))
+            release.set()
+            first.join(10)
+        self.assertEqual(results[0][0], 200)
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TestServeUnixSocket(ServeTestCase):
+    """Tests for serving over a Unix domain socket."""
+
+    def server_args(self) -> dict:
+        self.socket_path = str(self.tmp_path / "lyco.sock")
+        return {"socket_path": self.socket_path}
+
+    def connect(self) -> http.client.HTTPConnection:
+        return UnixHTTPConnection(self.socket_path)
+
+    def test_existing_non_socket_path_is_not_replaced(self):
+        path = self.tmp_path / "notes.txt"
+        path.write_text("keep", encoding="utf-8")
+        with self.assertRaises(SystemExit):
+            make_server(self.service, socket_path=str(path))
+        self.assertEqual(path.read_text(encoding="utf-8"), "keep")
+
+    def test_compose_over_unix_socket(self):
+        body = json.dumps(self.layout).encode("utf-8")
+        status, headers, body = self.request("POST", "/compose?format=raw", body)
+        self.assertEqual(status, 200, body)
+        self.assertEqual(headers["Content-Type"], "application/octet-stream")
+        self.assertEqual(len(body), 32 * 12 * 4)
+        self.assertEqual(json.loads(self.request("GET", "/metrics")[2])["requests_ok"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,6 +9,12 @@ def load_tests(loader, tests, pattern):
     """Load full test suite."""
     suite = unittest.TestSuite()
     suite.addTests(loader.loadTestsFromName("tests.test_cli"))
+    suite.addTests(loader.loadTestsFromName("tests.test_api"))
+    suite.addTests(loader.loadTestsFromName("tests.test_tile_cache"))
+    suite.addTests(loader.loadTestsFromName("tests.test_encode"))
+    suite.addTests(loader.loadTestsFromName("tests.test_watch"))
+    suite.addTests(loader.loadTestsFromName("tests.test_serve"))
+    suite.addTests(loader.loadTestsFromName("tests.test_benchmarks"))
     suite.addTests(loader.loadTestsFromName("tests.test_launcher"))
     suite.addTests(loader.loadTestsFromName("tests.test_docs"))
     suite.addTests(loader.loadTestsFromName("tests.test_e2e"))
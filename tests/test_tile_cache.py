@@ -0,0 +1,176 @@
+"""Tests for the persistent tile cache."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if SRC.exists():
+    sys.path.insert(0, str(SRC))
+
+from lyco import cli, engine  # noqa: E402
+from lyco.tile_cache import PreviewCache, TileCache  # noqa: E402
+
+
+class TestTileCache(unittest.TestCase):
+    """Tests for TileCache keys, storage, and eviction."""
+
+    def setUp(self):
+        from PIL import Image
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.src = self.tmp_path / "src.png"
+        Image.new("RGBA", (20, 10), (1, 2, 3, 255)).save(self.src)
+        self.cache = TileCache(self.tmp_path / "cache", max_bytes=1024 * 1024)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_key_depends_on_content_size_and_mode(self):
+        from PIL import Image
+
+        base = self.cache.key(str(self.src), (8, 4))
+        self.assertEqual(base, self.cache.key(str(self.src), (8, 4)))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (8, 5)))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (8, 4), mode="RGB"))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (8, 4), resample="fast"))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (8, 4), crop=(0, 0, 4, 4)))
+        Image.new("RGBA", (20, 10), (9, 9, 9, 255)).save(self.src)
+        os.utime(self.src, ns=(time.time_ns(), time.time_ns() + 10**9))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (8, 4)))
+
+    def test_put_get_roundtrip(self):
+        from PIL import Image
+
+        key = self.cache.key(str(self.src), (8, 4))
+        self.assertIsNone(self.cache.get(key, (8, 4)))
+        tile = Image.new("RGBA", (8, 4), (10, 20, 30, 40))
+        self.cache.put(key, tile)
+        cached = self.cache.get(key, (8, 4))
+        self.assertEqual(cached.tobytes(), tile.tobytes())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.stats()["entries"], 1)
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertIsNone(self.cache.get(key, (8, 4)))
+
+    def test_lru_eviction(self):
+        from PIL import Image
+
+        cache = TileCache(self.tmp_path / "small", max_bytes=2 * 16 * 16 * 4)
+        keys = [f"{idx:02d}" + "0" * 38 for idx in range(3)]
+        for idx, key in enumerate(keys):
+            cache.put(key, Image.new("RGBA", (16, 16), (idx, 0, 0, 255)))
+            # Make recency ordering explicit regardless of filesystem mtime resolution.
+            os.utime(cache._path(key), (idx, idx))
+            cache.evict()
+        self.assertIsNone(cache.get(keys[0], (16, 16)))
+        self.assertIsNotNone(cache.get(keys[2], (16, 16)))
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+    def test_rewriting_a_key_keeps_the_byte_count(self):
+        from PIL import Image
+
+        tile_bytes = 16 * 16 * 4
+        cache = TileCache(self.tmp_path / "small", max_bytes=3 * tile_bytes)
+        keys = [f"{idx:02d}" + "0" * 38 for idx in range(2)]
+        for key in keys:
+            cache.put(key, Image.new("RGBA", (16, 16)))
+        for shade in range(5):
+            cache.put(keys[0], Image.new("RGBA", (16, 16), (shade, 0, 0, 255)))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (2, 2 * tile_bytes))
+        self.assertEqual(cache._total, stats["bytes"])
+
+
+class TestComposeWithCache(unittest.TestCase):
+    """Tests for compose reusing cached tiles."""
+
+    def test_recompose_hits_cache(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            img = tmp_path / "img.png"
+            Image.new("RGBA", (64, 48), (200, 10, 10, 255)).save(img)
+            layout = tmp_path / "layout.yml"
+            layout.write_text(
+                "\n".join(
+                    [
+                        "items:",
+                        f"  - file: \"{img}\"",
+                        "    x: 0",
+                        "    y: 0",
+                        "    resolution: \"32x24\"",
+                    ]
+                ),
+                encoding="utf-8",
+            )
+            cache = TileCache(tmp_path / "cache")
+            first = tmp_path / "first.png"
+            second = tmp_path / "second.png"
+            cli.compose_from_yaml(layout, str(first), cli.ComposeOptions(jobs=1, cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            cli.compose_from_yaml(layout, str(second), cli.ComposeOptions(jobs=1, cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(first.read_bytes(), second.read_bytes())
+
+
+class TestPreviewCache(unittest.TestCase):
+    """Tests for the on-disk GUI preview cache."""
+
+    def setUp(self):
+        from PIL import Image
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.src = self.tmp_path / "src.png"
+        Image.new("RGB", (80, 60), (30, 120, 200)).save(self.src)
+        self.cache = PreviewCache(self.tmp_path / "previews")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_render_preview_reads_cache_before_decoding(self):
+        from unittest import mock
+
+        first = cli.render_preview(str(self.src), (20, 15), self.cache)
+        with mock.patch.object(engine, "load_tile", side_effect=AssertionError("decoded")):
+            again = cli.render_preview(str(self.src), (20, 15), self.cache)
+        self.assertEqual((again.mode, again.size), ("RGBA", (20, 15)))
+        self.assertEqual(again.getpixel((10, 7))[3], 255)
+        for ours, theirs in zip(again.getpixel((10, 7)), first.getpixel((10, 7))):
+            self.assertLessEqual(abs(ours - theirs), 8)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_follows_source_stamp_and_size(self):
+        from PIL import Image
+
+        base = self.cache.key(str(self.src), (20, 15))
+        self.assertEqual(base, self.cache.key(str(self.src), (20, 15)))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (10, 8)))
+        Image.new("RGB", (80, 60), (1, 2, 3)).save(self.src)
+        os.utime(self.src, ns=(time.time_ns(), time.time_ns() + 10**9))
+        self.assertNotEqual(base, self.cache.key(str(self.src), (20, 15)))
+
+    def test_size_mismatch_and_eviction(self):
+        from PIL import Image
+
+        key = self.cache.key(str(self.src), (20, 15))
+        self.cache.put(key, Image.new("RGBA", (20, 15), (1, 2, 3, 255)))
+        self.assertIsNone(self.cache.get(key, (20, 16)))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+        noisy = Image.effect_noise((64, 64), 80).convert("RGBA")
+        cache = PreviewCache(self.tmp_path / "small", max_bytes=1)
+        cache.put("aa" + "0" * 38, noisy)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+"""Tests for file watchers and the watch-mode recompose loop."""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if SRC.exists():
+    sys.path.insert(0, str(SRC))
+
+from lyco import cli, engine  # noqa: E402
+from lyco.tile_cache import TileMemo  # noqa: E402
+from lyco.watch import InotifyWatcher, PollingWatcher  # noqa: E402
+
+
+def _make_inotify():
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        return None
+
+
+class TestWatchers(unittest.TestCase):
+    """Tests for the inotify and polling watchers."""
+
+    def _check_watcher(self, watcher):
+        with tempfile.TemporaryDirectory() as tmp:
+            watched = Path(tmp) / "watched.png"
+            other = Path(tmp) / "other.png"
+            watched.write_bytes(b"one")
+            watcher.watch([str(watched)])
+            other.write_bytes(b"ignored")
+            self.assertEqual(watcher.wait(0.3), set())
+
+            # Atomic save: write a temp file and rename it over the original.
+            tmp_file = Path(tmp) / "watched.png.tmp"
+            tmp_file.write_bytes(b"two, longer")
+            os.replace(tmp_file, watched)
+            self.assertEqual(watcher.wait(2.0), {str(watched)})
+        watcher.close()
+
+    def test_polling_watcher(self):
+        self._check_watcher(PollingWatcher(interval=0.05))
+
+    def test_inotify_watcher(self):
+        watcher = _make_inotify()
+        if watcher is None:
+            self.skipTest("inotify is not available")
+        self._check_watcher(watcher)
+
+
+class TestTileMemo(unittest.TestCase):
+    """Tests for the in-memory tile memo."""
+
+    def test_changed_source_misses_and_prune_drops_unused(self):
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "src.png"
+            Image.new("RGB", (8, 8), (1, 2, 3)).save(src)
+            memo = TileMemo()
+            key = memo.key(str(src), (4, 4))
+            memo.put(key, Image.new("RGB", (4, 4)))
+            self.assertIsNotNone(memo.get(memo.key(str(src), (4, 4))))
+
+            Image.new("RGB", (9, 8), (1, 2, 3)).save(src)
+            self.assertIsNone(memo.get(memo.key(str(src), (4, 4))))
+            self.assertEqual(memo.prune(), 0)
+            self.assertEqual(memo.prune(), 1)
+            self.assertEqual(len(memo), 0)
+
+
+class TestWatchLayout(unittest.TestCase):
+    """Tests for the watch-mode recompose loop."""
+
+    def _wait_for(self, predicate, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def _run(self, poll: bool):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            images = []
+            for idx, colour in enumerate(((200, 0, 0), (0, 200, 0))):
+                path = tmp_path / f"img{idx}.png"
+                Image.new("RGB", (20, 20), colour).save(path)
+                images.append(path)
+            layout = tmp_path / "layout.yml"
+            out = tmp_path / "out.png"
+            cli.save_yaml(layout, {
+                "output": str(out),
+                "items": [
+                    {"file": str(path), "x": idx * 10, "y": 0, "resolution": "10x10"}
+                    for idx, path in enumerate(images)
+                ],
+            })
+
+            stop = threading.Event()
+            with mock.patch.object(engine, "load_tile", wraps=engine.load_tile) as load_mock:
+                worker = threading.Thread(
+                    target=cli.watch_layout,
+                    args=(layout,),
+                    kwargs={
+                        "options": cli.ComposeOptions(jobs=1),
+                        "debounce": 0.05,
+                        "poll": poll,
+                        "stop": stop,
+                    },
+                )
+                worker.start()
+                try:
+                    self.assertTrue(self._wait_for(out.exists))
+                    self.assertTrue(self._wait_for(lambda: load_mock.call_count == 2))
+                    first = out.stat().st_mtime_ns
+
+                    time.sleep(0.05)
+                    Image.new("RGB", (20, 20), (0, 0, 250)).save(images[1])
+
+                    def updated():
+                        if out.stat().st_mtime_ns == first:
+                            return False
+                        with Image.open(out) as im:
+                            return im.getpixel((15, 5))[:3] == (0, 0, 250)
+
+                    self.assertTrue(self._wait_for(updated))
+                    # Only the edited image was decoded again.
+                    self.assertEqual(load_mock.call_count, 3)
+                    self.assertEqual(load_mock.call_args[0][0], str(images[1]))
+                finally:
+                    stop.set()
+                    worker.join(5)
+            self.assertFalse(worker.is_alive())
+
+    def test_failed_encode_leaves_no_partial_file(self):
+        from unittest import mock
+        from PIL import Image
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            Image.new("RGB", (20, 20), (200, 0, 0)).save(tmp_path / "img.png")
+            layout = tmp_path / "layout.yml"
+            out = tmp_path / "out.png"
+            cli.save_yaml(layout, {
+                "output": str(out),
+                "items": [{"file": str(tmp_path / "img.png"), "x": 0, "y": 0, "resolution": "10x10"}],
+            })
+
+            def failing_encode(_canvas, target, _opts):
+                Path(target).write_bytes(b"half an image")
+                raise OSError("disk full")
+
+            stop = threading.Event()
+            with mock.patch.object(cli, "encode_image", side_effect=failing_encode) as encode_mock:
+                worker = threading.Thread(
+                    target=cli.watch_layout,
+                    args=(layout,),
+                    kwargs={
+                        "options": cli.ComposeOptions(jobs=1),
+                        "debounce": 0.05,
+                        "poll": True,
+                        "stop": stop,
+                    },
+                )
+                worker.start()
+                try:
+                    self.assertTrue(self._wait_for(lambda: encode_mock.call_count == 1))
+                finally:
+                    stop.set()
+                    worker.join(5)
+            self.assertFalse(worker.is_alive())
+            self.assertEqual(sorted(path.name for path in tmp_path.iterdir()), ["img.png", "layout.yml"])
+
+    def test_recompose_on_image_change_polling(self):
+        self._run(poll=True)
+
+    def test_recompose_on_image_change_inotify(self):
+        watcher = _make_inotify()
+        if watcher is None:
+            self.skipTest("inotify is not available")
+        watcher.close()
+        self._run(poll=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -193,6 +193,10 @@ def main() -> int:
         code |= run([base_python(), "tools/check_secrets.py"])
         code |= task_ci_record()
         return code
+    if task == "bench":
+        return run([base_python(), "benchmarks/bench_compose.py", "--save-baseline", *extra])
+    if task == "bench-compare":
+        return run([base_python(), "benchmarks/bench_compose.py", "--compare", *extra])
     if task == "setup-env":
         return run([base_python(), "tools/setup_env.py", *extra])
     if task == "wsl-check":